@@ -22,12 +22,40 @@ def create_app(config_name=None):
 
     app.config.from_object(config[config_name])
 
+    # orjson-backed JSON (stdlib fallback); handles date/Decimal/UUID natively
+    from app.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     CORS(app)
 
     # Initialize database
     from app.models.database import DatabaseManager
     DatabaseManager.initialize(app.config['DATABASE_URL'])
 
+    # Attachment storage backend
+    from app.auth.storage_backend import init_storage
+    init_storage(app.config)
+
+    # Background upload queue for adjuntos
+    from app.services.subidas import ColaSubidas
+    ColaSubidas.configure(app.config)
+
+    # Background thumbnail pipeline for image adjuntos
+    from app.services.miniaturas import MiniaturasWorker
+    MiniaturasWorker.configure(app.config)
+
+    # Fingerprinted frontend assets (flask build-assets)
+    from app.services.assets import Assets
+    Assets.configure(app.config)
+
+    # Thread pool for /api/batch sub-requests
+    from app.services.lotes import EjecutorLotes
+    EjecutorLotes.configure(app.config)
+
+    # Capacity planner settings for fecha_compromiso
+    from app.services.planificador import Planificador
+    Planificador.configure(app.config)
+
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.pedidos import pedidos_bp
@@ -35,12 +63,14 @@ def create_app(config_name=None):
     from app.routes.clientes import clientes_bp
     from app.routes.estadisticas import estadisticas_bp
     from app.routes.pages import pages_bp
+    from app.routes.batch import batch_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(pedidos_bp, url_prefix='/api')
     app.register_blueprint(productos_bp, url_prefix='/api')
     app.register_blueprint(clientes_bp, url_prefix='/api')
     app.register_blueprint(estadisticas_bp, url_prefix='/api')
+    app.register_blueprint(batch_bp, url_prefix='/api')
     app.register_blueprint(pages_bp)
 
     # pedido_extras - safe import (logs error if it fails instead of crashing)
@@ -53,8 +83,32 @@ def create_app(config_name=None):
         import traceback
         traceback.print_exc()
 
+    # Server-Timing phases and sampled OTLP traces (first hooks in, last out)
+    from app.tracing import init_tracing
+    init_tracing(app)
+
+    # Slow-query log, sampled EXPLAIN and per-request query budgets
+    from app.query_log import init_query_log
+    init_query_log(app)
+
+    # Prometheus /metrics (registered before compression so its timing includes it)
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    # X-Profile: per-request profiles for admins (covers the view and compression)
+    from app.profiling import init_profiling
+    init_profiling(app)
+
+    # gzip/brotli for API and page responses
+    from app.compression import init_compression
+    init_compression(app)
+
     # Error handlers
     from app.routes.errors import register_error_handlers
     register_error_handlers(app)
 
+    # CLI maintenance commands
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
@@ -4,9 +4,17 @@ Upload/download files via Supabase Storage REST API
 Uses service_role key to bypass RLS
 """
 import os
+import time
+import threading
 import requests
 import uuid
+from collections import OrderedDict
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from app import metrics, tracing
+from app.auth.storage_backend import (
+    StorageBackend, StreamMeter, ArchivoMuyGrande, iter_file, CHUNK_SIZE, MAX_FILE_SIZE
+)
 
 SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://namjhrpumgywarhjxjxx.supabase.co')
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_ROLE_KEY', '')
@@ -14,6 +22,90 @@ BUCKET_NAME = 'pedido-adjuntos'
 
 STORAGE_BASE = f"{SUPABASE_URL}/storage/v1"
 
+# HTTP client: keep-alive pool sized to the worker's thread count
+POOL_SIZE = int(os.environ.get('STORAGE_POOL_SIZE', os.environ.get('GUNICORN_THREADS', 10)))
+CONNECT_TIMEOUT = float(os.environ.get('STORAGE_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('STORAGE_READ_TIMEOUT', 30))
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3  # seconds, doubled on each attempt
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _get_session():
+    """Shared Session; urllib3's connection pool is thread-safe"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0, pool_block=False)
+                s.mount('https://', adapter)
+                s.mount('http://', adapter)
+                _session = s
+    return _session
+
+
+def _stat(op):
+    # caller holds _stats_lock
+    return _stats.setdefault(op, {'count': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
+
+def _record(op, elapsed, ok):
+    tracing.registrar('storage', elapsed, f'storage.{op}', **{'storage.operation': op, 'storage.ok': ok})
+    metrics.STORAGE_DURACION.labels(op).observe(elapsed)
+    if not ok:
+        metrics.STORAGE_ERRORES.labels(op).inc()
+    with _stats_lock:
+        st = _stat(op)
+        st['count'] += 1
+        if not ok:
+            st['errors'] += 1
+        ms = elapsed * 1000
+        st['total_ms'] += ms
+        st['max_ms'] = max(st['max_ms'], ms)
+
+
+def get_stats():
+    """Per-operation call counts and latency (ms) for this process"""
+    with _stats_lock:
+        return {op: {**st, 'avg_ms': round(st['total_ms'] / st['count'], 2) if st['count'] else 0}
+                for op, st in _stats.items()}
+
+
+def _request(op, method, url, idempotent=False, **kwargs):
+    """
+    Send one Storage API call through the pooled session.
+    Idempotent operations are retried with exponential backoff on
+    connection errors, timeouts and RETRY_STATUS responses.
+    """
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+    attempts = MAX_RETRIES + 1 if idempotent else 1
+    start = time.perf_counter()
+    for attempt in range(attempts):
+        last = attempt == attempts - 1
+        try:
+            response = _get_session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if last:
+                _record(op, time.perf_counter() - start, False)
+                raise
+        except Exception:
+            _record(op, time.perf_counter() - start, False)
+            raise
+        else:
+            if response.status_code not in RETRY_STATUS or last:
+                _record(op, time.perf_counter() - start, response.status_code < 400)
+                return response
+        metrics.STORAGE_REINTENTOS.labels(op).inc()
+        with _stats_lock:
+            _stat(op)['retries'] += 1
+        time.sleep(RETRY_BACKOFF * (2 ** attempt))
+
 
 def _headers(content_type=None):
     """Headers for Supabase Storage API using service_role key"""
@@ -26,48 +118,139 @@ def _headers(content_type=None):
     return h
 
 
+def _build_storage_path(pedido_numero, filename):
+    # Sanitize and build unique path: pedidos/{pedido_numero}/{uuid}_{filename}
+    safe_name = Path(filename).name  # strip any directory traversal
+    unique_name = f"{uuid.uuid4().hex[:8]}_{safe_name}"
+    return f"pedidos/{pedido_numero}/{unique_name}"
+
+
+def upload_stream(pedido_numero, chunks, filename, content_type='application/octet-stream', max_bytes=MAX_FILE_SIZE,
+                  storage_path=None):
+    """
+    Stream an upload to Supabase Storage without buffering it.
+    chunks: iterable of bytes, sent as a chunked request body.
+    storage_path: fixed (content-addressed) path, upserted; default is a
+    fresh pedidos/{pedido_numero}/{uuid}_{filename}.
+    Returns {'storage_path', 'size', 'sha256'}; raises ArchivoMuyGrande
+    as soon as max_bytes is crossed (the partial upload is aborted).
+    """
+    if not SUPABASE_SERVICE_KEY:
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
+
+    headers = _headers(content_type)
+    if storage_path:
+        # Same path always holds the same bytes, so overwriting is safe
+        headers['x-upsert'] = 'true'
+    else:
+        storage_path = _build_storage_path(pedido_numero, filename)
+    url = f"{STORAGE_BASE}/object/{BUCKET_NAME}/{storage_path}"
+
+    meter = StreamMeter(chunks, max_bytes)
+    try:
+        # Not retried: the request stream can only be consumed once
+        response = _request(
+            'upload', 'POST', url,
+            headers=headers,
+            data=iter(meter)
+        )
+    except Exception:
+        if meter.excedido:
+            raise ArchivoMuyGrande(f"Archivo muy grande (máx {max_bytes // (1024 * 1024)}MB)")
+        raise
+
+    if response.status_code not in (200, 201):
+        error_detail = response.text
+        raise Exception(f"Storage upload failed ({response.status_code}): {error_detail}")
+
+    return {'storage_path': storage_path, 'size': meter.size, 'sha256': meter.sha256}
+
+
 def upload_file(pedido_numero, file_obj, filename, content_type='application/octet-stream'):
     """
     Upload a file to Supabase Storage.
     Returns storage_path on success, raises on error.
     """
+    result = upload_stream(pedido_numero, iter_file(file_obj), filename, content_type, max_bytes=None)
+    return result['storage_path']
+
+
+def download_stream(storage_path, chunk_size=CHUNK_SIZE):
+    """Iterate a private object's bytes using the service key"""
     if not SUPABASE_SERVICE_KEY:
         raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
 
-    # Sanitize and build unique path: pedidos/{pedido_numero}/{uuid}_{filename}
-    safe_name = Path(filename).name  # strip any directory traversal
-    unique_name = f"{uuid.uuid4().hex[:8]}_{safe_name}"
-    storage_path = f"pedidos/{pedido_numero}/{unique_name}"
-
     url = f"{STORAGE_BASE}/object/{BUCKET_NAME}/{storage_path}"
+    response = _request('download', 'GET', url, idempotent=True, headers=_headers(), stream=True)
+    if response.status_code != 200:
+        raise Exception(f"Storage download failed ({response.status_code}): {response.text}")
+    return response.iter_content(chunk_size)
 
-    file_data = file_obj.read()
 
-    response = requests.post(
-        url,
-        headers=_headers(content_type),
-        data=file_data
-    )
+# Signed URL cache: storage_path -> {expires_in: (url, expires_at monotonic)}.
+# Keyed by the requested lifetime too, so a caller asking for a long-lived URL
+# never gets one signed for a shorter expires_in.
+SIGNED_URL_CACHE_SIZE = 5000
+SIGNED_URL_MARGIN = 300  # seconds of validity a cached URL must still have
 
-    if response.status_code not in (200, 201):
-        error_detail = response.text
-        raise Exception(f"Storage upload failed ({response.status_code}): {error_detail}")
+_url_cache = OrderedDict()
+_url_cache_lock = threading.Lock()
+
+
+def _cache_get(storage_path, expires_in):
+    with _url_cache_lock:
+        entry = _url_cache.get(storage_path, {}).get(expires_in)
+        if entry is None:
+            metrics.URL_CACHE.labels('miss').inc()
+            return None
+        url, expires_at = entry
+        if expires_at - time.monotonic() < SIGNED_URL_MARGIN:
+            del _url_cache[storage_path][expires_in]
+            metrics.URL_CACHE.labels('expirada').inc()
+            return None
+        _url_cache.move_to_end(storage_path)
+        metrics.URL_CACHE.labels('hit').inc()
+        return url
 
-    return storage_path
+
+def _cache_put(storage_path, url, expires_in, issued_at):
+    with _url_cache_lock:
+        _url_cache.setdefault(storage_path, {})[expires_in] = (url, issued_at + expires_in)
+        _url_cache.move_to_end(storage_path)
+        while len(_url_cache) > SIGNED_URL_CACHE_SIZE:
+            _url_cache.popitem(last=False)
+
+
+def _cache_invalidate(storage_path):
+    with _url_cache_lock:
+        _url_cache.pop(storage_path, None)
+
+
+def _full_url(signed_path):
+    if signed_path and signed_path.startswith('/'):
+        return f"{SUPABASE_URL}/storage/v1{signed_path}"
+    return signed_path
 
 
 def get_signed_url(storage_path, expires_in=3600):
     """
     Generate a signed URL for downloading a private file.
     expires_in: seconds (default 1 hour)
+    Reuses a URL cached for the same expires_in while it has more than
+    SIGNED_URL_MARGIN left.
     """
+    cached = _cache_get(storage_path, expires_in)
+    if cached:
+        return cached
+
     if not SUPABASE_SERVICE_KEY:
         raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
 
     url = f"{STORAGE_BASE}/object/sign/{BUCKET_NAME}/{storage_path}"
 
-    response = requests.post(
-        url,
+    issued_at = time.monotonic()
+    response = _request(
+        'sign', 'POST', url, idempotent=True,
         headers={**_headers('application/json')},
         json={'expiresIn': expires_in}
     )
@@ -76,12 +259,46 @@ def get_signed_url(storage_path, expires_in=3600):
         raise Exception(f"Signed URL failed ({response.status_code}): {response.text}")
 
     data = response.json()
-    signed_path = data.get('signedURL', '')
+    signed_url = _full_url(data.get('signedURL', ''))
+    _cache_put(storage_path, signed_url, expires_in, issued_at)
+    return signed_url
 
-    # Build full URL
-    if signed_path.startswith('/'):
-        return f"{SUPABASE_URL}/storage/v1{signed_path}"
-    return signed_path
+
+def get_signed_urls(storage_paths, expires_in=3600):
+    """
+    Sign many paths with one request (cache misses only).
+    Returns {storage_path: url}; paths Storage could not sign are omitted.
+    """
+    urls = {}
+    pendientes = []
+    for path in dict.fromkeys(storage_paths):
+        cached = _cache_get(path, expires_in)
+        if cached:
+            urls[path] = cached
+        else:
+            pendientes.append(path)
+    if not pendientes:
+        return urls
+
+    if not SUPABASE_SERVICE_KEY:
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
+
+    issued_at = time.monotonic()
+    response = _request(
+        'sign_batch', 'POST', f"{STORAGE_BASE}/object/sign/{BUCKET_NAME}", idempotent=True,
+        headers={**_headers('application/json')},
+        json={'expiresIn': expires_in, 'paths': pendientes}
+    )
+    if response.status_code != 200:
+        raise Exception(f"Batch signed URLs failed ({response.status_code}): {response.text}")
+
+    for item in response.json():
+        path = item.get('path')
+        if not path or item.get('error') or not item.get('signedURL'):
+            continue
+        urls[path] = _full_url(item['signedURL'])
+        _cache_put(path, urls[path], expires_in, issued_at)
+    return urls
 
 
 def delete_file(storage_path):
@@ -91,10 +308,102 @@ def delete_file(storage_path):
 
     url = f"{STORAGE_BASE}/object/{BUCKET_NAME}"
 
-    response = requests.delete(
-        url,
+    _cache_invalidate(storage_path)
+    response = _request(
+        'delete', 'DELETE', url, idempotent=True,
         headers={**_headers('application/json')},
         json={'prefixes': [storage_path]}
     )
 
     return response.status_code in (200, 201)
+
+
+DELETE_BATCH = 1000  # Storage API limit of prefixes per delete call
+LIST_PAGE = 1000
+
+
+def delete_files(storage_paths):
+    """Delete many objects with batched `prefixes` calls. Returns the number deleted."""
+    if not SUPABASE_SERVICE_KEY:
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
+
+    url = f"{STORAGE_BASE}/object/{BUCKET_NAME}"
+    borrados = 0
+    paths = list(dict.fromkeys(storage_paths))
+    for i in range(0, len(paths), DELETE_BATCH):
+        lote = paths[i:i + DELETE_BATCH]
+        for path in lote:
+            _cache_invalidate(path)
+        response = _request(
+            'delete_batch', 'DELETE', url, idempotent=True,
+            headers={**_headers('application/json')},
+            json={'prefixes': lote}
+        )
+        if response.status_code not in (200, 201):
+            raise Exception(f"Batch delete failed ({response.status_code}): {response.text}")
+        borrados += len(response.json())
+    return borrados
+
+
+def list_objects(prefix):
+    """
+    Recursively list objects under prefix (folder, no trailing slash).
+    Yields {'storage_path', 'size', 'created_at'} (created_at ISO string).
+    """
+    if not SUPABASE_SERVICE_KEY:
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY not configured")
+
+    url = f"{STORAGE_BASE}/object/list/{BUCKET_NAME}"
+    offset = 0
+    while True:
+        response = _request(
+            'list', 'POST', url, idempotent=True,
+            headers={**_headers('application/json')},
+            json={'prefix': prefix, 'limit': LIST_PAGE, 'offset': offset,
+                  'sortBy': {'column': 'name', 'order': 'asc'}}
+        )
+        if response.status_code != 200:
+            raise Exception(f"List failed ({response.status_code}): {response.text}")
+        items = response.json()
+        for item in items:
+            path = f"{prefix}/{item['name']}" if prefix else item['name']
+            if item.get('id') is None:
+                # Folder
+                yield from list_objects(path)
+            else:
+                yield {
+                    'storage_path': path,
+                    'size': (item.get('metadata') or {}).get('size'),
+                    'created_at': item.get('created_at'),
+                }
+        if len(items) < LIST_PAGE:
+            return
+        offset += LIST_PAGE
+
+
+class SupabaseStorage(StorageBackend):
+    """StorageBackend over the Supabase Storage REST API (functions above)"""
+
+    name = 'supabase'
+
+    def upload_stream(self, pedido_numero, chunks, filename, content_type='application/octet-stream',
+                      max_bytes=MAX_FILE_SIZE, storage_path=None):
+        return upload_stream(pedido_numero, chunks, filename, content_type, max_bytes, storage_path)
+
+    def open_stream(self, storage_path):
+        return download_stream(storage_path)
+
+    def get_signed_url(self, storage_path, expires_in=3600, download_name=None):
+        return get_signed_url(storage_path, expires_in)
+
+    def get_signed_urls(self, storage_paths, expires_in=3600):
+        return get_signed_urls(storage_paths, expires_in)
+
+    def delete_file(self, storage_path):
+        return delete_file(storage_path)
+
+    def delete_files(self, storage_paths):
+        return delete_files(storage_paths)
+
+    def list_objects(self, prefix=''):
+        return list_objects(prefix)
@@ -0,0 +1,145 @@
+"""
+Storage Backends - pluggable attachment storage
+STORAGE_BACKEND=supabase (default, app/auth/storage.py)
+STORAGE_BACKEND=local    (app/auth/local_storage.py)
+"""
+import os
+import hashlib
+import tempfile
+from abc import ABC, abstractmethod
+
+CHUNK_SIZE = 64 * 1024
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+class ArchivoMuyGrande(ValueError):
+    """Raised while streaming when an upload exceeds its size limit"""
+
+
+class StreamMeter:
+    """
+    Wraps an iterable of byte chunks: counts bytes, hashes them (sha256)
+    and enforces max_bytes while the data flows through.
+    """
+
+    def __init__(self, chunks, max_bytes=MAX_FILE_SIZE):
+        self._chunks = chunks
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self.excedido = False
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.size += len(chunk)
+            if self.max_bytes is not None and self.size > self.max_bytes:
+                self.excedido = True
+                raise ArchivoMuyGrande(f"Archivo muy grande (máx {self.max_bytes // (1024 * 1024)}MB)")
+            self._hash.update(chunk)
+            yield chunk
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+
+def iter_file(file_obj, chunk_size=CHUNK_SIZE):
+    """Read a file-like object in fixed-size chunks"""
+    return iter(lambda: file_obj.read(chunk_size), b'')
+
+
+def spool_stream(chunks, max_bytes=MAX_FILE_SIZE, spool_dir=None, persistente=False):
+    """
+    Copy a chunk stream to a temp file, hashing and size-checking on the way.
+    Returns (file positioned at 0, StreamMeter); the caller closes it.
+    persistente=True keeps a named file (spool.name) after close, so it can
+    be handed to a background job; the caller removes or renames it.
+    """
+    meter = StreamMeter(chunks, max_bytes)
+    if persistente:
+        spool = tempfile.NamedTemporaryFile(dir=spool_dir, suffix='.part', delete=False)
+    else:
+        spool = tempfile.TemporaryFile(dir=spool_dir)
+    try:
+        for chunk in meter:
+            spool.write(chunk)
+        spool.flush()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        if persistente:
+            os.unlink(spool.name)
+        raise
+    return spool, meter
+
+
+def content_path(sha256):
+    """Content-addressed storage path shared by all backends"""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+class StorageBackend(ABC):
+    """Interface shared by every attachment storage backend"""
+
+    name = None
+
+    @abstractmethod
+    def upload_stream(self, pedido_numero, chunks, filename, content_type='application/octet-stream',
+                      max_bytes=MAX_FILE_SIZE, storage_path=None):
+        """
+        Store a stream of chunks. Returns {'storage_path', 'size', 'sha256'}.
+        storage_path: write to this exact (content-addressed) path, overwriting.
+        """
+
+    @abstractmethod
+    def open_stream(self, storage_path):
+        """Iterate the stored object's bytes (server-side reads)"""
+
+    @abstractmethod
+    def get_signed_url(self, storage_path, expires_in=3600, download_name=None):
+        """Time-limited URL the browser can fetch without our auth header"""
+
+    @abstractmethod
+    def get_signed_urls(self, storage_paths, expires_in=3600):
+        """{storage_path: url} for many paths at once"""
+
+    @abstractmethod
+    def delete_file(self, storage_path):
+        """Remove one stored object. Returns True on success."""
+
+    @abstractmethod
+    def delete_files(self, storage_paths):
+        """Remove many objects in as few calls as possible. Returns how many were deleted."""
+
+    @abstractmethod
+    def list_objects(self, prefix=''):
+        """Iterate {'storage_path', 'size', 'created_at'} of every object under prefix"""
+
+
+_backend = None
+
+
+def init_storage(config):
+    """Select the backend from config (called by create_app)"""
+    global _backend
+    name = config.get('STORAGE_BACKEND', 'supabase')
+    if name == 'local':
+        from app.auth.local_storage import LocalStorage
+        _backend = LocalStorage(config['LOCAL_STORAGE_DIR'], config['SECRET_KEY'])
+    elif name == 'supabase':
+        from app.auth.storage import SupabaseStorage
+        _backend = SupabaseStorage()
+    else:
+        raise ValueError(f"STORAGE_BACKEND desconocido: {name}")
+    print(f"[STORAGE] Backend: {name}")
+    return _backend
+
+
+def get_storage():
+    global _backend
+    if _backend is None:
+        from app.auth.storage import SupabaseStorage
+        _backend = SupabaseStorage()
+    return _backend
@@ -4,8 +4,10 @@ Supabase Helper - JWT verification + user role lookup
 import os
 import requests
 from jose import jwt
-from flask import request
+from flask import g, request
+from app import metrics, tracing
 from app.models.database import DatabaseManager
+from app.services.lotes import ENVIRON_USUARIO
 
 SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://namjhrpumgywarhjxjxx.supabase.co')
 JWKS_URL = f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json"
@@ -24,22 +26,26 @@ class SupabaseHelper:
     def get_user_from_token():
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
+            metrics.AUTH.labels('sin_token').inc()
             return None
 
         token = auth_header.split(" ")[1]
         try:
-            payload = jwt.decode(
-                token, jwks,
-                algorithms=["ES256"],
-                audience="authenticated",
-                issuer=f"{SUPABASE_URL}/auth/v1"
-            )
+            with tracing.fase('auth', 'auth.jwt'):
+                payload = jwt.decode(
+                    token, jwks,
+                    algorithms=["ES256"],
+                    audience="authenticated",
+                    issuer=f"{SUPABASE_URL}/auth/v1"
+                )
             return payload
         except Exception as e:
             print(f"Token invalid: {e}")
+            metrics.AUTH.labels('token_invalido').inc()
             return None
 
     @staticmethod
+    @tracing.medido('auth', 'auth.rol')
     def get_user_role(auth_user_id):
         query = "SELECT rol, activo, nombre, email FROM usuarios WHERE auth_user_id = %s"
         try:
@@ -57,15 +63,31 @@ class SupabaseHelper:
 
     @staticmethod
     def get_current_user():
+        # Resolved once per request (e.g. X-Profile check, then the route decorator)
+        if 'usuario_actual' not in g:
+            g.usuario_actual = SupabaseHelper._resolver_usuario()
+        return g.usuario_actual
+
+    @staticmethod
+    @tracing.medido('auth')
+    def _resolver_usuario():
+        # /api/batch sub-requests carry the user already verified by the batch route
+        preautenticado = request.environ.get(ENVIRON_USUARIO)
+        if preautenticado is not None:
+            metrics.AUTH.labels('preautenticado').inc()
+            return preautenticado
+
         payload = SupabaseHelper.get_user_from_token()
         if not payload:
             return None
 
         auth_user_id = payload.get("sub")
         if not auth_user_id:
+            metrics.AUTH.labels('token_invalido').inc()
             return None
 
         user_info = SupabaseHelper.get_user_role(auth_user_id)
+        metrics.AUTH.labels('ok' if user_info else 'sin_registro').inc()
 
         if not user_info:
             email = payload.get("email", "unknown")
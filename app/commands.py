@@ -0,0 +1,60 @@
+"""
+CLI Commands - maintenance jobs
+Run: flask --app wsgi <command>
+"""
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command('recalcular-pendientes')
+    def recalcular_pendientes():
+        """Nightly rebuild of pedidos_pendientes (date-based fields)."""
+        from app.models.database import PedidosRepository
+        total = PedidosRepository.recalcular_pendientes()
+        click.echo(f"[PENDIENTES] {total} pedidos pendientes recalculados")
+
+    @app.cli.command('build-assets')
+    def build_assets():
+        """Fingerprint, minify and precompress frontend JS/CSS into ASSETS_DIST_DIR."""
+        from app.services.assets import construir
+        reporte = construir(app.config['ASSETS_DIST_DIR'])
+        for url, r in reporte.items():
+            click.echo(f"[ASSETS] {url}: {r['bytes']} -> {r['min']} min, {r['gz']} gz, {r['br']} br")
+        click.echo(f"[ASSETS] {len(reporte)} archivos en {app.config['ASSETS_DIST_DIR']}")
+
+    @app.cli.command('gc-adjuntos')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be deleted.')
+    @click.option('--lote', default=500, show_default=True, help='Rows / storage paths per batch.')
+    @click.option('--tasa', default=2.0, show_default=True, help='Max storage delete calls per second (0 = no limit).')
+    @click.option('--max-shards', default=16, show_default=True, help='Bucket shards to scan this run.')
+    @click.option('--min-edad-horas', default=24, show_default=True, help='Grace period for unreferenced blobs/objects.')
+    @click.option('--reporte', type=click.Path(dir_okay=False), help='Also write the report as JSON here.')
+    @click.option('--reiniciar', is_flag=True, help='Start the bucket scan from the first shard.')
+    def gc_adjuntos(dry_run, lote, tasa, max_shards, min_edad_horas, reporte, reiniciar):
+        """Delete orphaned adjunto rows, blobs and storage objects."""
+        import json
+        from app.auth.storage_backend import get_storage
+        from app.services.recolector import RecolectorAdjuntos
+        recolector = RecolectorAdjuntos(
+            get_storage(), dry_run=dry_run, lote=min(lote, 1000), tasa=tasa,
+            min_edad_horas=min_edad_horas, checkpoint=app.config['GC_CHECKPOINT']
+        )
+        if reiniciar:
+            recolector.reiniciar()
+        resultado = recolector.ejecutar(max_shards=max_shards)
+        prefijo = '[GC][DRY-RUN]' if dry_run else '[GC]'
+        click.echo(f"{prefijo} filas huérfanas: {resultado['filas_huerfanas']}, "
+                   f"blobs huérfanos: {resultado['blobs_huerfanos']} ({resultado['bytes_liberados']} bytes), "
+                   f"objetos revisados: {resultado['objetos_revisados']}, huérfanos: {resultado['objetos_huerfanos']}, "
+                   f"borrados: {resultado['objetos_borrados']} en {resultado['segundos']}s")
+        click.echo(f"{prefijo} shards: {', '.join(resultado['shards']) or '-'}")
+        if not dry_run:
+            from app.services.subidas import ColaSubidas
+            _, abandonados = ColaSubidas.revisar_pendientes()
+            click.echo(f"{prefijo} subidas pendientes sin spool marcadas como fallidas: {abandonados}")
+        for error in resultado['errores']:
+            click.echo(f"{prefijo} ERROR {error}", err=True)
+        if reporte:
+            with open(reporte, 'w') as f:
+                json.dump(resultado, f, indent=2)
@@ -0,0 +1,67 @@
+"""
+Response compression - negotiated brotli/gzip for dynamic responses
+
+Applied in after_request to buffered text responses (JSON, HTML, CSS, JS)
+of at least COMPRESS_MIN_SIZE bytes. Streamed/file responses (send_file)
+are left alone: fingerprinted assets ship precompressed (.br/.gz) instead.
+Brotli is optional; without the package only gzip is offered.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRIMIBLES = ('application/json', 'text/html', 'text/css', 'text/plain',
+                'application/javascript', 'text/javascript', 'image/svg+xml')
+
+
+def elegir_codificacion(accept_encodings, disponibles=('br', 'gzip')):
+    """Best of `disponibles` the client accepts (q > 0), highest q first, server order on ties"""
+    mejor, mejor_q = None, 0
+    for enc in disponibles:
+        if enc == 'br' and brotli is None:
+            continue
+        q = accept_encodings[enc]
+        if q > mejor_q:
+            mejor, mejor_q = enc, q
+    return mejor
+
+
+def init_compression(app):
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    br_quality = app.config.get('COMPRESS_BR_QUALITY', 4)
+
+    @app.after_request
+    def comprimir(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or request.method == 'HEAD'
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRIMIBLES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        encoding = elegir_codificacion(request.accept_encodings)
+        if encoding == 'br':
+            data = brotli.compress(data, quality=br_quality)
+        elif encoding == 'gzip':
+            data = gzip.compress(data, compresslevel=gzip_level)
+        else:
+            return response
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # A strong ETag names exact bytes; the encoded body needs its own
+            response.set_etag(f"{etag}-{encoding}")
+        return response
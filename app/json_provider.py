@@ -0,0 +1,67 @@
+"""
+JSON Provider - orjson when installed, stdlib json otherwise
+
+Both paths encode datetime/date as ISO 8601, Decimal as float and UUID as
+str, so repositories can hand rows to jsonify without pre-converting them.
+Keys are not sorted (Flask's default provider sorts them).
+"""
+import json
+import uuid
+import decimal
+from datetime import date
+
+from flask.json.provider import JSONProvider
+
+from app import tracing
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, date):  # includes datetime
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    mimetype = 'application/json'
+    compact = None  # None: indent only in debug, like DefaultJSONProvider
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self._indent()
+        with tracing.fase('serialize'):
+            if orjson is not None:
+                option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+                if indent:
+                    option |= orjson.OPT_INDENT_2
+                body = orjson.dumps(obj, default=_default, option=option)
+            else:
+                body = json.dumps(obj, default=_default, ensure_ascii=False,
+                                  indent=2 if indent else None,
+                                  separators=None if indent else (',', ':')) + '\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,182 @@
+"""
+Metrics - Prometheus counters/histograms exposed at /metrics
+
+Recorded: request latency and status per endpoint, DB time and rows per
+repository method, connection pool usage, authentication outcomes, the
+signed-URL cache hit rate and Supabase Storage call latency.
+
+Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes
+every worker write its samples to mmap files; /metrics aggregates the
+files of all workers, so any worker can answer the scrape.
+prometheus_client is optional: without it every metric is a no-op and
+/metrics answers 503.
+/metrics requires "Authorization: Bearer <METRICS_TOKEN>". With no token
+configured it answers 404, except in development (DEBUG).
+"""
+import os
+import time
+import hmac
+import functools
+import contextvars
+
+from flask import request, g, jsonify
+
+from app import tracing
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+
+class _Nula:
+    """Stand-in metric when prometheus_client is not installed"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+if prometheus_client is None:
+    Counter = Gauge = Histogram = _Nula
+
+LATENCIAS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+HTTP_DURACION = Histogram('shogun_http_request_duration_seconds', 'Latencia de requests por endpoint',
+                          ['endpoint', 'method'], buckets=LATENCIAS)
+HTTP_RESPUESTAS = Counter('shogun_http_requests_total', 'Respuestas por endpoint y status',
+                          ['endpoint', 'method', 'status'])
+
+DB_DURACION = Histogram('shogun_db_query_duration_seconds', 'Tiempo por llamada de repositorio',
+                        ['operacion'], buckets=LATENCIAS)
+DB_FILAS = Histogram('shogun_db_query_rows', 'Filas leídas/escritas por llamada de repositorio',
+                     ['operacion'], buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000))
+DB_ERRORES = Counter('shogun_db_errors_total', 'Llamadas de repositorio que lanzaron excepción', ['operacion'])
+POOL_CONEXIONES = Gauge('shogun_db_pool_connections', 'Conexiones del pool por estado',
+                        ['estado'], multiprocess_mode='livesum')
+POOL_AGOTADO = Counter('shogun_db_pool_exhausted_total', 'getconn() sin conexiones disponibles')
+
+AUTH = Counter('shogun_auth_total', 'Resultado de la autenticación por request', ['resultado'])
+URL_CACHE = Counter('shogun_signed_url_cache_total', 'Consultas a la caché de URLs firmadas', ['resultado'])
+
+DB_LENTAS = Counter('shogun_db_slow_queries_total', 'Sentencias sobre SLOW_QUERY_MS', ['operacion'])
+DB_CONSULTAS_REQUEST = Histogram('shogun_db_queries_per_request', 'Sentencias SQL por request',
+                                 ['endpoint'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55))
+DB_PRESUPUESTO_EXCEDIDO = Counter('shogun_db_query_budget_exceeded_total',
+                                  'Requests sobre su presupuesto de consultas', ['endpoint'])
+
+STORAGE_DURACION = Histogram('shogun_storage_request_duration_seconds', 'Latencia de llamadas a Supabase Storage',
+                             ['operacion'], buckets=LATENCIAS)
+STORAGE_ERRORES = Counter('shogun_storage_errors_total', 'Llamadas a Storage fallidas', ['operacion'])
+STORAGE_REINTENTOS = Counter('shogun_storage_retries_total', 'Reintentos de llamadas a Storage', ['operacion'])
+
+
+# ------------------------------------------------------------------------------
+# Repositories
+# ------------------------------------------------------------------------------
+
+_filas = contextvars.ContextVar('shogun_filas', default=None)
+
+
+def contar_filas(n):
+    """Called by the DB cursor after each execute: adds rowcount to the running repository call"""
+    acc = _filas.get()
+    if acc is not None and n > 0:
+        acc[0] += n
+
+
+def operacion_actual():
+    """'<Clase>.<metodo>' of the running (outermost) repository call, or None"""
+    acc = _filas.get()
+    return acc[1] if acc is not None else None
+
+
+def _medir(fn, operacion):
+    @functools.wraps(fn)
+    def medido(*args, **kwargs):
+        if _filas.get() is not None:
+            # Nested repository call: counted in the outer one
+            return fn(*args, **kwargs)
+        acc = [0, operacion]
+        token = _filas.set(acc)
+        t = time.perf_counter()
+        try:
+            with tracing.fase('repo', operacion):
+                return fn(*args, **kwargs)
+        except Exception:
+            DB_ERRORES.labels(operacion).inc()
+            raise
+        finally:
+            DB_DURACION.labels(operacion).observe(time.perf_counter() - t)
+            DB_FILAS.labels(operacion).observe(acc[0])
+            _filas.reset(token)
+    return medido
+
+
+def instrumentar_repositorio(cls):
+    """Class decorator: times every public staticmethod as <Clase>.<metodo>, with its row count"""
+    for nombre, attr in list(vars(cls).items()):
+        if nombre.startswith('_') or not isinstance(attr, staticmethod):
+            continue
+        setattr(cls, nombre, staticmethod(_medir(attr.__func__, f'{cls.__name__}.{nombre}')))
+    return cls
+
+
+def pool_estado(pool):
+    # psycopg2's AbstractConnectionPool keeps checked-out connections in _used, idle ones in _pool
+    POOL_CONEXIONES.labels('en_uso').set(len(pool._used))
+    POOL_CONEXIONES.labels('libres').set(len(pool._pool))
+
+
+# ------------------------------------------------------------------------------
+# Flask
+# ------------------------------------------------------------------------------
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def init_metrics(app):
+    token = app.config.get('METRICS_TOKEN')
+
+    @app.before_request
+    def iniciar_cronometro():
+        g.metrics_inicio = time.perf_counter()
+
+    @app.after_request
+    def registrar_request(response):
+        inicio = g.pop('metrics_inicio', None)
+        if inicio is None or request.endpoint == 'metrics':
+            return response
+        endpoint = request.endpoint or 'sin_ruta'
+        HTTP_DURACION.labels(endpoint, request.method).observe(time.perf_counter() - inicio)
+        HTTP_RESPUESTAS.labels(endpoint, request.method, str(response.status_code)).inc()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        if prometheus_client is None:
+            return jsonify({'error': 'prometheus_client no instalado'}), 503
+        if not token and not app.config.get('DEBUG'):
+            # Fail closed: never publish metrics unauthenticated in production
+            return jsonify({'error': 'No encontrado'}), 404
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({'error': 'No autenticado', 'code': 'AUTH_REQUIRED'}), 401
+        body = prometheus_client.generate_latest(_registry())
+        return app.response_class(body, content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -2,12 +2,117 @@
 Database Manager + Repositories - PostgreSQL
 """
 
+import re
+import json
+import time
+import base64
 import psycopg2
+import psycopg2.extensions
 from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 
+from app import metrics, tracing
+from app.query_log import RegistroConsultas
+from app.services.planificador import Planificador
+
+
+def normalizar_telefono(telefono):
+    """Digits-only phone - key of the clientes table"""
+    return re.sub(r'[^0-9]', '', telefono or '')
+
+
+def encode_cursor(*values):
+    """Opaque keyset cursor for paginated endpoints"""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on malformed input."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(values, list):
+        raise ValueError("Cursor inválido")
+    return values
+
+
+# ------------------------------------------------------------------------------
+# Wire typecasters: decode straight to the JSON representation the API sends
+# (NUMERIC -> float, DATE -> 'dd/mm/YYYY', TIMESTAMP[TZ] -> ISO 8601) instead
+# of building Decimal/date/datetime objects and rewriting every row in Python.
+# Registered per cursor (get_cursor(wire=True)) so write paths and date math
+# elsewhere keep the default types. UUIDs already come back as str.
+# ------------------------------------------------------------------------------
+
+def _cast_numeric(value, cur):
+    return None if value is None else float(value)
+
+
+def _cast_fecha(value, cur):
+    # 'YYYY-MM-DD' -> 'dd/mm/YYYY'
+    return None if value is None else f"{value[8:10]}/{value[5:7]}/{value[:4]}"
+
+
+def _cast_timestamp(value, cur):
+    # '2024-05-01 10:00:00.5-04' -> '2024-05-01T10:00:00.5-04:00'
+    if value is None:
+        return None
+    value = value.replace(' ', 'T', 1)
+    return value + ':00' if value[-3] in '+-' else value
+
+
+_WIRE_TYPES = (
+    psycopg2.extensions.new_type(psycopg2.extensions.DECIMAL.values, 'WIRE_NUMERIC', _cast_numeric),
+    psycopg2.extensions.new_type(psycopg2.extensions.PYDATE.values, 'WIRE_DATE', _cast_fecha),
+    psycopg2.extensions.new_type(
+        psycopg2.extensions.PYDATETIME.values + psycopg2.extensions.PYDATETIMETZ.values,
+        'WIRE_TIMESTAMP', _cast_timestamp
+    ),
+)
+
+
+def filas(cursor):
+    """Rows of a tuple cursor as dicts: one zip per row, no per-field work"""
+    cols = [d[0] for d in cursor.description]
+    return [dict(zip(cols, row)) for row in cursor.fetchall()]
+
+
+def fila(cursor):
+    row = cursor.fetchone()
+    return None if row is None else dict(zip([d[0] for d in cursor.description], row))
+
+
+class _CursorMedido:
+    """
+    Times every statement (slow-query log, per-request counts: app/query_log.py;
+    db phase/spans: app/tracing.py) and reports its rowcount to the running
+    repository call (app/metrics.py)
+    """
+
+    def execute(self, query, vars=None):
+        with tracing.fase('db', 'db.query') as span:
+            t = time.perf_counter()
+            super().execute(query, vars)
+            segundos = time.perf_counter() - t
+            if span.muestreada:
+                span.atributo('db.statement', query if isinstance(query, str) else str(query))
+                span.atributo('db.operation', metrics.operacion_actual() or '')
+                span.atributo('db.rows', self.rowcount)
+        RegistroConsultas.registrar(self, query, vars, segundos)
+        metrics.contar_filas(self.rowcount)
+
+
+class _Cursor(_CursorMedido, psycopg2.extensions.cursor):
+    pass
+
+
+class _DictCursor(_CursorMedido, RealDictCursor):
+    pass
+
 
 class DatabaseManager:
     _pool = None
@@ -35,7 +140,13 @@ class DatabaseManager:
         cls._ensure_pool()
         if cls._pool is None:
             raise Exception("Database not available")
-        conn = cls._pool.getconn()
+        try:
+            with tracing.fase('db', 'db.pool.getconn'):
+                conn = cls._pool.getconn()
+        except pool.PoolError:
+            metrics.POOL_AGOTADO.inc()
+            raise
+        metrics.pool_estado(cls._pool)
         try:
             yield conn
             conn.commit()
@@ -44,13 +155,21 @@ class DatabaseManager:
             raise e
         finally:
             cls._pool.putconn(conn)
+            metrics.pool_estado(cls._pool)
 
     @classmethod
     @contextmanager
-    def get_cursor(cls, dict_cursor=True):
+    def get_cursor(cls, dict_cursor=True, wire=False):
+        """
+        wire=True registers the wire typecasters on this cursor only; pair it
+        with dict_cursor=False and filas()/fila() for the compact read path.
+        """
         with cls.get_connection() as conn:
-            cursor_factory = RealDictCursor if dict_cursor else None
+            cursor_factory = _DictCursor if dict_cursor else _Cursor
             cursor = conn.cursor(cursor_factory=cursor_factory)
+            if wire:
+                for t in _WIRE_TYPES:
+                    psycopg2.extensions.register_type(t, cursor)
             try:
                 yield cursor
             finally:
@@ -66,6 +185,7 @@ class DatabaseManager:
 # CATEGORÍAS DE PRODUCTO
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class CategoriasRepository:
 
     @staticmethod
@@ -127,6 +247,7 @@ class CategoriasRepository:
 # PRODUCTOS
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class ProductosRepository:
 
     @staticmethod
@@ -139,9 +260,6 @@ class ProductosRepository:
         for f in ['precio_base', 'costo_material', 'costo_mano_obra', 'costo_total', 'margen_dinero', 'margen_porcentaje']:
             if p.get(f) is not None:
                 p[f] = float(p[f])
-        for f in ['created_at', 'updated_at']:
-            if p.get(f) and hasattr(p[f], 'isoformat'):
-                p[f] = p[f].isoformat()
         return p
 
     @staticmethod
@@ -154,9 +272,9 @@ class ProductosRepository:
             FROM productos {where}
             ORDER BY nombre
         """
-        with DatabaseManager.get_cursor() as cursor:
+        with DatabaseManager.get_cursor(dict_cursor=False, wire=True) as cursor:
             cursor.execute(query)
-            return [ProductosRepository._format(row) for row in cursor.fetchall()]
+            return filas(cursor)
 
     @staticmethod
     def get_by_sku(sku):
@@ -251,6 +369,7 @@ class ProductosRepository:
 # PERSONALIZACIONES
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class PersonalizacionesRepository:
 
     @staticmethod
@@ -264,9 +383,6 @@ class PersonalizacionesRepository:
             p['precio'] = float(p['precio'])
         if p.get('costo_por_mil_puntadas') is not None:
             p['costo_por_mil_puntadas'] = float(p['costo_por_mil_puntadas'])
-        for f in ['created_at', 'updated_at']:
-            if p.get(f) and hasattr(p[f], 'isoformat'):
-                p[f] = p[f].isoformat()
         return p
 
     @staticmethod
@@ -278,9 +394,9 @@ class PersonalizacionesRepository:
             FROM personalizaciones {where}
             ORDER BY tipo
         """
-        with DatabaseManager.get_cursor() as cursor:
+        with DatabaseManager.get_cursor(dict_cursor=False, wire=True) as cursor:
             cursor.execute(query)
-            return [PersonalizacionesRepository._format(row) for row in cursor.fetchall()]
+            return filas(cursor)
 
     @staticmethod
     def get_by_codigo(codigo):
@@ -354,67 +470,137 @@ class PersonalizacionesRepository:
 # PEDIDOS
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class PedidosRepository:
 
+    _FECHAS = ('fecha_pago', 'fecha_compromiso', 'fecha_entrega_real')
+    _DINERO = ('precio_producto', 'precio_personalizacion', 'precio_envio',
+               'precio_total', 'costo_producto', 'costo_personalizacion',
+               'costo_total', 'ganancia', 'precio_person', 'costo_person',
+               'costo_mano_obra', 'costos_adicionales')
+
     @staticmethod
     def _format_pedido(row):
         if not row:
             return None
         pedido = dict(row)
-        for field in ['fecha_pago', 'fecha_compromiso', 'fecha_entrega_real']:
-            if pedido.get(field) and isinstance(pedido[field], date):
+        # Only the columns actually selected (sparse fieldsets)
+        for field in PedidosRepository._FECHAS:
+            if isinstance(pedido.get(field), date):
                 pedido[field] = pedido[field].strftime('%d/%m/%Y')
-        for field in ['precio_producto', 'precio_personalizacion', 'precio_envio',
-                      'precio_total', 'costo_producto', 'costo_personalizacion',
-                      'costo_total', 'ganancia', 'precio_person', 'costo_person',
-                      'costo_mano_obra', 'costos_adicionales']:
+        for field in PedidosRepository._DINERO:
             if pedido.get(field) is not None:
                 pedido[field] = float(pedido[field])
         return pedido
 
-    _SELECT_FIELDS = """
-        numero_pedido as id,
-        cliente_nombre as cliente,
-        cliente_telefono as telefono,
-        cliente_email as email,
-        direccion_envio as direccion,
-        producto_sku as sku,
-        producto_nombre as producto,
-        talla_seleccionada::text as talla,
-        color,
-        personalizacion_codigo,
-        personalizacion_detalles as personalizacion,
-        personalizacion_puntadas as puntadas,
-        fecha_pago, fecha_compromiso, fecha_entrega_real,
-        dias_produccion, dias_retraso,
-        precio_producto,
-        precio_personalizacion as precio_person,
-        precio_envio, precio_total,
-        costo_producto,
-        costo_personalizacion as costo_person,
-        costo_mano_obra,
-        COALESCE(costos_adicionales, 0) as costos_adicionales,
-        costo_total, ganancia,
-        canal::text,
-        metodo_pago::text as banco,
-        estado_produccion::text as estatus_produccion,
-        estado_pago::text as estatus_pago,
-        created_at
-    """
+    # API name -> SQL expression; also the whitelist for ?fields=
+    _CAMPOS = {
+        'id': 'numero_pedido',
+        'cliente': 'cliente_nombre',
+        'telefono': 'cliente_telefono',
+        'email': 'cliente_email',
+        'direccion': 'direccion_envio',
+        'sku': 'producto_sku',
+        'producto': 'producto_nombre',
+        'talla': 'talla_seleccionada::text',
+        'color': 'color',
+        'personalizacion_codigo': 'personalizacion_codigo',
+        'personalizacion': 'personalizacion_detalles',
+        'puntadas': 'personalizacion_puntadas',
+        'fecha_pago': 'fecha_pago',
+        'fecha_compromiso': 'fecha_compromiso',
+        'fecha_entrega_real': 'fecha_entrega_real',
+        'dias_produccion': 'dias_produccion',
+        'dias_retraso': 'dias_retraso',
+        'precio_producto': 'precio_producto',
+        'precio_person': 'precio_personalizacion',
+        'precio_envio': 'precio_envio',
+        'precio_total': 'precio_total',
+        'costo_producto': 'costo_producto',
+        'costo_person': 'costo_personalizacion',
+        'costo_mano_obra': 'costo_mano_obra',
+        'costos_adicionales': 'COALESCE(costos_adicionales, 0)',
+        'costo_total': 'costo_total',
+        'ganancia': 'ganancia',
+        'canal': 'canal::text',
+        'banco': 'metodo_pago::text',
+        'estatus_produccion': 'estado_produccion::text',
+        'estatus_pago': 'estado_pago::text',
+        'comentarios_count': 'comentarios_count',
+        'created_at': 'created_at',
+    }
+
+    _SELECT_FIELDS = ",\n        ".join(f"{expr} AS {alias}" for alias, expr in _CAMPOS.items())
 
     @staticmethod
-    def get_all():
-        query = f"SELECT {PedidosRepository._SELECT_FIELDS} FROM pedidos ORDER BY created_at DESC"
-        with DatabaseManager.get_cursor() as cursor:
+    def _select(fields=None):
+        """
+        SELECT list for a sparse fieldset (list of API names; None = all).
+        'id' is always included. Raises ValueError on unknown fields.
+        """
+        if not fields:
+            return PedidosRepository._SELECT_FIELDS
+        desconocidos = [f for f in fields if f not in PedidosRepository._CAMPOS]
+        if desconocidos:
+            raise ValueError(f"Campos inválidos: {', '.join(desconocidos)}")
+        seleccion = ['id'] + [f for f in dict.fromkeys(fields) if f != 'id']
+        return ", ".join(f"{PedidosRepository._CAMPOS[f]} AS {f}" for f in seleccion)
+
+    @staticmethod
+    def get_all(fields=None):
+        query = f"SELECT {PedidosRepository._select(fields)} FROM pedidos ORDER BY created_at DESC"
+        with DatabaseManager.get_cursor(dict_cursor=False, wire=True) as cursor:
             cursor.execute(query)
-            return [PedidosRepository._format_pedido(row) for row in cursor.fetchall()]
+            return filas(cursor)
 
     @staticmethod
-    def get_by_id(pedido_id):
-        query = f"SELECT {PedidosRepository._SELECT_FIELDS} FROM pedidos WHERE numero_pedido = %s"
-        with DatabaseManager.get_cursor() as cursor:
+    def get_by_id(pedido_id, fields=None):
+        query = f"SELECT {PedidosRepository._select(fields)} FROM pedidos WHERE numero_pedido = %s"
+        with DatabaseManager.get_cursor(dict_cursor=False, wire=True) as cursor:
             cursor.execute(query, (pedido_id,))
-            return PedidosRepository._format_pedido(cursor.fetchone())
+            return fila(cursor)
+
+    @staticmethod
+    def get_detalle(pedido_id, limit_comentarios=50):
+        """
+        Pedido + first page of comentarios + adjuntos in one round trip
+        (json_agg subqueries). Returns None if the pedido does not exist.
+        """
+        query = f"""
+            SELECT {PedidosRepository._SELECT_FIELDS},
+                COALESCE((
+                    SELECT json_agg(c ORDER BY c.created_at DESC, c.id DESC)
+                    FROM (SELECT {ComentariosRepository._SELECT_FIELDS}
+                          FROM pedido_comentarios
+                          WHERE pedido_numero = p.numero_pedido
+                          ORDER BY created_at DESC, id DESC
+                          LIMIT %s) c
+                ), '[]') AS comentarios,
+                COALESCE((
+                    SELECT json_agg(a ORDER BY a.created_at DESC)
+                    FROM (SELECT a.id, a.pedido_numero, a.nombre_archivo, a.nombre_original,
+                                 a.tipo_mime, a.tamano_bytes, a.storage_path,
+                                 a.subido_por_email, a.subido_por_nombre, a.created_at,
+                                 b.thumb_path, b.preview_path, COALESCE(b.estado, 'stored') AS estado
+                          FROM pedido_adjuntos a
+                          LEFT JOIN adjunto_blobs b ON b.sha256 = a.blob_sha256
+                          WHERE a.pedido_numero = p.numero_pedido) a
+                ), '[]') AS adjuntos
+            FROM pedidos p
+            WHERE p.numero_pedido = %s
+        """
+        with DatabaseManager.get_cursor(dict_cursor=False, wire=True) as cursor:
+            cursor.execute(query, (limit_comentarios, pedido_id))
+            pedido = fila(cursor)
+            if pedido is None:
+                return None
+            comentarios = pedido['comentarios']
+            # Same cursor format as ComentariosRepository.get_by_pedido
+            pedido['comentarios_next_cursor'] = (
+                encode_cursor(comentarios[-1]['created_at'], comentarios[-1]['id'])
+                if pedido['comentarios_count'] > len(comentarios) and comentarios else None
+            )
+            return pedido
 
     @staticmethod
     def create(data):
@@ -452,9 +638,9 @@ class PedidosRepository:
         if precio_venta <= 0:
             precio_venta = float(producto['precio_base'])
 
-        dias = int(str(data.get('tiempo_estimado', '7')).split()[0])
+        dias = int(str(data.get('tiempo_estimado', producto.get('tiempo_produccion_dias') or 7)).split()[0])
         fecha_pago = datetime.now().date()
-        fecha_compromiso = fecha_pago + timedelta(days=dias)
+        fecha_compromiso, reserva = PedidosRepository._asignar_fecha_compromiso(dias, puntadas)
 
         pedido_data = {
             'cliente_nombre': data['nombre_cliente'],
@@ -509,15 +695,28 @@ class PedidosRepository:
             RETURNING numero_pedido, fecha_compromiso, precio_total, ganancia
         """
 
-        with DatabaseManager.get_cursor() as cursor:
-            cursor.execute(query, pedido_data)
-            result = cursor.fetchone()
-            return {
-                'id': result['numero_pedido'],
-                'fecha_entrega': result['fecha_compromiso'].strftime('%d/%m/%Y'),
-                'total': float(result['precio_total']),
-                'ganancia': float(result['ganancia'])
-            }
+        try:
+            with DatabaseManager.get_cursor() as cursor:
+                cursor.execute(query, pedido_data)
+                result = cursor.fetchone()
+                ClientesRepository.refrescar(cursor, data['telefono'])
+                PedidosRepository.refrescar_pendiente(cursor, result['numero_pedido'])
+        except Exception:
+            # Give back the capacity reserved by _asignar_fecha_compromiso, if any
+            Planificador.anular(reserva)
+            raise
+        return {
+            'id': result['numero_pedido'],
+            'fecha_entrega': result['fecha_compromiso'].strftime('%d/%m/%Y'),
+            'total': float(result['precio_total']),
+            'ganancia': float(result['ganancia'])
+        }
+
+    # Keys of update() payloads that affect the clientes row
+    _CAMPOS_CLIENTE = (
+        'cliente', 'telefono', 'email', 'estatus_produccion',
+        'precio_producto', 'precio_envio',
+    )
 
     @staticmethod
     def update(pedido_id, data):
@@ -589,91 +788,456 @@ class PedidosRepository:
         if not campos:
             return True
 
-        query = f"UPDATE pedidos SET {', '.join(campos)} WHERE numero_pedido = %(pedido_id)s RETURNING numero_pedido"
+        # old.* is the pre-update row, so a phone change refreshes both customers
+        query = f"""
+            UPDATE pedidos p SET {', '.join(campos)}
+            FROM (SELECT numero_pedido, cliente_telefono, estado_produccion FROM pedidos
+                  WHERE numero_pedido = %(pedido_id)s FOR UPDATE) old
+            WHERE p.numero_pedido = old.numero_pedido
+            RETURNING p.numero_pedido, old.cliente_telefono AS telefono_anterior, p.cliente_telefono,
+                      old.estado_produccion::text AS estado_anterior, p.estado_produccion::text AS estado,
+                      p.fecha_compromiso, p.personalizacion_puntadas
+        """
         try:
             with DatabaseManager.get_cursor() as cursor:
                 cursor.execute(query, params)
                 row = cursor.fetchone()
-                return row is not None
+                if row is None:
+                    return False
+                PedidosRepository.refrescar_pendiente(cursor, row['numero_pedido'])
+                if any(k in data for k in PedidosRepository._CAMPOS_CLIENTE):
+                    ClientesRepository.refrescar(cursor, row['telefono_anterior'])
+                    if normalizar_telefono(row['cliente_telefono']) != normalizar_telefono(row['telefono_anterior']):
+                        ClientesRepository.refrescar(cursor, row['cliente_telefono'])
         except Exception as e:
             print(f"[PEDIDO UPDATE ERROR] pedido={pedido_id} query={query} error={e}")
             raise
 
+        # Delivered/cancelled orders free their day; reopened ones take it back
+        abierto_antes = row['estado_anterior'] not in PedidosRepository._ESTADOS_CERRADOS
+        abierto = row['estado'] not in PedidosRepository._ESTADOS_CERRADOS
+        if abierto_antes and not abierto:
+            Planificador.liberar(row['fecha_compromiso'], row['personalizacion_puntadas'])
+        elif abierto and not abierto_antes:
+            Planificador.reservar(row['fecha_compromiso'], row['personalizacion_puntadas'])
+        return True
+
     @staticmethod
     def delete(pedido_id):
-        query = "DELETE FROM pedidos WHERE numero_pedido = %s RETURNING numero_pedido"
+        query = """
+            DELETE FROM pedidos WHERE numero_pedido = %s
+            RETURNING numero_pedido, cliente_telefono, estado_produccion::text AS estado,
+                      fecha_compromiso, personalizacion_puntadas
+        """
         with DatabaseManager.get_cursor() as cursor:
             cursor.execute(query, (pedido_id,))
-            return cursor.fetchone() is not None
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            cursor.execute("DELETE FROM pedidos_pendientes WHERE id = %s", (pedido_id,))
+            ClientesRepository.refrescar(cursor, row['cliente_telefono'])
+        if row['estado'] not in PedidosRepository._ESTADOS_CERRADOS:
+            Planificador.liberar(row['fecha_compromiso'], row['personalizacion_puntadas'])
+        return True
+
+    # --- Capacity planning (see app/services/planificador.py) ---
+
+    _ESTADOS_CERRADOS = ('Entregado', 'Cancelado')
 
     @staticmethod
-    def get_pendientes():
+    def get_carga_comprometida():
+        """Units and stitches committed per day by open pedidos (capped per order like Planificador._tope)"""
         query = """
-            SELECT id, cliente, telefono, producto, precio_total,
-                   estatus_produccion, estatus_pago, dias_retraso,
-                   fecha_compromiso, direccion, personalizacion_codigo,
-                   personalizacion, email, talla, canal, color,
-                   motivos, motivo_pendiente, categoria_pendiente
-            FROM vista_pedidos_pendientes
+            SELECT fecha_compromiso, COUNT(*) AS unidades,
+                   COALESCE(SUM(LEAST(personalizacion_puntadas, %s)), 0) AS puntadas
+            FROM pedidos
+            WHERE estado_produccion NOT IN ('Entregado', 'Cancelado')
+              AND fecha_compromiso >= CURRENT_DATE
+            GROUP BY fecha_compromiso
+        """
+        with DatabaseManager.get_cursor(dict_cursor=False) as cursor:
+            cursor.execute(query, (Planificador.capacidad_puntadas,))
+            return cursor.fetchall()
+
+    @staticmethod
+    def _asignar_fecha_compromiso(dias, puntadas):
+        """
+        (fecha, reserva) from Planificador.asignar_fecha; (today + dias, None)
+        if the planner is unavailable
+        """
+        try:
+            if Planificador.necesita_recarga():
+                Planificador.cargar(PedidosRepository.get_carga_comprometida())
+            return Planificador.asignar_fecha(dias, puntadas)
+        except Exception as e:
+            print(f"[PLANIFICADOR] WARNING: {e}")
+            return datetime.now().date() + timedelta(days=dias), None
+
+    _PENDIENTES_FIELDS = """
+        id, cliente, telefono, producto, precio_total,
+        estatus_produccion, estatus_pago, dias_retraso,
+        fecha_compromiso, direccion, personalizacion_codigo,
+        personalizacion, email, talla, canal, color,
+        motivos, motivo_pendiente, categoria_pendiente
+    """
+
+    @staticmethod
+    def _format_pendiente(row):
+        p = dict(row)
+        if p.get('precio_total') is not None:
+            p['precio_total'] = float(p['precio_total'])
+        if p.get('fecha_compromiso') and isinstance(p['fecha_compromiso'], date):
+            p['fecha_compromiso'] = p['fecha_compromiso'].strftime('%d/%m/%Y')
+        return p
+
+    @staticmethod
+    def refrescar_pendiente(cursor, pedido_id):
+        """
+        Re-sync one row of the pedidos_pendientes backlog from vista_pedidos_pendientes.
+        Runs on the caller's cursor so it commits with the pedido change.
+        """
+        fields = PedidosRepository._PENDIENTES_FIELDS
+        cursor.execute("DELETE FROM pedidos_pendientes WHERE id = %s", (pedido_id,))
+        cursor.execute(f"""
+            INSERT INTO pedidos_pendientes ({fields}, actualizado_at)
+            SELECT {fields}, now() FROM vista_pedidos_pendientes WHERE id = %s
+        """, (pedido_id,))
+
+    @staticmethod
+    def recalcular_pendientes():
         """
+        Full rebuild of the backlog (nightly job).
+        dias_retraso and the categories derived from it change with the date
+        even when no pedido is touched. Readers keep the old snapshot until commit.
+        """
+        fields = PedidosRepository._PENDIENTES_FIELDS
         with DatabaseManager.get_cursor() as cursor:
-            cursor.execute(query)
-            results = []
+            cursor.execute("DELETE FROM pedidos_pendientes")
+            cursor.execute(f"""
+                INSERT INTO pedidos_pendientes ({fields}, actualizado_at)
+                SELECT {fields}, now() FROM vista_pedidos_pendientes
+            """)
+            return cursor.rowcount
+
+    @staticmethod
+    def get_pendientes(categoria=None, limit=100, cursor=None):
+        """
+        Keyset-paginated backlog, most urgent fecha_compromiso first.
+        Returns {'pendientes': [...], 'next_cursor': str|None, 'conteos': {categoria: n}}.
+        """
+        conditions = []
+        params = {'limit': limit + 1}
+        if categoria:
+            conditions.append("categoria_pendiente = %(categoria)s")
+            params['categoria'] = categoria
+        if cursor:
+            valores = decode_cursor(cursor)
+            if len(valores) != 2:
+                raise ValueError("Cursor inválido")
+            params['c_fecha'], params['c_id'] = valores
+            conditions.append("(fecha_compromiso, id) > (%(c_fecha)s::date, %(c_id)s)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"""
+            SELECT {PedidosRepository._PENDIENTES_FIELDS}
+            FROM pedidos_pendientes {where}
+            ORDER BY fecha_compromiso, id
+            LIMIT %(limit)s
+        """
+        with DatabaseManager.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+            cur.execute("SELECT categoria_pendiente, COUNT(*) AS total FROM pedidos_pendientes GROUP BY categoria_pendiente")
+            conteos = {r['categoria_pendiente']: r['total'] for r in cur.fetchall()}
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['fecha_compromiso'], rows[-1]['id'])
+
+        return {
+            'pendientes': [PedidosRepository._format_pendiente(row) for row in rows],
+            'next_cursor': next_cursor,
+            'conteos': conteos,
+        }
+
+    _TABLERO_FIELDS = """
+        numero_pedido as id,
+        cliente_nombre as cliente,
+        producto_nombre as producto,
+        talla_seleccionada::text as talla,
+        color,
+        personalizacion_codigo,
+        fecha_compromiso, dias_retraso,
+        estado_produccion::text as estatus_produccion,
+        estado_pago::text as estatus_pago
+    """
+
+    @staticmethod
+    def _tablero_cursor(row):
+        return encode_cursor(row['fecha_compromiso'], row['id'])
+
+    @staticmethod
+    def get_tablero(limit=20):
+        """
+        Kanban board in one query: per-estado totals plus the first `limit`
+        cards of each open column (window partitioned by estado_produccion).
+        """
+        query = f"""
+            SELECT * FROM (
+                SELECT {PedidosRepository._TABLERO_FIELDS},
+                       estado_produccion AS _estado,
+                       ROW_NUMBER() OVER (PARTITION BY estado_produccion
+                                          ORDER BY fecha_compromiso, numero_pedido) AS _rn,
+                       COUNT(*) OVER (PARTITION BY estado_produccion) AS _total
+                FROM pedidos
+                WHERE estado_produccion NOT IN ('Entregado', 'Cancelado')
+            ) t
+            WHERE _rn <= %(limit)s
+            ORDER BY _estado, _rn
+        """
+        columnas = {}
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, {'limit': limit})
             for row in cursor.fetchall():
-                p = dict(row)
-                if p.get('precio_total') is not None:
-                    p['precio_total'] = float(p['precio_total'])
-                if p.get('fecha_compromiso') and isinstance(p['fecha_compromiso'], date):
-                    p['fecha_compromiso'] = p['fecha_compromiso'].strftime('%d/%m/%Y')
-                if p.get('fecha_pago') and isinstance(p.get('fecha_pago'), date):
-                    p['fecha_pago'] = p['fecha_pago'].strftime('%d/%m/%Y')
-                results.append(p)
-            return results
+                estado = row['estatus_produccion']
+                col = columnas.get(estado)
+                if col is None:
+                    col = columnas[estado] = {'estado': estado, 'total': row['_total'], 'pedidos': [], 'next_cursor': None}
+                if row['_rn'] == limit and row['_total'] > limit:
+                    col['next_cursor'] = PedidosRepository._tablero_cursor(row)
+                card = PedidosRepository._format_pedido(row)
+                for k in ('_estado', '_rn', '_total'):
+                    card.pop(k, None)
+                col['pedidos'].append(card)
+        return {'columnas': list(columnas.values())}
 
     @staticmethod
-    def buscar(query_text):
+    def get_tablero_columna(estado, cursor=None, limit=20):
+        """Next page of one kanban column (keyset on fecha_compromiso, numero_pedido)"""
+        params = {'estado': estado, 'limit': limit + 1}
+        after = ""
+        if cursor:
+            valores = decode_cursor(cursor)
+            if len(valores) != 2:
+                raise ValueError("Cursor inválido")
+            params['c_fecha'], params['c_id'] = valores
+            after = "AND (fecha_compromiso, numero_pedido) > (%(c_fecha)s::date, %(c_id)s)"
         query = f"""
-            SELECT {PedidosRepository._SELECT_FIELDS}
+            SELECT {PedidosRepository._TABLERO_FIELDS}
+            FROM pedidos
+            WHERE estado_produccion = %(estado)s::estado_produccion
+              AND estado_produccion NOT IN ('Entregado', 'Cancelado')
+              {after}
+            ORDER BY fecha_compromiso, numero_pedido
+            LIMIT %(limit)s
+        """
+        with DatabaseManager.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = PedidosRepository._tablero_cursor(rows[-1])
+        return {
+            'estado': estado,
+            'pedidos': [PedidosRepository._format_pedido(row) for row in rows],
+            'next_cursor': next_cursor,
+        }
+
+    @staticmethod
+    def buscar(query_text, fields=None):
+        query = f"""
+            SELECT {PedidosRepository._select(fields)}
             FROM pedidos
             WHERE cliente_nombre ILIKE %(q)s OR numero_pedido ILIKE %(q)s
                OR producto_nombre ILIKE %(q)s OR cliente_telefono ILIKE %(q)s
             ORDER BY created_at DESC
         """
-        with DatabaseManager.get_cursor() as cursor:
+        with DatabaseManager.get_cursor(dict_cursor=False, wire=True) as cursor:
             cursor.execute(query, {'q': f'%{query_text}%'})
-            return [PedidosRepository._format_pedido(row) for row in cursor.fetchall()]
+            return filas(cursor)
 
 
 # ==============================================================================
 # CLIENTES
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class ClientesRepository:
 
+    # orden -> (column, direction); each has a (column, telefono_norm) index
+    _ORDENES = {
+        'ultimo_pedido': ('ultimo_pedido', 'DESC'),
+        'total_gastado': ('total_gastado', 'DESC'),
+        'pedidos': ('total_pedidos', 'DESC'),
+        'nombre': ('nombre', 'ASC'),
+    }
+
+    _SELECT_FIELDS = """
+        nombre, telefono, email, total_pedidos as pedidos,
+        total_gastado, ultimo_pedido, tipo_cliente as tipo
+    """
+
     @staticmethod
-    def get_all():
-        query = """
-            SELECT nombre, telefono, email, total_pedidos as pedidos,
-                   total_gastado, ultimo_pedido, tipo_cliente as tipo
-            FROM vista_clientes
+    def _format(row):
+        if not row:
+            return None
+        c = dict(row)
+        if c.get('total_gastado') is not None:
+            c['total_gastado'] = float(c['total_gastado'])
+        if c.get('ultimo_pedido') and isinstance(c['ultimo_pedido'], date):
+            c['ultimo_pedido'] = c['ultimo_pedido'].strftime('%d/%m/%Y')
+        return c
+
+    @staticmethod
+    def refrescar(cursor, telefono):
+        """
+        Recompute one customer's row from their own pedidos.
+        Must run on the caller's cursor so it commits with the pedido change.
+        The advisory lock serializes concurrent writers for the same phone.
+        """
+        tel = normalizar_telefono(telefono)
+        if not tel:
+            return
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('clientes:' || %s))", (tel,))
+        cursor.execute("""
+            INSERT INTO clientes (telefono_norm, telefono, nombre, email, total_pedidos,
+                                  total_gastado, ultimo_pedido, tipo_cliente,
+                                  ultima_direccion, ultimo_color, ultima_talla, updated_at)
+            SELECT %(tel)s, u.cliente_telefono, u.cliente_nombre, u.cliente_email,
+                   a.total_pedidos, a.total_gastado, a.ultimo_pedido,
+                   CASE WHEN a.total_pedidos >= 5 THEN 'VIP'
+                        WHEN a.total_pedidos >= 2 THEN 'Recurrente'
+                        ELSE 'Nuevo' END,
+                   u.direccion_envio, u.color, u.talla,
+                   now()
+            FROM (
+                SELECT COUNT(*) AS total_pedidos,
+                       COALESCE(SUM(precio_total), 0) AS total_gastado,
+                       MAX(fecha_pago) AS ultimo_pedido
+                FROM pedidos
+                WHERE cliente_telefono_norm = %(tel)s AND estado_produccion <> 'Cancelado'
+            ) a,
+            LATERAL (
+                SELECT cliente_telefono, cliente_nombre, cliente_email,
+                       direccion_envio, color, talla_seleccionada::text AS talla
+                FROM pedidos
+                WHERE cliente_telefono_norm = %(tel)s
+                ORDER BY created_at DESC LIMIT 1
+            ) u
+            WHERE a.total_pedidos > 0
+            ON CONFLICT (telefono_norm) DO UPDATE SET
+                telefono = EXCLUDED.telefono, nombre = EXCLUDED.nombre, email = EXCLUDED.email,
+                total_pedidos = EXCLUDED.total_pedidos, total_gastado = EXCLUDED.total_gastado,
+                ultimo_pedido = EXCLUDED.ultimo_pedido, tipo_cliente = EXCLUDED.tipo_cliente,
+                ultima_direccion = EXCLUDED.ultima_direccion, ultimo_color = EXCLUDED.ultimo_color,
+                ultima_talla = EXCLUDED.ultima_talla,
+                updated_at = now()
+        """, {'tel': tel})
+        cursor.execute("""
+            DELETE FROM clientes
+            WHERE telefono_norm = %(tel)s
+              AND NOT EXISTS (SELECT 1 FROM pedidos
+                              WHERE cliente_telefono_norm = %(tel)s AND estado_produccion <> 'Cancelado')
+        """, {'tel': tel})
+
+    @staticmethod
+    def get_all(limit=50, cursor=None, orden='ultimo_pedido'):
+        """
+        Keyset-paginated customer list.
+        Returns {'clientes': [...], 'next_cursor': str|None}.
+        """
+        if orden not in ClientesRepository._ORDENES:
+            raise ValueError(f"Orden inválido: {orden}")
+        col, direction = ClientesRepository._ORDENES[orden]
+        op = '<' if direction == 'DESC' else '>'
+
+        where = ""
+        params = {'limit': limit + 1}
+        if cursor:
+            valores = decode_cursor(cursor)
+            if len(valores) != 2:
+                raise ValueError("Cursor inválido")
+            params['c_val'], params['c_tel'] = valores
+            where = f"WHERE ({col}, telefono_norm) {op} (%(c_val)s, %(c_tel)s)"
+
+        query = f"""
+            SELECT {ClientesRepository._SELECT_FIELDS}, {col} AS _orden, telefono_norm
+            FROM clientes {where}
+            ORDER BY {col} {direction}, telefono_norm {direction}
+            LIMIT %(limit)s
+        """
+        with DatabaseManager.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            valor = last['_orden']
+            next_cursor = encode_cursor(float(valor) if col == 'total_gastado' else valor, last['telefono_norm'])
+
+        clientes = []
+        for row in rows:
+            c = ClientesRepository._format(row)
+            c.pop('_orden', None)
+            c.pop('telefono_norm', None)
+            clientes.append(c)
+        return {'clientes': clientes, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def sugerir(termino, limit=8):
+        """
+        Autocomplete for the order form.
+        Digits -> phone prefix (btree text_pattern_ops);
+        text -> word similarity on nombre (GiST trigram KNN).
+        """
+        termino = (termino or '').strip()
+        if re.fullmatch(r'[0-9\s\-()+]+', termino):
+            digitos = normalizar_telefono(termino)
+            if len(digitos) < 3:
+                return []
+            where = "telefono_norm LIKE %(prefijo)s"
+            order = "ultimo_pedido DESC"
+            params = {'prefijo': digitos + '%'}
+        else:
+            if len(termino) < 2:
+                return []
+            where = "%(q)s <%% nombre"
+            order = "%(q)s <<-> nombre"
+            params = {'q': termino}
+        params['limit'] = limit
+
+        query = f"""
+            SELECT nombre, telefono, email, ultima_direccion as direccion,
+                   ultimo_color as color, ultima_talla as talla,
+                   total_pedidos as pedidos, tipo_cliente as tipo
+            FROM clientes
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT %(limit)s
         """
         with DatabaseManager.get_cursor() as cursor:
-            cursor.execute(query)
-            clientes = []
-            for row in cursor.fetchall():
-                c = dict(row)
-                if c.get('total_gastado'):
-                    c['total_gastado'] = float(c['total_gastado'])
-                if c.get('ultimo_pedido') and isinstance(c['ultimo_pedido'], date):
-                    c['ultimo_pedido'] = c['ultimo_pedido'].strftime('%d/%m/%Y')
-                clientes.append(c)
-            return clientes
+            # Autocomplete fires per keystroke: never let one lookup pile up
+            cursor.execute("SET LOCAL statement_timeout = '250ms'")
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def get_by_telefono(telefono):
+        query = f"SELECT {ClientesRepository._SELECT_FIELDS} FROM clientes WHERE telefono_norm = %s"
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, (normalizar_telefono(telefono),))
+            return ClientesRepository._format(cursor.fetchone())
 
 
 # ==============================================================================
 # ESTADISTICAS
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class EstadisticasRepository:
 
     @staticmethod
@@ -746,108 +1310,350 @@ class EstadisticasRepository:
 # COMENTARIOS
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class ComentariosRepository:
 
     @staticmethod
     def _format(row):
-        if not row:
-            return None
-        c = dict(row)
-        if c.get('id'):
-            c['id'] = str(c['id'])
-        if c.get('created_at') and hasattr(c['created_at'], 'isoformat'):
-            c['created_at'] = c['created_at'].isoformat()
-        return c
+        return dict(row) if row else None
+
+    _SELECT_FIELDS = "id, pedido_numero, autor_email, autor_nombre, texto, created_at"
 
     @staticmethod
-    def get_by_pedido(pedido_numero):
-        query = """
-            SELECT id, pedido_numero, autor_email, autor_nombre, texto, created_at
+    def get_by_pedido(pedido_numero, limit=50, cursor=None):
+        """
+        Newest first, keyset-paginated on (created_at, id).
+        Returns {'comentarios': [...], 'next_cursor': str|None}.
+        """
+        where = ""
+        params = {'pedido': pedido_numero, 'limit': limit + 1}
+        if cursor:
+            valores = decode_cursor(cursor)
+            if len(valores) != 2:
+                raise ValueError("Cursor inválido")
+            params['c_fecha'], params['c_id'] = valores
+            where = "AND (created_at, id) < (%(c_fecha)s::timestamptz, %(c_id)s::uuid)"
+
+        query = f"""
+            SELECT {ComentariosRepository._SELECT_FIELDS}
             FROM pedido_comentarios
-            WHERE pedido_numero = %s
-            ORDER BY created_at DESC
+            WHERE pedido_numero = %(pedido)s {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %(limit)s
         """
-        with DatabaseManager.get_cursor() as cursor:
-            cursor.execute(query, (pedido_numero,))
-            return [ComentariosRepository._format(row) for row in cursor.fetchall()]
+        with DatabaseManager.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], str(rows[-1]['id']))
+        return {
+            'comentarios': [ComentariosRepository._format(row) for row in rows],
+            'next_cursor': next_cursor,
+        }
 
     @staticmethod
     def create(pedido_numero, autor_email, autor_nombre, texto):
-        query = """
+        query = f"""
             INSERT INTO pedido_comentarios (pedido_numero, autor_email, autor_nombre, texto)
             VALUES (%s, %s, %s, %s)
-            RETURNING id, pedido_numero, autor_email, autor_nombre, texto, created_at
+            RETURNING {ComentariosRepository._SELECT_FIELDS}
         """
         with DatabaseManager.get_cursor() as cursor:
             cursor.execute(query, (pedido_numero, autor_email, autor_nombre, texto))
-            return ComentariosRepository._format(cursor.fetchone())
+            comentario = ComentariosRepository._format(cursor.fetchone())
+            cursor.execute(
+                "UPDATE pedidos SET comentarios_count = comentarios_count + 1 WHERE numero_pedido = %s",
+                (pedido_numero,)
+            )
+            return comentario
 
     @staticmethod
     def delete(comment_id):
-        query = "DELETE FROM pedido_comentarios WHERE id = %s RETURNING id"
+        query = "DELETE FROM pedido_comentarios WHERE id = %s RETURNING pedido_numero"
         with DatabaseManager.get_cursor() as cursor:
             cursor.execute(query, (comment_id,))
-            return cursor.fetchone() is not None
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            cursor.execute(
+                "UPDATE pedidos SET comentarios_count = GREATEST(comentarios_count - 1, 0) WHERE numero_pedido = %s",
+                (row['pedido_numero'],)
+            )
+            return True
 
 
 # ==============================================================================
 # ADJUNTOS
 # ==============================================================================
 
+@metrics.instrumentar_repositorio
 class AdjuntosRepository:
 
     @staticmethod
     def _format(row):
-        if not row:
-            return None
-        a = dict(row)
-        if a.get('id'):
-            a['id'] = str(a['id'])
-        if a.get('created_at') and hasattr(a['created_at'], 'isoformat'):
-            a['created_at'] = a['created_at'].isoformat()
-        return a
+        return dict(row) if row else None
 
     @staticmethod
     def get_by_pedido(pedido_numero):
         query = """
-            SELECT id, pedido_numero, nombre_archivo, nombre_original,
-                   tipo_mime, tamano_bytes, storage_path,
-                   subido_por_email, subido_por_nombre, created_at
-            FROM pedido_adjuntos
-            WHERE pedido_numero = %s
-            ORDER BY created_at DESC
+            SELECT a.id, a.pedido_numero, a.nombre_archivo, a.nombre_original,
+                   a.tipo_mime, a.tamano_bytes, a.storage_path,
+                   a.subido_por_email, a.subido_por_nombre, a.created_at,
+                   b.thumb_path, b.preview_path, COALESCE(b.estado, 'stored') AS estado
+            FROM pedido_adjuntos a
+            LEFT JOIN adjunto_blobs b ON b.sha256 = a.blob_sha256
+            WHERE a.pedido_numero = %s
+            ORDER BY a.created_at DESC
         """
         with DatabaseManager.get_cursor() as cursor:
             cursor.execute(query, (pedido_numero,))
             return [AdjuntosRepository._format(row) for row in cursor.fetchall()]
 
     @staticmethod
-    def create(pedido_numero, nombre_original, tipo_mime, tamano_bytes, storage_path, email, nombre):
+    def get_blob(sha256):
+        """storage_path of an already stored blob with this content, or None"""
+        query = "SELECT storage_path FROM adjunto_blobs WHERE sha256 = %s"
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, (sha256,))
+            row = cursor.fetchone()
+            return row['storage_path'] if row else None
+
+    @staticmethod
+    def create(pedido_numero, nombre_original, tipo_mime, tamano_bytes, storage_path, email, nombre, sha256=None,
+               blob=False):
+        """
+        Insert adjunto metadata. With blob=True the row references the shared
+        adjunto_blobs entry for sha256 (created as 'pending' or ref_count+1 in
+        the same transaction); the result's 'deduplicado' says whether it
+        already existed and 'estado' is 'pending' when the caller still has to
+        upload the content (new blob, or a failed one being retried).
+        """
         query = """
             INSERT INTO pedido_adjuntos
-                (pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes, storage_path, subido_por_email, subido_por_nombre)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id, pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes, storage_path, created_at
+                (pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes, storage_path,
+                 subido_por_email, subido_por_nombre, sha256, blob_sha256)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id, pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes, storage_path,
+                      sha256, created_at
         """
-        # nombre_archivo = last part of storage_path
-        nombre_archivo = storage_path.split('/')[-1] if '/' in storage_path else storage_path
         with DatabaseManager.get_cursor() as cursor:
-            cursor.execute(query, (pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes, storage_path, email, nombre))
-            return AdjuntosRepository._format(cursor.fetchone())
+            deduplicado = None
+            estado = 'stored'
+            if blob:
+                cursor.execute("""
+                    INSERT INTO adjunto_blobs (sha256, storage_path, tamano_bytes, ref_count, estado, pendiente_desde)
+                    VALUES (%s, %s, %s, 1, 'pending', now())
+                    ON CONFLICT (sha256) DO UPDATE SET
+                        ref_count = adjunto_blobs.ref_count + 1,
+                        estado = CASE WHEN adjunto_blobs.estado = 'failed' THEN 'pending' ELSE adjunto_blobs.estado END,
+                        intentos = CASE WHEN adjunto_blobs.estado = 'failed' THEN 0 ELSE adjunto_blobs.intentos END,
+                        pendiente_desde = CASE WHEN adjunto_blobs.estado = 'failed' THEN now()
+                                               ELSE adjunto_blobs.pendiente_desde END
+                    RETURNING storage_path, estado, (xmax = 0) AS nuevo
+                """, (sha256, storage_path, tamano_bytes))
+                row = cursor.fetchone()
+                storage_path = row['storage_path']
+                deduplicado = not row['nuevo']
+                estado = row['estado']
+            # nombre_archivo = last part of storage_path
+            nombre_archivo = storage_path.split('/')[-1] if '/' in storage_path else storage_path
+            cursor.execute(query, (pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes, storage_path,
+                                   email, nombre, sha256, sha256 if blob else None))
+            adjunto = AdjuntosRepository._format(cursor.fetchone())
+            adjunto['estado'] = estado
+            if deduplicado is not None:
+                adjunto['deduplicado'] = deduplicado
+            return adjunto
+
+    @staticmethod
+    def marcar_subido(sha256):
+        """Mark the blob 'stored'. False if it is gone (deleted while uploading)."""
+        query = "UPDATE adjunto_blobs SET estado = 'stored', ultimo_error = NULL WHERE sha256 = %s"
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, (sha256,))
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def marcar_fallo(sha256, error, final=False):
+        """Record a failed upload attempt; final=True moves the blob to 'failed'"""
+        query = """
+            UPDATE adjunto_blobs
+            SET intentos = intentos + 1, ultimo_error = %s,
+                estado = CASE WHEN %s THEN 'failed' ELSE estado END
+            WHERE sha256 = %s AND estado = 'pending'
+        """
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, (str(error)[:500], final, sha256))
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def get_blobs_pendientes(limit=500):
+        """Pending uploads, oldest first (to resume the queue after a restart)"""
+        query = """
+            SELECT b.sha256, b.storage_path,
+                   (SELECT a.tipo_mime FROM pedido_adjuntos a
+                    WHERE a.blob_sha256 = b.sha256 LIMIT 1) AS tipo_mime,
+                   EXTRACT(EPOCH FROM now() - COALESCE(b.pendiente_desde, b.created_at)) AS edad_segundos
+            FROM adjunto_blobs b
+            WHERE b.estado = 'pending'
+            ORDER BY b.pendiente_desde
+            LIMIT %s
+        """
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def set_derivados(sha256, thumb_path=None, preview_path=None, estado='listo'):
+        query = """
+            UPDATE adjunto_blobs
+            SET thumb_path = %s, preview_path = %s, derivados_estado = %s
+            WHERE sha256 = %s
+        """
+        with DatabaseManager.get_cursor() as cursor:
+            cursor.execute(query, (thumb_path, preview_path, estado, sha256))
+            return cursor.rowcount > 0
+
+    # ---------- Garbage collection (flask gc-adjuntos) ----------
+
+    @staticmethod
+    def purgar_filas_huerfanas(limit=500, dry_run=False):
+        """
+        Adjunto rows whose pedido no longer exists. Deletes up to `limit`
+        (releasing their blob references) unless dry_run.
+        Returns {'filas', 'rutas'}: rutas are legacy per-upload objects no
+        other row references; shared blobs are left to purgar_blobs_huerfanos.
+        """
+        seleccion = """
+            SELECT a.id FROM pedido_adjuntos a
+            WHERE NOT EXISTS (SELECT 1 FROM pedidos p WHERE p.numero_pedido = a.pedido_numero)
+            LIMIT %s
+        """
+        with DatabaseManager.get_cursor() as cursor:
+            if dry_run:
+                cursor.execute(f"""
+                    SELECT storage_path, blob_sha256 FROM pedido_adjuntos WHERE id IN ({seleccion})
+                """, (limit,))
+            else:
+                cursor.execute(f"""
+                    DELETE FROM pedido_adjuntos WHERE id IN ({seleccion})
+                    RETURNING storage_path, blob_sha256
+                """, (limit,))
+            filas = cursor.fetchall()
+
+            refs = {}
+            for f in filas:
+                if f['blob_sha256']:
+                    refs[f['blob_sha256']] = refs.get(f['blob_sha256'], 0) + 1
+            if refs and not dry_run:
+                cursor.execute("""
+                    UPDATE adjunto_blobs b SET ref_count = b.ref_count - r.n
+                    FROM unnest(%s::text[], %s::int[]) AS r(sha256, n)
+                    WHERE b.sha256 = r.sha256
+                """, (list(refs), list(refs.values())))
+
+            legacy = [f['storage_path'] for f in filas if not f['blob_sha256']]
+            rutas = AdjuntosRepository._no_referenciadas(cursor, legacy) if legacy else []
+            return {'filas': len(filas), 'rutas': rutas}
+
+    @staticmethod
+    def purgar_blobs_huerfanos(limit=500, min_edad_horas=24, dry_run=False):
+        """
+        Blobs no adjunto references (ref_count <= 0) older than min_edad_horas.
+        Deletes up to `limit` rows unless dry_run.
+        Returns {'blobs', 'bytes', 'rutas'} with the objects to remove.
+        """
+        condicion = """
+            b.ref_count <= 0
+            AND b.created_at < now() - make_interval(hours => %s)
+            AND NOT EXISTS (SELECT 1 FROM pedido_adjuntos a WHERE a.blob_sha256 = b.sha256)
+        """
+        with DatabaseManager.get_cursor() as cursor:
+            if dry_run:
+                cursor.execute(f"""
+                    SELECT storage_path, thumb_path, preview_path, tamano_bytes
+                    FROM adjunto_blobs b WHERE {condicion} LIMIT %s
+                """, (min_edad_horas, limit))
+            else:
+                cursor.execute(f"""
+                    DELETE FROM adjunto_blobs WHERE sha256 IN (
+                        SELECT b.sha256 FROM adjunto_blobs b WHERE {condicion} LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING storage_path, thumb_path, preview_path, tamano_bytes
+                """, (min_edad_horas, limit))
+            filas = cursor.fetchall()
+            rutas = [r for f in filas for r in (f['storage_path'], f['thumb_path'], f['preview_path']) if r]
+            return {'blobs': len(filas), 'bytes': sum(f['tamano_bytes'] or 0 for f in filas), 'rutas': rutas}
+
+    @staticmethod
+    def _no_referenciadas(cursor, rutas):
+        cursor.execute("""
+            SELECT r.path FROM unnest(%s::text[]) AS r(path)
+            WHERE NOT EXISTS (SELECT 1 FROM pedido_adjuntos a WHERE a.storage_path = r.path)
+              AND NOT EXISTS (SELECT 1 FROM adjunto_blobs b WHERE b.storage_path = r.path)
+              AND NOT EXISTS (SELECT 1 FROM adjunto_blobs b WHERE b.thumb_path = r.path)
+              AND NOT EXISTS (SELECT 1 FROM adjunto_blobs b WHERE b.preview_path = r.path)
+        """, (list(rutas),))
+        return [row['path'] for row in cursor.fetchall()]
+
+    @staticmethod
+    def rutas_no_referenciadas(rutas):
+        """Set difference: the storage paths no adjunto row or blob points to"""
+        if not rutas:
+            return []
+        with DatabaseManager.get_cursor() as cursor:
+            return AdjuntosRepository._no_referenciadas(cursor, rutas)
 
     @staticmethod
     def get_by_id(adjunto_id):
-        query = "SELECT * FROM pedido_adjuntos WHERE id = %s"
+        query = """
+            SELECT a.*, COALESCE(b.estado, 'stored') AS estado
+            FROM pedido_adjuntos a
+            LEFT JOIN adjunto_blobs b ON b.sha256 = a.blob_sha256
+            WHERE a.id = %s
+        """
         with DatabaseManager.get_cursor() as cursor:
             cursor.execute(query, (adjunto_id,))
             return AdjuntosRepository._format(cursor.fetchone())
 
     @staticmethod
     def delete(adjunto_id):
-        query = "DELETE FROM pedido_adjuntos WHERE id = %s RETURNING storage_path"
+        """
+        Delete the row and release its blob reference.
+        Returns None if not found, else {'storage_path', 'borrar', 'derivados'};
+        borrar is True when nothing references the stored object anymore, and
+        derivados lists its thumbnail/preview paths to remove with it.
+        """
+        query = "DELETE FROM pedido_adjuntos WHERE id = %s RETURNING storage_path, blob_sha256"
         with DatabaseManager.get_cursor() as cursor:
             cursor.execute(query, (adjunto_id,))
             row = cursor.fetchone()
-            if row:
-                return row['storage_path']
-            return None
+            if not row:
+                return None
+            if row['blob_sha256']:
+                cursor.execute("""
+                    UPDATE adjunto_blobs SET ref_count = ref_count - 1
+                    WHERE sha256 = %s RETURNING ref_count
+                """, (row['blob_sha256'],))
+                blob = cursor.fetchone()
+                borrar = False
+                derivados = []
+                if blob and blob['ref_count'] <= 0:
+                    cursor.execute("""
+                        DELETE FROM adjunto_blobs WHERE sha256 = %s AND ref_count <= 0
+                        RETURNING thumb_path, preview_path
+                    """, (row['blob_sha256'],))
+                    borrado = cursor.fetchone()
+                    borrar = borrado is not None
+                    if borrado:
+                        derivados = [p for p in (borrado['thumb_path'], borrado['preview_path']) if p]
+            else:
+                # Legacy per-upload path; shared only if copied by hand
+                cursor.execute("SELECT 1 FROM pedido_adjuntos WHERE storage_path = %s LIMIT 1", (row['storage_path'],))
+                borrar = cursor.fetchone() is None
+                derivados = []
+            return {'storage_path': row['storage_path'], 'borrar': borrar, 'derivados': derivados}
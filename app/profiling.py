@@ -0,0 +1,242 @@
+"""
+Profiling - on-demand profile of a single request, for admins
+
+Send any request with the header
+    X-Profile: muestreo     sampling profiler (default), folded stacks
+    X-Profile: cprofile     deterministic cProfile, .pstats
+as an admin. The response is the normal one plus X-Profile-Id: <file>,
+downloadable from GET /api/admin/perfiles/<file>. From anyone else the
+header is ignored: the request is served as usual with X-Profile-Error.
+
+- muestreo: a thread samples the request thread's stack every
+  PROFILE_INTERVALO_MS (CPU-bound code yields the GIL every 5 ms, the
+  practical floor) and writes Brendan Gregg's folded format
+  ("a;b;c 12"), which flamegraph.pl, speedscope and inferno read directly.
+- cprofile: only timing per function. Read it with snakeviz, or turn it into
+  a flamegraph with flameprof.
+
+Global limits, shared by every worker on the host through PROFILE_DIR: one
+profile at a time (flock), at most PROFILE_MAX_POR_HORA per hour, and the
+newest PROFILE_RETENER files are kept. A request over the limit is served
+normally with X-Profile-Error.
+"""
+import os
+import sys
+import time
+import uuid
+import cProfile
+import threading
+from collections import Counter
+
+from flask import g, request, jsonify, send_from_directory
+
+from app.auth.decorators import admin_only
+from app.auth.supabase_helper import SupabaseHelper
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+MODOS = ('muestreo', 'cprofile')
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def _marco(code):
+    archivo = code.co_filename
+    if archivo.startswith(RAIZ):
+        archivo = os.path.relpath(archivo, RAIZ)
+    else:
+        archivo = os.path.basename(archivo)
+    nombre = getattr(code, 'co_qualname', code.co_name)
+    return f'{nombre} ({archivo}:{code.co_firstlineno})'
+
+
+class _Muestreador(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, hilo_id, intervalo):
+        super().__init__(name='perfil-muestreo', daemon=True)
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            pila = []
+            while frame is not None:
+                pila.append(_marco(frame.f_code))
+                frame = frame.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def detener(self):
+        self._parar.set()
+        self.join()
+
+    def guardar(self, path):
+        with open(path, 'w') as f:
+            for pila, n in self.pilas.most_common():
+                f.write(f'{pila} {n}\n')
+
+
+class Perfilador:
+    enabled = True
+    directorio = None
+    max_por_hora = 10
+    intervalo = 0.005
+    retener = 50
+
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, config):
+        cls.enabled = config.get('PROFILE_ENABLED', True)
+        cls.directorio = config.get('PROFILE_DIR') or os.path.join(RAIZ, 'var', 'profiles')
+        cls.max_por_hora = int(config.get('PROFILE_MAX_POR_HORA', cls.max_por_hora))
+        cls.intervalo = float(config.get('PROFILE_INTERVALO_MS', cls.intervalo * 1000)) / 1000
+        cls.retener = int(config.get('PROFILE_RETENER', cls.retener))
+
+    @classmethod
+    def _perfiles(cls):
+        """[(mtime, nombre)] of stored profiles, newest first"""
+        out = []
+        for nombre in os.listdir(cls.directorio):
+            if nombre.endswith(('.folded', '.pstats')):
+                try:
+                    out.append((os.path.getmtime(os.path.join(cls.directorio, nombre)), nombre))
+                except OSError:
+                    pass
+        return sorted(out, reverse=True)
+
+    @classmethod
+    def adquirir(cls):
+        """Global slot for one profile -> (lock file, None) or (None, reason)"""
+        if not cls._lock.acquire(blocking=False):
+            return None, 'ocupado'
+        try:
+            os.makedirs(cls.directorio, exist_ok=True)
+            f = open(os.path.join(cls.directorio, '.lock'), 'w')
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    f.close()
+                    cls._lock.release()
+                    return None, 'ocupado'
+            hace_una_hora = time.time() - 3600
+            if sum(1 for mtime, _ in cls._perfiles() if mtime > hace_una_hora) >= cls.max_por_hora:
+                cls.liberar(f)
+                return None, f'limite de {cls.max_por_hora} perfiles por hora'
+            return f, None
+        except Exception:
+            cls._lock.release()
+            raise
+
+    @classmethod
+    def liberar(cls, f):
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+        cls._lock.release()
+
+    @classmethod
+    def podar(cls):
+        for _, nombre in cls._perfiles()[cls.retener:]:
+            try:
+                os.remove(os.path.join(cls.directorio, nombre))
+            except OSError:
+                pass
+
+
+def _terminar():
+    """Stop the running profiler (if any), store it and free the slot -> file name or None"""
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return None
+    modo, profiler, lock = perfil
+    try:
+        endpoint = (request.endpoint or 'sin_ruta').replace('.', '-')
+        nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:6]}"
+        if modo == 'muestreo':
+            profiler.detener()
+            nombre += '.folded'
+            profiler.guardar(os.path.join(Perfilador.directorio, nombre))
+        else:
+            profiler.disable()
+            nombre += '.pstats'
+            profiler.dump_stats(os.path.join(Perfilador.directorio, nombre))
+        Perfilador.podar()
+        print(f"[PROFILE] {request.method} {request.path} -> {nombre}")
+        return nombre
+    finally:
+        Perfilador.liberar(lock)
+
+
+def init_profiling(app):
+    Perfilador.configure(app.config)
+
+    @app.before_request
+    def iniciar_perfil():
+        modo = request.headers.get('X-Profile')
+        if not modo or not Perfilador.enabled:
+            return None
+        modo = modo.strip().lower()
+        if modo in ('1', 'true'):
+            modo = 'muestreo'
+        if modo not in MODOS:
+            g.perfil_error = f'modo invalido (use {", ".join(MODOS)})'
+            return None
+
+        # Same rule as admin_only, but never rejects: the header is just ignored.
+        # get_current_user is memoized per request, so the route does not decode again.
+        user = SupabaseHelper.get_current_user()
+        if not user or not user.get('activo') or user.get('rol') != 'admin':
+            g.perfil_error = 'requiere rol de administrador'
+            return None
+
+        lock, motivo = Perfilador.adquirir()
+        if lock is None:
+            g.perfil_error = motivo
+            return None
+        if modo == 'muestreo':
+            profiler = _Muestreador(threading.get_ident(), Perfilador.intervalo)
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        g.perfil = (modo, profiler, lock)
+        return None
+
+    @app.after_request
+    def guardar_perfil(response):
+        nombre = _terminar()
+        if nombre:
+            response.headers['X-Profile-Id'] = nombre
+        elif g.get('perfil_error'):
+            response.headers['X-Profile-Error'] = g.perfil_error
+        return response
+
+    @app.teardown_request
+    def liberar_perfil(exc):
+        # after_request is skipped when the response could not be built
+        if g.get('perfil') is not None:
+            _terminar()
+
+    @app.route('/api/admin/perfiles', methods=['GET'])
+    @admin_only
+    def listar_perfiles(user):
+        if not os.path.isdir(Perfilador.directorio):
+            return jsonify([]), 200
+        return jsonify([{'nombre': nombre, 'fecha': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(mtime)),
+                         'bytes': os.path.getsize(os.path.join(Perfilador.directorio, nombre))}
+                        for mtime, nombre in Perfilador._perfiles()]), 200
+
+    @app.route('/api/admin/perfiles/<nombre>', methods=['GET'])
+    @admin_only
+    def descargar_perfil(user, nombre):
+        if not nombre.endswith(('.folded', '.pstats')):
+            return jsonify({'error': 'Perfil no encontrado'}), 404
+        return send_from_directory(Perfilador.directorio, nombre, as_attachment=True)
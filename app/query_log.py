@@ -0,0 +1,153 @@
+"""
+Query Log - slow statements, sampled EXPLAIN plans and per-request query budgets
+
+Every statement run through DatabaseManager.get_cursor is timed (see
+_CursorMedido in app/models/database.py) and reported here:
+
+- Statements slower than SLOW_QUERY_MS are logged as [SLOW-QUERY] with the
+  repository method that issued them. The SQL template is logged, never
+  the parameters.
+- A sample of them (SLOW_QUERY_EXPLAIN_SAMPLE, at most once per statement
+  every SLOW_QUERY_EXPLAIN_COOLDOWN seconds) is re-run under EXPLAIN on the
+  same connection and transaction, inside a savepoint. Only SELECTs get
+  ANALYZE, BUFFERS, because ANALYZE executes the statement again. Writes
+  get a plain EXPLAIN.
+- Within a request, statements are counted per endpoint. A request over its
+  budget (QUERY_BUDGETS[endpoint] or QUERY_BUDGET) is logged as
+  [QUERY-BUDGET]. A statement repeated N_PLUS_ONE_REPETICIONES or more times
+  is flagged as [N+1].
+"""
+import re
+import time
+import random
+import threading
+from collections import Counter
+
+from flask import g, request, has_request_context
+
+from app import metrics
+
+_ESPACIOS = re.compile(r'\s+')
+
+
+def _texto(query, cursor):
+    if isinstance(query, bytes):
+        return query.decode('utf-8', 'replace')
+    if hasattr(query, 'as_string'):  # psycopg2.sql.Composed
+        return query.as_string(cursor)
+    return query
+
+
+def _compacto(texto, largo=300):
+    texto = _ESPACIOS.sub(' ', texto).strip()
+    return texto if len(texto) <= largo else texto[:largo] + '…'
+
+
+class RegistroConsultas:
+    umbral_ms = 200
+    muestra_explain = 0.2
+    cooldown_explain = 600
+    presupuesto = 10
+    presupuestos = {}
+    repeticiones_n1 = 5
+
+    _lock = threading.Lock()
+    _ultimo_explain = {}
+
+    @classmethod
+    def configure(cls, config):
+        cls.umbral_ms = float(config.get('SLOW_QUERY_MS', cls.umbral_ms))
+        cls.muestra_explain = float(config.get('SLOW_QUERY_EXPLAIN_SAMPLE', cls.muestra_explain))
+        cls.cooldown_explain = float(config.get('SLOW_QUERY_EXPLAIN_COOLDOWN', cls.cooldown_explain))
+        cls.presupuesto = int(config.get('QUERY_BUDGET', cls.presupuesto))
+        cls.presupuestos = dict(config.get('QUERY_BUDGETS') or {})
+        cls.repeticiones_n1 = int(config.get('N_PLUS_ONE_REPETICIONES', cls.repeticiones_n1))
+
+    @classmethod
+    def registrar(cls, cursor, query, params, segundos):
+        """Called after every successful execute on a get_cursor() cursor"""
+        operacion = metrics.operacion_actual()
+        if has_request_context():
+            estado = g.get('consultas')
+            if estado is None:
+                estado = g.consultas = {'n': 0, 'segundos': 0.0, 'sentencias': Counter()}
+            estado['n'] += 1
+            estado['segundos'] += segundos
+            estado['sentencias'][(operacion, query if isinstance(query, str) else _texto(query, cursor))] += 1
+
+        ms = segundos * 1000
+        if cls.umbral_ms > 0 and ms >= cls.umbral_ms:
+            cls._lenta(cursor, query, params, ms, operacion)
+
+    @classmethod
+    def _lenta(cls, cursor, query, params, ms, operacion):
+        texto = _texto(query, cursor)
+        metrics.DB_LENTAS.labels(operacion or '-').inc()
+        donde = request.endpoint if has_request_context() else 'background'
+        print(f"[SLOW-QUERY] {ms:.0f} ms {operacion or '-'} ({donde}): {_compacto(texto)}")
+        if cls._toca_explain(texto):
+            for linea in cls._explain(cursor, texto, params):
+                print(f"[SLOW-QUERY]   {linea}")
+
+    @classmethod
+    def _toca_explain(cls, texto):
+        if random.random() >= cls.muestra_explain:
+            return False
+        clave = _compacto(texto, 2000)
+        ahora = time.monotonic()
+        with cls._lock:
+            if ahora - cls._ultimo_explain.get(clave, -cls.cooldown_explain) < cls.cooldown_explain:
+                return False
+            cls._ultimo_explain[clave] = ahora
+        return True
+
+    @staticmethod
+    def _explain(cursor, texto, params):
+        """Plan lines of texto on cursor's connection; never leaves the transaction aborted"""
+        inicio = texto.lstrip(' \t\n(').split(None, 1)[0].upper() if texto.strip() else ''
+        if inicio not in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE'):
+            return []
+        opciones = '(ANALYZE, BUFFERS) ' if inicio == 'SELECT' else ''
+        c = cursor.connection.cursor()
+        try:
+            c.execute('SAVEPOINT query_log_explain')
+            try:
+                c.execute(f'EXPLAIN {opciones}{texto}', params)
+                plan = [fila[0] for fila in c.fetchall()]
+                c.execute('RELEASE SAVEPOINT query_log_explain')
+                return plan
+            except Exception as e:
+                c.execute('ROLLBACK TO SAVEPOINT query_log_explain')
+                return [f'(EXPLAIN falló: {e})']
+        except Exception as e:
+            return [f'(EXPLAIN no disponible: {e})']
+        finally:
+            c.close()
+
+    @classmethod
+    def cerrar_request(cls, endpoint):
+        """End of request: query-count metric, budget and N+1 warnings"""
+        estado = g.get('consultas')
+        n = estado['n'] if estado else 0
+        metrics.DB_CONSULTAS_REQUEST.labels(endpoint).observe(n)
+        if not estado:
+            return
+        limite = cls.presupuestos.get(endpoint, cls.presupuesto)
+        if limite and n > limite:
+            metrics.DB_PRESUPUESTO_EXCEDIDO.labels(endpoint).inc()
+            print(f"[QUERY-BUDGET] {request.method} {request.path} ({endpoint}): {n} consultas, "
+                  f"presupuesto {limite}, {estado['segundos'] * 1000:.0f} ms en BD")
+        for (operacion, sentencia), veces in estado['sentencias'].most_common():
+            if veces < cls.repeticiones_n1:
+                break
+            print(f"[N+1] {endpoint}: {veces}x desde {operacion or '-'}: {_compacto(sentencia, 200)}")
+
+
+def init_query_log(app):
+    RegistroConsultas.configure(app.config)
+
+    @app.after_request
+    def revisar_consultas(response):
+        if request.endpoint != 'metrics':
+            RegistroConsultas.cerrar_request(request.endpoint or 'sin_ruta')
+        return response
@@ -0,0 +1,59 @@
+"""Routes - Batch (several GETs in one HTTP request)"""
+import time
+from flask import Blueprint, request, jsonify, current_app
+from app.auth.decorators import require_auth
+from app.services.lotes import EjecutorLotes
+
+batch_bp = Blueprint('batch', __name__)
+
+# Forwarded to every sub-request (Authorization is already resolved into the user)
+HEADERS_REENVIADOS = ('Authorization', 'Accept-Language', 'X-Request-Id')
+
+
+def _validar(data):
+    """Body {"requests": [{"id"?, "method"?, "path"}]} -> [{'id', 'path'}]; raises ValueError"""
+    if not isinstance(data, dict) or not isinstance(data.get('requests'), list):
+        raise ValueError('Se esperaba {"requests": [...]}')
+    subs = data['requests']
+    if not subs:
+        raise ValueError('La lista de requests está vacía')
+    if len(subs) > EjecutorLotes.max_items:
+        raise ValueError(f'Máximo {EjecutorLotes.max_items} requests por lote')
+
+    items, ids = [], set()
+    for i, sub in enumerate(subs):
+        if not isinstance(sub, dict) or not isinstance(sub.get('path'), str):
+            raise ValueError(f'requests[{i}]: falta "path"')
+        if str(sub.get('method', 'GET')).upper() != 'GET':
+            raise ValueError(f'requests[{i}]: solo se permiten lecturas (GET)')
+        path = sub['path']
+        if not path.startswith('/'):
+            raise ValueError(f'requests[{i}]: "path" debe empezar con /')
+        # Paths may be given relative to /api
+        if not path.startswith('/api/'):
+            path = '/api' + path
+        if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+            raise ValueError(f'requests[{i}]: no se permiten lotes anidados')
+        item_id = str(sub.get('id', i))
+        if item_id in ids:
+            raise ValueError(f'requests[{i}]: id duplicado "{item_id}"')
+        ids.add(item_id)
+        items.append({'id': item_id, 'path': path})
+    return items
+
+
+@batch_bp.route('/batch', methods=['POST'])
+@require_auth
+def ejecutar_lote(user):
+    try:
+        items = _validar(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        t = time.perf_counter()
+        headers = {h: request.headers[h] for h in HEADERS_REENVIADOS if h in request.headers}
+        responses = EjecutorLotes.ejecutar(current_app._get_current_object(), user, items,
+                                           request.host_url, headers)
+        return jsonify({'responses': responses, 'ms': round((time.perf_counter() - t) * 1000, 1)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
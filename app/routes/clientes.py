@@ -1,13 +1,50 @@
 """Routes - Clientes"""
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from app.models.database import ClientesRepository
+from app.auth.decorators import require_auth
 
 clientes_bp = Blueprint('clientes', __name__)
 
+MAX_LIMIT = 200
+MAX_SUGERENCIAS = 10
+
 
 @clientes_bp.route('/clientes', methods=['GET'])
-def obtener_clientes():
+@require_auth
+def obtener_clientes(user):
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), MAX_LIMIT)
+        return jsonify(ClientesRepository.get_all(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            orden=request.args.get('orden', 'ultimo_pedido')
+        )), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@clientes_bp.route('/clientes/sugerir', methods=['GET'])
+@require_auth
+def sugerir_clientes(user):
+    """Autocomplete by phone prefix or name for the order form"""
+    try:
+        limit = min(max(int(request.args.get('limit', 8)), 1), MAX_SUGERENCIAS)
+        return jsonify(ClientesRepository.sugerir(request.args.get('q', ''), limit=limit)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@clientes_bp.route('/clientes/<telefono>', methods=['GET'])
+@require_auth
+def obtener_cliente(user, telefono):
     try:
-        return jsonify(ClientesRepository.get_all()), 200
+        cliente = ClientesRepository.get_by_telefono(telefono)
+        if cliente is None:
+            return jsonify({'error': 'Cliente no encontrado'}), 404
+        return jsonify(cliente), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,14 +1,34 @@
 """Routes - Page serving & static assets"""
 import os
-from flask import Blueprint, send_from_directory, redirect
+import hashlib
+import mimetypes
+from flask import Blueprint, send_from_directory, send_file, redirect, request, abort, current_app
+from werkzeug.security import safe_join
+
+from app.services.assets import Assets
+from app.compression import elegir_codificacion
 
 # Resolve frontend/ directory relative to project root
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend')
 FRONTEND_DIR = os.path.abspath(FRONTEND_DIR)
 
+# Fingerprinted files never change: cache for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
+
 pages_bp = Blueprint('pages', __name__)
 
 
+def _pagina(*partes):
+    """HTML page with asset URLs rewritten to their fingerprinted versions"""
+    response = current_app.response_class(Assets.pagina(os.path.join(FRONTEND_DIR, *partes)),
+                                          mimetype='text/html')
+    # Always revalidate the HTML; the assets it points to are immutable
+    response.headers['Cache-Control'] = 'no-cache'
+    # Weak: still valid for the gzip/brotli encodings of the same page
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest(), weak=True)
+    return response.make_conditional(request)
+
+
 # --- HTML Pages ---
 
 @pages_bp.route('/')
@@ -18,20 +38,43 @@ def index():
 
 @pages_bp.route('/login')
 def login_page():
-    return send_from_directory(FRONTEND_DIR, 'login.html')
+    return _pagina('login.html')
 
 
 @pages_bp.route('/backoffice')
 def backoffice():
-    return send_from_directory(os.path.join(FRONTEND_DIR, 'backoffice'), 'index.html')
+    return _pagina('backoffice', 'index.html')
 
 
 @pages_bp.route('/formulario')
 def formulario():
-    return send_from_directory(os.path.join(FRONTEND_DIR, 'formulario'), 'index.html')
+    return _pagina('formulario', 'index.html')
+
+
+# --- Fingerprinted assets (flask build-assets) ---
+
+@pages_bp.route('/assets/<path:filename>')
+def serve_asset(filename):
+    path = safe_join(Assets.dist_dir, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    # Serve the precompressed sibling the client accepts
+    encoding = elegir_codificacion(request.accept_encodings)
+    sufijo = {'br': '.br', 'gzip': '.gz'}.get(encoding)
+    if sufijo and os.path.isfile(path + sufijo):
+        response = send_file(path + sufijo, mimetype=mimetypes.guess_type(filename)[0], conditional=True,
+                             etag=os.path.basename(filename) + sufijo, max_age=ASSET_MAX_AGE)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_file(path, conditional=True, etag=os.path.basename(filename), max_age=ASSET_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
-# --- Static assets ---
+# --- Static assets (unfingerprinted; dev and fallback) ---
 
 @pages_bp.route('/css/<path:filename>')
 def serve_css(filename):
@@ -1,27 +1,44 @@
 """
 Routes - Pedido Comentarios y Adjuntos
 """
+import os
+import mimetypes
 import traceback
-from flask import Blueprint, request, jsonify
-from app.models.database import ComentariosRepository, AdjuntosRepository
+from flask import Blueprint, request, jsonify, send_file
+from werkzeug.sansio.multipart import MultipartDecoder, NeedData, Epilogue, File, Data
+from app.models.database import PedidosRepository, ComentariosRepository, AdjuntosRepository
 from app.auth.decorators import require_auth
-from app.auth import storage as supabase_storage
+from app.services.miniaturas import MiniaturasWorker
+from app.services.subidas import ColaSubidas
+from app.auth.storage_backend import (
+    get_storage, spool_stream, iter_file, content_path, ArchivoMuyGrande, CHUNK_SIZE, MAX_FILE_SIZE
+)
 
 pedido_extras_bp = Blueprint('pedido_extras', __name__)
 
+# Headroom over MAX_FILE_SIZE for multipart boundaries and part headers
+MULTIPART_OVERHEAD = 64 * 1024
+MAX_LIMIT_COMENTARIOS = 200
+
 
 # ========== COMENTARIOS ==========
 
 @pedido_extras_bp.route('/pedidos/<pedido_numero>/comentarios', methods=['GET'])
 @require_auth
 def get_comentarios(user, pedido_numero):
+    """Newest first; ?limit= and ?cursor= (next_cursor of the previous page)"""
     try:
-        return jsonify(ComentariosRepository.get_by_pedido(pedido_numero)), 200
+        limit = min(max(int(request.args.get('limit', 50)), 1), MAX_LIMIT_COMENTARIOS)
+        return jsonify(ComentariosRepository.get_by_pedido(
+            pedido_numero, limit=limit, cursor=request.args.get('cursor')
+        )), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         error_msg = str(e).lower()
         if 'relation' in error_msg and 'does not exist' in error_msg:
             print(f"[WARN] Tabla pedido_comentarios no existe. Ejecuta migración 002_comentarios_adjuntos.sql")
-            return jsonify([]), 200  # Return empty gracefully
+            return jsonify({'comentarios': [], 'next_cursor': None}), 200  # Return empty gracefully
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
@@ -65,11 +82,41 @@ def eliminar_comentario(user, comment_id):
 
 # ========== ADJUNTOS ==========
 
+def _firmar_adjuntos(adjuntos):
+    """
+    Add signed 'url', 'thumb_url' and 'preview_url' to each adjunto with a
+    single batch signing call
+    """
+    if not adjuntos:
+        return adjuntos
+    paths = [a[k] for a in adjuntos if a.get('estado', 'stored') == 'stored'
+             for k in ('storage_path', 'thumb_path', 'preview_path') if a.get(k)]
+    try:
+        urls = get_storage().get_signed_urls(paths)
+    except Exception as e:
+        print(f"[WARN] Could not sign adjuntos: {e}")
+        urls = {}
+    for a in adjuntos:
+        if a.get('estado', 'stored') != 'stored':
+            a['url'] = a['thumb_url'] = a['preview_url'] = None
+            continue
+        a['url'] = urls.get(a['storage_path'])
+        a['thumb_url'] = urls.get(a.get('thumb_path'))
+        a['preview_url'] = urls.get(a.get('preview_path'))
+    return adjuntos
+
+
 @pedido_extras_bp.route('/pedidos/<pedido_numero>/adjuntos', methods=['GET'])
 @require_auth
 def get_adjuntos(user, pedido_numero):
     try:
-        return jsonify(AdjuntosRepository.get_by_pedido(pedido_numero)), 200
+        adjuntos = AdjuntosRepository.get_by_pedido(pedido_numero)
+        # Make sure uploads left pending by a restart are being resumed
+        if ColaSubidas.enabled and any(a['estado'] == 'pending' for a in adjuntos):
+            ColaSubidas.iniciar()
+        if request.args.get('urls') == 'true':
+            _firmar_adjuntos(adjuntos)
+        return jsonify(adjuntos), 200
     except Exception as e:
         error_msg = str(e).lower()
         if 'relation' in error_msg and 'does not exist' in error_msg:
@@ -79,45 +126,130 @@ def get_adjuntos(user, pedido_numero):
         return jsonify({'error': str(e)}), 500
 
 
+@pedido_extras_bp.route('/pedidos/<pedido_numero>/detalle', methods=['GET'])
+@require_auth
+def get_detalle(user, pedido_numero):
+    """Pedido with its comentarios and adjuntos (signed URLs with ?urls=true) in one request"""
+    try:
+        pedido = PedidosRepository.get_detalle(pedido_numero)
+        if pedido is None:
+            return jsonify({'error': 'Pedido no encontrado'}), 404
+        if ColaSubidas.enabled and any(a['estado'] == 'pending' for a in pedido['adjuntos']):
+            ColaSubidas.iniciar()
+        if request.args.get('urls') == 'true':
+            _firmar_adjuntos(pedido['adjuntos'])
+        return jsonify(pedido), 200
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
+def _multipart_events():
+    """Decode the multipart body incrementally from request.stream"""
+    boundary = request.mimetype_params.get('boundary', '')
+    decoder = MultipartDecoder(boundary.encode())
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            chunk = request.stream.read(CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+        elif isinstance(event, Epilogue):
+            return
+        else:
+            yield event
+
+
+def _abrir_archivo(campo):
+    """
+    Advance the multipart body to the `campo` file part without reading it.
+    Returns (filename, content_type, chunks) or None if the part is missing;
+    chunks yields the file's bytes straight off the request stream.
+    """
+    if request.mimetype != 'multipart/form-data' or not request.mimetype_params.get('boundary'):
+        return None
+    events = _multipart_events()
+    for event in events:
+        if isinstance(event, File) and event.name == campo:
+            def chunks():
+                for data in events:
+                    if not isinstance(data, Data):
+                        return
+                    if data.data:
+                        yield data.data
+                    if not data.more_data:
+                        return
+            return event.filename, event.headers.get('Content-Type'), chunks()
+    return None
+
+
 @pedido_extras_bp.route('/pedidos/<pedido_numero>/adjuntos', methods=['POST'])
 @require_auth
 def subir_adjunto(user, pedido_numero):
-    """Upload file to Supabase Storage + save metadata in DB"""
+    """
+    Spool the file, save metadata in DB and upload it to the storage backend.
+    With SUBIDAS_ASYNC the upload runs in the background: the response is
+    202 with estado='pending' and the adjunto turns 'stored' (or 'failed').
+    """
     try:
-        if 'archivo' not in request.files:
+        max_mb = MAX_FILE_SIZE // (1024 * 1024)
+        if request.content_length and request.content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            return jsonify({'success': False, 'error': f'Archivo muy grande (máx {max_mb}MB)'}), 400
+
+        archivo = _abrir_archivo('archivo')
+        if archivo is None:
             return jsonify({'success': False, 'error': 'No se envió archivo'}), 400
 
-        archivo = request.files['archivo']
-        if not archivo.filename:
+        filename, content_type, chunks = archivo
+        if not filename:
             return jsonify({'success': False, 'error': 'Archivo vacío'}), 400
+        content_type = content_type or 'application/octet-stream'
 
-        # Max 10MB
-        archivo.seek(0, 2)
-        size = archivo.tell()
-        archivo.seek(0)
-        if size > 10 * 1024 * 1024:
-            return jsonify({'success': False, 'error': 'Archivo muy grande (máx 10MB)'}), 400
+        # Spool to disk (size limit + sha256 on the fly). The blob row is
+        # created first; only content that is not stored yet gets uploaded.
+        asincrono = ColaSubidas.enabled
+        try:
+            spool, meter = spool_stream(chunks, spool_dir=ColaSubidas.spool_dir if asincrono else None,
+                                        persistente=asincrono)
+        except ArchivoMuyGrande as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        content_type = archivo.content_type or 'application/octet-stream'
+        try:
+            with spool:
+                adjunto = AdjuntosRepository.create(
+                    pedido_numero=pedido_numero,
+                    nombre_original=filename,
+                    tipo_mime=content_type,
+                    tamano_bytes=meter.size,
+                    storage_path=content_path(meter.sha256),
+                    email=user['email'],
+                    nombre=user['nombre'],
+                    sha256=meter.sha256,
+                    blob=True
+                )
+                storage_path = adjunto['storage_path']
+                pendiente = adjunto['estado'] == 'pending'
 
-        # Upload to Supabase Storage
-        storage_path = supabase_storage.upload_file(
-            pedido_numero=pedido_numero,
-            file_obj=archivo,
-            filename=archivo.filename,
-            content_type=content_type
-        )
+                if pendiente and not asincrono:
+                    try:
+                        get_storage().upload_stream(pedido_numero, iter_file(spool), filename, content_type,
+                                                    storage_path=storage_path)
+                    except Exception:
+                        AdjuntosRepository.delete(adjunto['id'])
+                        raise
+                    AdjuntosRepository.marcar_subido(meter.sha256)
+                    adjunto['estado'] = 'stored'
 
-        # Save metadata in DB
-        adjunto = AdjuntosRepository.create(
-            pedido_numero=pedido_numero,
-            nombre_original=archivo.filename,
-            tipo_mime=content_type,
-            tamano_bytes=size,
-            storage_path=storage_path,
-            email=user['email'],
-            nombre=user['nombre']
-        )
+            if asincrono and pendiente:
+                # The queue takes over the spool file and answers right away
+                ColaSubidas.encolar(meter.sha256, storage_path, content_type, archivo=spool.name)
+                return jsonify({'success': True, 'adjunto': adjunto}), 202
+        finally:
+            if asincrono and os.path.exists(spool.name):
+                os.unlink(spool.name)
+
+        if pendiente:
+            # New image content: thumbnails/preview in the background
+            MiniaturasWorker.encolar(meter.sha256, storage_path, content_type)
 
         return jsonify({'success': True, 'adjunto': adjunto}), 201
 
@@ -134,8 +266,14 @@ def descargar_adjunto(user, adjunto_id):
         adjunto = AdjuntosRepository.get_by_id(adjunto_id)
         if not adjunto:
             return jsonify({'error': 'Adjunto no encontrado'}), 404
+        if adjunto['estado'] == 'pending':
+            return jsonify({'error': 'El archivo aún se está subiendo'}), 409
+        if adjunto['estado'] == 'failed':
+            return jsonify({'error': 'La subida del archivo falló, vuelve a adjuntarlo'}), 410
 
-        signed_url = supabase_storage.get_signed_url(adjunto['storage_path'], expires_in=3600)
+        signed_url = get_storage().get_signed_url(
+            adjunto['storage_path'], expires_in=3600, download_name=adjunto['nombre_original']
+        )
 
         return jsonify({
             'success': True,
@@ -153,13 +291,15 @@ def descargar_adjunto(user, adjunto_id):
 def eliminar_adjunto(user, adjunto_id):
     """Delete file from Storage + DB"""
     try:
-        storage_path = AdjuntosRepository.delete(adjunto_id)
-        if not storage_path:
+        eliminado = AdjuntosRepository.delete(adjunto_id)
+        if not eliminado:
             return jsonify({'success': False, 'error': 'Adjunto no encontrado'}), 404
 
-        # Delete from Supabase Storage
+        # Shared blobs are only removed with their last reference
         try:
-            supabase_storage.delete_file(storage_path)
+            if eliminado['borrar']:
+                for path in [eliminado['storage_path']] + eliminado['derivados']:
+                    get_storage().delete_file(path)
         except Exception as e:
             print(f"[WARN] Could not delete from storage: {e}")
 
@@ -168,3 +308,32 @@ def eliminar_adjunto(user, adjunto_id):
     except Exception as e:
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@pedido_extras_bp.route('/archivos/<path:storage_path>', methods=['GET'])
+def servir_archivo(storage_path):
+    """
+    Serve a local-backend blob from a signed URL (no auth header: the
+    browser opens it directly). send_file handles Range/conditional
+    requests, uses wsgi.file_wrapper (sendfile) or X-Sendfile when enabled.
+    """
+    storage = get_storage()
+    if storage.name != 'local':
+        return jsonify({'error': 'Recurso no encontrado'}), 404
+
+    nombre = request.args.get('nombre', '')
+    if not storage.verify(storage_path, request.args.get('exp'), request.args.get('sig'), nombre):
+        return jsonify({'error': 'URL inválida o expirada'}), 403
+
+    path = storage.local_path(storage_path)
+    if not path or not os.path.isfile(path):
+        return jsonify({'error': 'Archivo no encontrado'}), 404
+
+    return send_file(
+        path,
+        mimetype=mimetypes.guess_type(nombre)[0] or 'application/octet-stream',
+        download_name=nombre or None,
+        conditional=True,
+        etag=storage_path.rsplit('/', 1)[-1],
+        max_age=3600
+    )
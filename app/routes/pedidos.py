@@ -5,12 +5,31 @@ from app.auth.decorators import require_auth, admin_only
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
+CATEGORIAS_PENDIENTE = ('bloqueado', 'retraso', 'personalizacion', 'informacion')
+# Values of the estado_produccion enum
+ESTADOS_PRODUCCION = (
+    'En Producción', 'Listo para Envío', 'En Camino', 'Entregado',
+    'Bloqueado - Sin Dirección', 'Cancelado',
+)
+MAX_LIMIT_PENDIENTES = 500
+MAX_LIMIT_TABLERO = 100
+
+
+def _fields():
+    """?fields=id,cliente,precio_total -> list (validated by the repository), or None"""
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    return [f.strip() for f in raw.split(',') if f.strip()]
+
 
 @pedidos_bp.route('/pedidos', methods=['GET'])
 @require_auth
 def obtener_pedidos(user):
     try:
-        return jsonify(PedidosRepository.get_all()), 200
+        return jsonify(PedidosRepository.get_all(fields=_fields())), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -19,10 +38,12 @@ def obtener_pedidos(user):
 @require_auth
 def obtener_pedido(user, pedido_id):
     try:
-        pedido = PedidosRepository.get_by_id(pedido_id)
+        pedido = PedidosRepository.get_by_id(pedido_id, fields=_fields())
         if pedido is None:
             return jsonify({'error': 'Pedido no encontrado'}), 404
         return jsonify(pedido), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -77,7 +98,37 @@ def eliminar_pedido(user, pedido_id):
 @require_auth
 def obtener_pendientes(user):
     try:
-        return jsonify(PedidosRepository.get_pendientes()), 200
+        categoria = request.args.get('categoria')
+        if categoria and categoria not in CATEGORIAS_PENDIENTE:
+            return jsonify({'error': f'Categoría inválida: {categoria}'}), 400
+        limit = min(max(int(request.args.get('limit', 100)), 1), MAX_LIMIT_PENDIENTES)
+        return jsonify(PedidosRepository.get_pendientes(
+            categoria=categoria,
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@pedidos_bp.route('/pedidos/tablero', methods=['GET'])
+@require_auth
+def obtener_tablero(user):
+    """Kanban board: all columns, or one column's next page with ?estado=&cursor="""
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), MAX_LIMIT_TABLERO)
+        estado = request.args.get('estado')
+        if estado and estado not in ESTADOS_PRODUCCION:
+            return jsonify({'error': f'Estado inválido: {estado}'}), 400
+        if estado:
+            return jsonify(PedidosRepository.get_tablero_columna(
+                estado, cursor=request.args.get('cursor'), limit=limit
+            )), 200
+        return jsonify(PedidosRepository.get_tablero(limit=limit)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -89,6 +140,8 @@ def buscar_pedidos(user):
         termino = request.args.get('q', '')
         if not termino:
             return jsonify({'error': 'Parametro "q" requerido'}), 400
-        return jsonify(PedidosRepository.buscar(termino)), 200
+        return jsonify(PedidosRepository.buscar(termino, fields=_fields())), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,145 @@
+"""
+Assets - fingerprinted, minified and precompressed frontend files
+
+`flask build-assets` copies every JS/CSS file served under /js, /css,
+/formulario/js and /formulario/css to ASSETS_DIST_DIR as
+<name>.<sha256[:12]>.<ext> (minified, plus .gz and .br siblings) and writes
+manifest.json {"/js/api.js": "/assets/js/api.3f2a9c01d4e7.js", ...}.
+
+At runtime the HTML pages are served with their asset URLs rewritten from
+the manifest, and /assets/* is served with immutable long-lived caching.
+Without a manifest (dev checkout) pages and assets are served as-is.
+"""
+import os
+import re
+import json
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # pragma: no cover - optional dependency
+    rjsmin = None
+
+FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'frontend'))
+
+# URL prefix -> source directory (same mapping as the routes in pages.py)
+ORIGENES = {
+    '/js/': os.path.join('backoffice', 'js'),
+    '/css/': os.path.join('backoffice', 'css'),
+    '/formulario/js/': os.path.join('formulario', 'js'),
+    '/formulario/css/': os.path.join('formulario', 'css'),
+}
+EXTENSIONES = ('.js', '.css')
+
+_URL_ASSET = re.compile(r'''((?:src|href)=["'])(/(?:formulario/)?(?:js|css)/[^"'?#]+)(["'])''')
+_CSS_COMENTARIOS = re.compile(r'/\*.*?\*/', re.S)
+_CSS_ESPACIOS = re.compile(r'\s+')
+_CSS_SIMBOLOS = re.compile(r'\s*([{}:;,>])\s*')
+
+
+def minificar_css(texto):
+    texto = _CSS_COMENTARIOS.sub('', texto)
+    texto = _CSS_ESPACIOS.sub(' ', texto)
+    texto = _CSS_SIMBOLOS.sub(r'\1', texto)
+    return texto.replace(';}', '}').strip()
+
+
+def minificar(nombre, data):
+    """Minified bytes; JS only when rjsmin is installed (left untouched otherwise)"""
+    if nombre.endswith('.css'):
+        return minificar_css(data.decode('utf-8')).encode('utf-8')
+    if nombre.endswith('.js') and rjsmin is not None:
+        return rjsmin.jsmin(data.decode('utf-8')).encode('utf-8')
+    return data
+
+
+def construir(dist_dir, frontend_dir=FRONTEND_DIR):
+    """Build dist_dir + manifest.json. Returns a report {url: {bytes, min, gz, br}}."""
+    manifest = {}
+    reporte = {}
+    for prefijo, origen in ORIGENES.items():
+        src_dir = os.path.join(frontend_dir, origen)
+        if not os.path.isdir(src_dir):
+            continue
+        for nombre in sorted(os.listdir(src_dir)):
+            if not nombre.endswith(EXTENSIONES):
+                continue
+            with open(os.path.join(src_dir, nombre), 'rb') as f:
+                original = f.read()
+            data = minificar(nombre, original)
+            base, ext = os.path.splitext(nombre)
+            final = f"{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            destino_rel = prefijo.strip('/') + '/' + final
+            destino = os.path.join(dist_dir, *destino_rel.split('/'))
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+            variantes = {'': data, '.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variantes['.br'] = brotli.compress(data, quality=11)
+            for sufijo, contenido in variantes.items():
+                with open(destino + sufijo, 'wb') as f:
+                    f.write(contenido)
+
+            url = prefijo + nombre
+            manifest[url] = '/assets/' + destino_rel
+            reporte[url] = {'bytes': len(original), 'min': len(data),
+                            'gz': len(variantes['.gz']), 'br': len(variantes.get('.br', b''))}
+
+    tmp = os.path.join(dist_dir, 'manifest.json.tmp')
+    os.makedirs(dist_dir, exist_ok=True)
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(dist_dir, 'manifest.json'))
+    return reporte
+
+
+class Assets:
+    dist_dir = None
+    _manifest = None
+    _manifest_mtime = None
+    _html = {}
+
+    @classmethod
+    def configure(cls, config):
+        cls.dist_dir = config.get('ASSETS_DIST_DIR') or os.path.join(FRONTEND_DIR, 'dist')
+        cls._manifest = None
+        cls._manifest_mtime = None
+        cls._html = {}
+
+    @classmethod
+    def manifest(cls):
+        """Current manifest ({} when not built); reloaded when the file changes"""
+        path = os.path.join(cls.dist_dir, 'manifest.json')
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            cls._manifest, cls._manifest_mtime = {}, None
+            return cls._manifest
+        if mtime != cls._manifest_mtime:
+            with open(path) as f:
+                cls._manifest = json.load(f)
+            cls._manifest_mtime = mtime
+            cls._html = {}
+        return cls._manifest
+
+    @classmethod
+    def pagina(cls, path):
+        """HTML page bytes with asset URLs pointing at the fingerprinted files"""
+        manifest = cls.manifest()
+        mtime = os.path.getmtime(path)
+        cached = cls._html.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        if manifest:
+            html = _URL_ASSET.sub(lambda m: m.group(1) + manifest.get(m.group(2), m.group(2)) + m.group(3), html)
+        data = html.encode('utf-8')
+        cls._html[path] = (mtime, data)
+        return data
@@ -0,0 +1,95 @@
+"""
+Lotes - runs the GET sub-requests of POST /api/batch
+
+Each sub-request is dispatched through the normal Flask stack (routes,
+decorators, after_request hooks) in its own request context on a shared,
+bounded thread pool. The pool size is also the batch connection budget:
+a sub-request holds at most one pooled DB connection at a time, so all
+concurrent batches together never take more than BATCH_WORKERS of the
+DatabaseManager pool (maxconn=20).
+
+The caller's JWT is verified once by the batch route; sub-requests receive
+the resolved user through the WSGI environ (see SupabaseHelper.get_current_user),
+which clients cannot set through headers. The trace context travels the
+same way, so a sampled batch traces all of its sub-requests.
+"""
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from werkzeug.test import EnvironBuilder
+
+from app import tracing
+
+ENVIRON_USUARIO = 'shogun.usuario'
+
+
+class EjecutorLotes:
+    _lock = threading.Lock()
+    _executor = None
+
+    workers = 4
+    max_items = 20
+    timeout = 30
+
+    @classmethod
+    def configure(cls, config):
+        cls.workers = int(config.get('BATCH_WORKERS', cls.workers))
+        cls.max_items = int(config.get('BATCH_MAX_ITEMS', cls.max_items))
+        cls.timeout = float(config.get('BATCH_TIMEOUT', cls.timeout))
+
+    @classmethod
+    def _pool(cls):
+        """Lazy start, so gunicorn workers (not the master) own the threads"""
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.workers, thread_name_prefix='batch')
+            return cls._executor
+
+    @staticmethod
+    def _despachar(app, environ):
+        """Runs in the pool: one full Flask dispatch -> (status, body, ms)"""
+        t = time.perf_counter()
+        with app.request_context(environ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception:
+                traceback.print_exc()
+                return 500, {'error': 'Error interno del servidor'}, round((time.perf_counter() - t) * 1000, 1)
+            if response.is_json:
+                body = response.get_json(silent=True)
+            else:
+                body = response.get_data(as_text=True)
+            status = response.status_code
+            response.close()
+        return status, body, round((time.perf_counter() - t) * 1000, 1)
+
+    @classmethod
+    def ejecutar(cls, app, user, items, base_url, headers):
+        """
+        items: [{'id', 'path'}] already validated (path includes the query string).
+        headers: request headers forwarded to every sub-request.
+        Returns [{'id', 'status', 'body', 'ms'}] in input order.
+        """
+        pool = cls._pool()
+        padre = tracing.contexto_padre()
+        futures = []
+        for item in items:
+            environ = EnvironBuilder(path=item['path'], method='GET', base_url=base_url,
+                                     headers=headers).get_environ()
+            environ[ENVIRON_USUARIO] = user
+            if padre is not None:
+                environ[tracing.ENVIRON_PADRE] = padre
+            futures.append(pool.submit(cls._despachar, app, environ))
+
+        limite = time.monotonic() + cls.timeout
+        resultados = []
+        for item, future in zip(items, futures):
+            try:
+                status, body, ms = future.result(timeout=max(0, limite - time.monotonic()))
+            except FuturesTimeout:
+                future.cancel()
+                status, body, ms = 504, {'error': 'Tiempo de espera agotado'}, None
+            resultados.append({'id': item['id'], 'status': status, 'body': body, 'ms': ms})
+        return resultados
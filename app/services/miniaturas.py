@@ -0,0 +1,124 @@
+"""
+Miniaturas - background WebP thumbnail/preview pipeline for image adjuntos
+
+subir_adjunto enqueues new image blobs; dispatcher threads read the
+original from the storage backend, decode/resize in a process pool (so
+decoding never holds the request workers' GIL) and store the derivatives
+next to the original as <blob>.thumb.webp / <blob>.preview.webp.
+
+Pillow is optional: without it the pipeline stays disabled.
+"""
+import io
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+TIPOS_IMAGEN = ('image/jpeg', 'image/png', 'image/webp', 'image/gif', 'image/bmp', 'image/tiff')
+
+
+def generar_derivados(data, tamanos, calidad=80):
+    """
+    Runs in the process pool. data: original bytes; tamanos: {nombre: max_px}.
+    Returns {nombre: webp bytes}.
+    """
+    img = Image.open(io.BytesIO(data))
+    # JPEG can decode at a reduced scale directly
+    img.draft('RGB', (max(tamanos.values()),) * 2)
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+    out = {}
+    for nombre, max_px in sorted(tamanos.items(), key=lambda kv: -kv[1]):
+        copia = img.copy()
+        copia.thumbnail((max_px, max_px), Image.LANCZOS)
+        buf = io.BytesIO()
+        copia.save(buf, 'WEBP', quality=calidad, method=4)
+        out[nombre] = buf.getvalue()
+    return out
+
+
+class MiniaturasWorker:
+    _lock = threading.Lock()
+    _queue = None
+    _pool = None
+    _threads = []
+
+    enabled = Image is not None
+    workers = 2
+    queue_size = 64
+    tamanos = {'thumb': 256, 'preview': 1280}
+
+    @classmethod
+    def configure(cls, config):
+        cls.enabled = Image is not None and config.get('MINIATURAS_ENABLED', True)
+        cls.workers = int(config.get('MINIATURAS_WORKERS', cls.workers))
+        cls.queue_size = int(config.get('MINIATURAS_QUEUE', cls.queue_size))
+        if Image is None:
+            print("[MINIATURAS] Pillow no instalado - miniaturas deshabilitadas")
+
+    @classmethod
+    def _start(cls):
+        """Lazy start, so gunicorn workers (not the master) own the threads/pool"""
+        with cls._lock:
+            if cls._queue is not None:
+                return
+            cls._queue = queue.Queue(maxsize=cls.queue_size)
+            cls._pool = ProcessPoolExecutor(max_workers=cls.workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+            cls._threads = []
+            for i in range(cls.workers):
+                t = threading.Thread(target=cls._run, name=f'miniaturas-{i}', daemon=True)
+                t.start()
+                cls._threads.append(t)
+
+    @classmethod
+    def encolar(cls, sha256, storage_path, tipo_mime):
+        """Queue derivative generation. Returns False if skipped or the queue is full."""
+        if not cls.enabled or (tipo_mime or '').lower() not in TIPOS_IMAGEN:
+            return False
+        cls._start()
+        try:
+            cls._queue.put_nowait((sha256, storage_path))
+            return True
+        except queue.Full:
+            print(f"[MINIATURAS] Cola llena, se omite {sha256[:12]}")
+            return False
+
+    @classmethod
+    def _run(cls):
+        while True:
+            sha256, storage_path = cls._queue.get()
+            try:
+                cls._procesar(sha256, storage_path)
+            except Exception as e:
+                print(f"[MINIATURAS] Error en {sha256[:12]}: {e}")
+                try:
+                    from app.models.database import AdjuntosRepository
+                    AdjuntosRepository.set_derivados(sha256, estado='error')
+                except Exception:
+                    pass
+            finally:
+                cls._queue.task_done()
+
+    @classmethod
+    def _procesar(cls, sha256, storage_path):
+        from app.auth.storage_backend import get_storage
+        from app.models.database import AdjuntosRepository
+
+        storage = get_storage()
+        data = b''.join(storage.open_stream(storage_path))
+        derivados = cls._pool.submit(generar_derivados, data, cls.tamanos).result()
+
+        paths = {}
+        for nombre, contenido in derivados.items():
+            subido = storage.upload_stream(None, [contenido], f'{nombre}.webp', 'image/webp',
+                                           max_bytes=None, storage_path=f"{storage_path}.{nombre}.webp")
+            paths[nombre] = subido['storage_path']
+        AdjuntosRepository.set_derivados(sha256, thumb_path=paths.get('thumb'),
+                                         preview_path=paths.get('preview'), estado='listo')
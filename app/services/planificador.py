@@ -0,0 +1,183 @@
+"""
+Planificador de Producción - capacity-aware fecha_compromiso
+
+Keeps, per process, the committed work of every day in the planning
+horizon (units and embroidery stitches of open pedidos) in a segment tree
+of remaining capacity. Reserving/releasing an order is an O(log n) point
+update. Finding the earliest day that fits a new order descends the tree,
+pruning subtrees whose best day is too small; units and stitches are
+tracked as separate maxima, so a subtree can pass both checks on different
+days and the worst case visits every node (O(n), n = horizon, 180 by default).
+
+An order never counts for more than a whole day of capacity (see _tope), in
+the DB load as well as in reservations, so big embroidery jobs get an empty
+day instead of never fitting.
+
+The index is rebuilt from the DB (PedidosRepository.get_carga_comprometida)
+when the day changes or after PLANIFICADOR_TTL_SEGUNDOS, so gunicorn
+workers converge on writes made by other workers.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class Planificador:
+    _lock = threading.Lock()
+
+    capacidad_unidades = 40
+    capacidad_puntadas = 400000
+    dias_laborables = frozenset(range(6))  # Mon-Sat
+    horizonte = 180
+    ttl = 300
+
+    _inicio = None       # date of leaf 0
+    _cargado_en = 0.0
+    _generacion = 0      # bumped on every cargar(); reservations from older trees are void
+    _size = 0
+    _max_u = []
+    _max_p = []
+
+    @classmethod
+    def configure(cls, config):
+        cls.capacidad_unidades = int(config.get('CAPACIDAD_UNIDADES_DIA', cls.capacidad_unidades))
+        cls.capacidad_puntadas = int(config.get('CAPACIDAD_PUNTADAS_DIA', cls.capacidad_puntadas))
+        dias = config.get('DIAS_LABORABLES')
+        if dias:
+            cls.dias_laborables = frozenset(int(d) for d in str(dias).split(',') if d.strip())
+        cls.horizonte = int(config.get('PLANIFICADOR_HORIZONTE_DIAS', cls.horizonte))
+        cls.ttl = int(config.get('PLANIFICADOR_TTL_SEGUNDOS', cls.ttl))
+        cls._cargado_en = 0.0
+
+    @classmethod
+    def necesita_recarga(cls):
+        hoy = datetime.now().date()
+        return cls._inicio != hoy or time.monotonic() - cls._cargado_en > cls.ttl
+
+    @classmethod
+    def _tope(cls, puntadas, unidades):
+        """What an order counts against a day: at most a whole day's capacity"""
+        return (min(int(puntadas or 0), cls.capacidad_puntadas),
+                min(int(unidades or 0), cls.capacidad_unidades))
+
+    # --- segment tree ---
+
+    @classmethod
+    def _capacidad(cls, dia):
+        if dia.weekday() not in cls.dias_laborables:
+            return 0, 0
+        return cls.capacidad_unidades, cls.capacidad_puntadas
+
+    @classmethod
+    def cargar(cls, filas):
+        """
+        Rebuild the index. filas: iterable of (fecha_compromiso, unidades, puntadas)
+        for open pedidos.
+        """
+        hoy = datetime.now().date()
+        size = 1
+        while size < cls.horizonte:
+            size *= 2
+        max_u = [-1] * (2 * size)
+        max_p = [-1] * (2 * size)
+        for i in range(cls.horizonte):
+            max_u[size + i], max_p[size + i] = cls._capacidad(hoy + timedelta(days=i))
+        for fecha, unidades, puntadas in filas:
+            i = (fecha - hoy).days
+            if 0 <= i < cls.horizonte:
+                max_u[size + i] -= int(unidades or 0)
+                max_p[size + i] -= int(puntadas or 0)
+        for node in range(size - 1, 0, -1):
+            max_u[node] = max(max_u[2 * node], max_u[2 * node + 1])
+            max_p[node] = max(max_p[2 * node], max_p[2 * node + 1])
+        with cls._lock:
+            cls._inicio, cls._size, cls._max_u, cls._max_p = hoy, size, max_u, max_p
+            cls._cargado_en = time.monotonic()
+            cls._generacion += 1
+
+    @classmethod
+    def _aplicar(cls, fecha, unidades, puntadas):
+        if cls._inicio is None:
+            return
+        i = (fecha - cls._inicio).days
+        if not 0 <= i < cls.horizonte:
+            return
+        node = cls._size + i
+        cls._max_u[node] -= unidades
+        cls._max_p[node] -= puntadas
+        node //= 2
+        while node:
+            cls._max_u[node] = max(cls._max_u[2 * node], cls._max_u[2 * node + 1])
+            cls._max_p[node] = max(cls._max_p[2 * node], cls._max_p[2 * node + 1])
+            node //= 2
+
+    @classmethod
+    def _buscar(cls, node, nl, nr, desde, unidades, puntadas):
+        if nr < desde or cls._max_u[node] < unidades or cls._max_p[node] < puntadas:
+            return -1
+        if nl == nr:
+            return nl
+        mid = (nl + nr) // 2
+        found = cls._buscar(2 * node, nl, mid, desde, unidades, puntadas)
+        if found == -1:
+            found = cls._buscar(2 * node + 1, mid + 1, nr, desde, unidades, puntadas)
+        return found
+
+    # --- public API ---
+
+    @classmethod
+    def asignar_fecha(cls, dias_minimos, puntadas=0, unidades=1):
+        """
+        Earliest working day >= today + dias_minimos with room for the order,
+        reserved atomically. Returns (fecha, reserva); pass reserva to anular()
+        to give it back. Falls back to (today + dias_minimos, None), the
+        previous behavior, when the index is stale or nothing fits in the
+        horizon; nothing is reserved then.
+        """
+        hoy = datetime.now().date()
+        minima = hoy + timedelta(days=dias_minimos)
+        puntadas, unidades = cls._tope(puntadas, unidades)
+        with cls._lock:
+            if cls._inicio != hoy:
+                return minima, None
+            i = cls._buscar(1, 0, cls._size - 1, (minima - hoy).days, unidades, puntadas)
+            if i == -1 or i >= cls.horizonte:
+                print(f"[PLANIFICADOR] Sin capacidad en {cls.horizonte} días, usando {minima}")
+                return minima, None
+            fecha = hoy + timedelta(days=i)
+            cls._aplicar(fecha, unidades, puntadas)
+            return fecha, (cls._generacion, fecha, unidades, puntadas)
+
+    @classmethod
+    def anular(cls, reserva):
+        """Undo an asignar_fecha() reservation, unless the index was rebuilt since"""
+        if reserva is None:
+            return
+        generacion, fecha, unidades, puntadas = reserva
+        with cls._lock:
+            if generacion == cls._generacion:
+                cls._aplicar(fecha, -unidades, -puntadas)
+
+    @classmethod
+    def reservar(cls, fecha, puntadas=0, unidades=1):
+        puntadas, unidades = cls._tope(puntadas, unidades)
+        with cls._lock:
+            cls._aplicar(fecha, unidades, puntadas)
+
+    @classmethod
+    def liberar(cls, fecha, puntadas=0, unidades=1):
+        puntadas, unidades = cls._tope(puntadas, unidades)
+        with cls._lock:
+            cls._aplicar(fecha, -unidades, -puntadas)
+
+    @classmethod
+    def carga(cls, dias=14):
+        """Remaining capacity for the next `dias` days (diagnostics)"""
+        with cls._lock:
+            if cls._inicio is None:
+                return []
+            return [{
+                'fecha': (cls._inicio + timedelta(days=i)).isoformat(),
+                'unidades_libres': cls._max_u[cls._size + i],
+                'puntadas_libres': cls._max_p[cls._size + i],
+            } for i in range(min(dias, cls.horizonte))]
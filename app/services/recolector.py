@@ -0,0 +1,146 @@
+"""
+Recolector - garbage collection of orphaned attachments (flask gc-adjuntos)
+
+Three passes, each bounded so a run stays short:
+  1. filas: pedido_adjuntos rows whose pedido was deleted
+  2. blobs: adjunto_blobs nobody references anymore (after a grace period)
+  3. storage: objects in the bucket no row/blob points to (e.g. a failed
+     delete_file in eliminar_adjunto). The bucket is walked one shard
+     (blobs/00 .. blobs/ff, then the legacy pedidos/ folder) at a time and
+     the position is saved in a checkpoint file, so big buckets are covered
+     over several runs.
+Deletes go to the backend in batches (one `prefixes` call per lote) with a
+rate limit between calls. dry_run only reports.
+"""
+import os
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+SHARDS = [f"blobs/{i:02x}" for i in range(256)] + ['pedidos']
+
+
+def _fecha(iso):
+    return datetime.fromisoformat(iso.replace('Z', '+00:00'))
+
+
+class RecolectorAdjuntos:
+
+    def __init__(self, storage, dry_run=False, lote=500, tasa=2.0, min_edad_horas=24, checkpoint=None):
+        self.storage = storage
+        self.dry_run = dry_run
+        self.lote = lote
+        self.tasa = tasa  # delete calls per second (0 = unlimited)
+        self.min_edad_horas = min_edad_horas
+        self.checkpoint = checkpoint
+        self._ultima_llamada = 0.0
+        self.reporte = {
+            'dry_run': dry_run,
+            'filas_huerfanas': 0,
+            'blobs_huerfanos': 0,
+            'bytes_liberados': 0,
+            'objetos_revisados': 0,
+            'objetos_huerfanos': 0,
+            'objetos_borrados': 0,
+            'shards': [],
+            'errores': [],
+        }
+
+    # ---------- checkpoint ----------
+
+    def _leer_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as f:
+            return json.load(f).get('shard', 0)
+
+    def _guardar_checkpoint(self, shard):
+        if not self.checkpoint or self.dry_run:
+            return
+        os.makedirs(os.path.dirname(self.checkpoint) or '.', exist_ok=True)
+        tmp = self.checkpoint + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'shard': shard, 'actualizado': datetime.now(timezone.utc).isoformat()}, f)
+        os.replace(tmp, self.checkpoint)
+
+    def reiniciar(self):
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            os.unlink(self.checkpoint)
+
+    # ---------- deletes ----------
+
+    def _esperar_turno(self):
+        if self.tasa <= 0:
+            return
+        espera = self._ultima_llamada + 1.0 / self.tasa - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        self._ultima_llamada = time.monotonic()
+
+    def _borrar(self, rutas):
+        """Delete storage objects in rate-limited batches"""
+        if not rutas or self.dry_run:
+            return
+        for i in range(0, len(rutas), self.lote):
+            lote = rutas[i:i + self.lote]
+            self._esperar_turno()
+            try:
+                self.reporte['objetos_borrados'] += self.storage.delete_files(lote)
+            except Exception as e:
+                # The objects stay orphaned; the storage pass finds them again
+                self.reporte['errores'].append(f"delete ({len(lote)} objetos): {e}")
+
+    # ---------- passes ----------
+
+    def purgar_filas(self, max_lotes=100):
+        from app.models.database import AdjuntosRepository
+        for _ in range(max_lotes):
+            res = AdjuntosRepository.purgar_filas_huerfanas(limit=self.lote, dry_run=self.dry_run)
+            self.reporte['filas_huerfanas'] += res['filas']
+            self._borrar(res['rutas'])
+            if res['filas'] < self.lote or self.dry_run:
+                return
+
+    def purgar_blobs(self, max_lotes=100):
+        from app.models.database import AdjuntosRepository
+        for _ in range(max_lotes):
+            res = AdjuntosRepository.purgar_blobs_huerfanos(limit=self.lote, min_edad_horas=self.min_edad_horas,
+                                                            dry_run=self.dry_run)
+            self.reporte['blobs_huerfanos'] += res['blobs']
+            self.reporte['bytes_liberados'] += res['bytes']
+            self._borrar(res['rutas'])
+            if res['blobs'] < self.lote or self.dry_run:
+                return
+
+    def purgar_storage(self, max_shards=16):
+        """Walk up to max_shards shards from the checkpoint; wraps around after the last"""
+        from app.models.database import AdjuntosRepository
+        limite = datetime.now(timezone.utc) - timedelta(hours=self.min_edad_horas)
+        inicio = self._leer_checkpoint() % len(SHARDS)
+        for n in range(min(max_shards, len(SHARDS))):
+            idx = (inicio + n) % len(SHARDS)
+            shard = SHARDS[idx]
+            try:
+                # List the whole shard before deleting, so paging is not shifted
+                objetos = list(self.storage.list_objects(shard))
+                self.reporte['objetos_revisados'] += len(objetos)
+                # Skip objects younger than the grace period (upload in flight)
+                candidatos = [o['storage_path'] for o in objetos
+                              if not o.get('created_at') or _fecha(o['created_at']) <= limite]
+                for i in range(0, len(candidatos), self.lote):
+                    huerfanos = AdjuntosRepository.rutas_no_referenciadas(candidatos[i:i + self.lote])
+                    self.reporte['objetos_huerfanos'] += len(huerfanos)
+                    self._borrar(huerfanos)
+            except Exception as e:
+                self.reporte['errores'].append(f"{shard}: {e}")
+                return
+            self.reporte['shards'].append(shard)
+            self._guardar_checkpoint((idx + 1) % len(SHARDS))
+
+    def ejecutar(self, max_shards=16):
+        inicio = time.monotonic()
+        self.purgar_filas()
+        self.purgar_blobs()
+        self.purgar_storage(max_shards=max_shards)
+        self.reporte['segundos'] = round(time.monotonic() - inicio, 2)
+        return self.reporte
@@ -0,0 +1,193 @@
+"""
+Subidas - asynchronous attachment upload queue
+
+subir_adjunto spools the file to SUBIDAS_SPOOL_DIR/<sha256>, records the
+blob as 'pending' and returns. A fixed number of worker threads (the
+concurrency limit towards the storage backend) push each spool file to
+storage with retry/backoff and move the blob to 'stored' or 'failed'.
+Pending blobs whose spool file is still on this host are re-queued when
+the queue starts, so a restart does not lose uploads. Those without one
+that have been pending longer than SUBIDAS_PENDIENTE_TIMEOUT (spool lost, or the host that
+had it is gone) are marked 'failed' there and by `flask gc-adjuntos`, so
+their downloads stop answering 409 forever.
+
+The spool directory is shared by every gunicorn worker on the host, and
+each one re-queues what it finds there when its queue starts. A worker
+only uploads a spool file it holds an exclusive flock on, and removes it
+before letting go, so two workers never push the same file.
+"""
+import os
+import time
+import queue
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+
+class ColaSubidas:
+    _lock = threading.Lock()
+    _queue = None
+    _threads = []
+    _en_curso = set()
+
+    enabled = True
+    spool_dir = None
+    workers = 2
+    max_intentos = 5
+    backoff = 2.0
+    pendiente_timeout = 3600
+
+    @classmethod
+    def configure(cls, config):
+        cls.enabled = config.get('SUBIDAS_ASYNC', True)
+        cls.spool_dir = config.get('SUBIDAS_SPOOL_DIR')
+        cls.workers = int(config.get('SUBIDAS_WORKERS', cls.workers))
+        cls.max_intentos = int(config.get('SUBIDAS_MAX_INTENTOS', cls.max_intentos))
+        cls.backoff = float(config.get('SUBIDAS_BACKOFF', cls.backoff))
+        cls.pendiente_timeout = int(config.get('SUBIDAS_PENDIENTE_TIMEOUT', cls.pendiente_timeout))
+        if cls.enabled and cls.spool_dir:
+            os.makedirs(cls.spool_dir, exist_ok=True)
+
+    @classmethod
+    def spool_path(cls, sha256):
+        return os.path.join(cls.spool_dir, sha256)
+
+    @classmethod
+    def iniciar(cls):
+        """Lazy start, so gunicorn workers (not the master) own the threads"""
+        with cls._lock:
+            if cls._queue is not None:
+                return
+            cls._queue = queue.Queue()
+            cls._threads = []
+            for i in range(cls.workers):
+                t = threading.Thread(target=cls._run, name=f'subidas-{i}', daemon=True)
+                t.start()
+                cls._threads.append(t)
+        threading.Thread(target=cls._recuperar, name='subidas-recuperar', daemon=True).start()
+
+    @classmethod
+    def encolar(cls, sha256, storage_path, tipo_mime, archivo=None):
+        """
+        Queue the upload of a pending blob. archivo: spool file to take over
+        (renamed to spool_path(sha256)); None when it is already there.
+        """
+        if archivo is not None:
+            os.replace(archivo, cls.spool_path(sha256))
+        cls.iniciar()
+        with cls._lock:
+            if sha256 in cls._en_curso:
+                return False
+            cls._en_curso.add(sha256)
+        cls._queue.put((sha256, storage_path, tipo_mime))
+        return True
+
+    @classmethod
+    def _recuperar(cls):
+        try:
+            reanudados, abandonados = cls.revisar_pendientes(reanudar=True)
+        except Exception as e:
+            print(f"[SUBIDAS] No se pudieron leer pendientes: {e}")
+            return
+        if reanudados:
+            print(f"[SUBIDAS] {reanudados} subidas pendientes reanudadas")
+        if abandonados:
+            print(f"[SUBIDAS] {abandonados} subidas sin archivo en spool marcadas como fallidas")
+
+    @classmethod
+    def revisar_pendientes(cls, reanudar=False):
+        """
+        Walk the pending blobs: re-queue those with a spool file here
+        (reanudar=True) and mark as failed those without one that have been
+        pending (since creation or their last retry) longer than
+        pendiente_timeout. Returns (reanudados, abandonados).
+        """
+        from app.models.database import AdjuntosRepository
+        reanudados = abandonados = 0
+        for blob in AdjuntosRepository.get_blobs_pendientes():
+            if os.path.exists(cls.spool_path(blob['sha256'])):
+                if reanudar:
+                    reanudados += cls.encolar(blob['sha256'], blob['storage_path'], blob['tipo_mime'])
+                continue
+            with cls._lock:
+                en_curso = blob['sha256'] in cls._en_curso
+            if not en_curso and float(blob['edad_segundos']) > cls.pendiente_timeout:
+                error = f"Sin archivo en spool tras {cls.pendiente_timeout}s"
+                abandonados += AdjuntosRepository.marcar_fallo(blob['sha256'], error, final=True)
+        return reanudados, abandonados
+
+    @classmethod
+    def _run(cls):
+        while True:
+            sha256, storage_path, tipo_mime = cls._queue.get()
+            try:
+                cls._subir(sha256, storage_path, tipo_mime)
+            except Exception as e:
+                print(f"[SUBIDAS] Error inesperado en {sha256[:12]}: {e}")
+            finally:
+                with cls._lock:
+                    cls._en_curso.discard(sha256)
+                cls._queue.task_done()
+
+    @staticmethod
+    def _reclamar(f, path):
+        """Exclusive claim on an open spool file; False if another process has it or is done with it"""
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        # The previous owner unlinks before unlocking: our handle may be a removed file
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _descartar_spool(f, path):
+        """Remove the claimed spool file, unless a newer upload already replaced it"""
+        try:
+            if os.fstat(f.fileno()).st_ino == os.stat(path).st_ino:
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def _subir(cls, sha256, storage_path, tipo_mime):
+        from app.auth.storage_backend import get_storage, iter_file
+        from app.models.database import AdjuntosRepository
+        from app.services.miniaturas import MiniaturasWorker
+
+        path = cls.spool_path(sha256)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return  # already uploaded by another worker on this host
+        with f:
+            if not cls._reclamar(f, path):
+                return
+            storage = get_storage()
+            for intento in range(1, cls.max_intentos + 1):
+                try:
+                    f.seek(0)
+                    storage.upload_stream(None, iter_file(f), sha256, tipo_mime or 'application/octet-stream',
+                                          max_bytes=None, storage_path=storage_path)
+                    break
+                except Exception as e:
+                    final = intento == cls.max_intentos
+                    print(f"[SUBIDAS] Intento {intento}/{cls.max_intentos} falló para {sha256[:12]}: {e}")
+                    AdjuntosRepository.marcar_fallo(sha256, e, final=final)
+                    if final:
+                        cls._descartar_spool(f, path)
+                        return
+                    time.sleep(cls.backoff * (2 ** (intento - 1)))
+            cls._descartar_spool(f, path)
+
+        if AdjuntosRepository.marcar_subido(sha256):
+            MiniaturasWorker.encolar(sha256, storage_path, tipo_mime)
+        else:
+            # Every adjunto using it was deleted while we were uploading
+            storage.delete_file(storage_path)
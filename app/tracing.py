@@ -0,0 +1,283 @@
+"""
+Tracing - per-request phase timings (Server-Timing) and sampled span trees
+
+Every request is split into phases:
+    auth       get_current_user (JWT verification + role lookup)
+    db         SQL statements and connection checkout
+    format     Python time inside repository methods outside SQL (row shaping)
+    serialize  JSON encoding (FastJSONProvider.response)
+    storage    Supabase Storage API calls
+and answered with e.g.
+    Server-Timing: auth;dur=2.1, db;dur=9.8;desc="4 consultas", format;dur=0.6, total;dur=14.2
+Phases may overlap (auth includes the role lookup query, which is also db).
+
+A TRACE_SAMPLE_RATE fraction of requests also records the span tree (request
+-> auth/repository/serialize/storage -> SQL statements) and appends it to
+TRACE_FILE as one OTLP/JSON ExportTraceServiceRequest per line, the format
+of the OpenTelemetry collector's file exporter and otlpjsonfile receiver.
+Incoming W3C traceparent ids are kept for correlation; the sampling
+decision is only inherited from /api/batch parents, so clients cannot force
+traces to be written.
+"""
+import os
+import re
+import json
+import time
+import random
+import functools
+import threading
+
+from flask import g, request, has_request_context
+
+ENVIRON_PADRE = 'shogun.traza'
+FASES = ('auth', 'db', 'format', 'serialize', 'storage')
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+SPAN_INTERNAL, SPAN_SERVER, SPAN_CLIENT = 1, 2, 3
+
+
+def _id(bits):
+    return f'{random.getrandbits(bits):0{bits // 4}x}'
+
+
+def _atributo(clave, valor):
+    if isinstance(valor, bool):
+        v = {'boolValue': valor}
+    elif isinstance(valor, int):
+        v = {'intValue': str(valor)}
+    elif isinstance(valor, float):
+        v = {'doubleValue': valor}
+    else:
+        v = {'stringValue': str(valor)}
+    return {'key': clave, 'value': v}
+
+
+class _Traza:
+    """Phase totals (always) and spans (only when sampled) of one request"""
+
+    def __init__(self, trace_id, padre_id, muestreada):
+        self.trace_id = trace_id
+        self.span_id = _id(64)
+        self.padre_id = padre_id
+        self.muestreada = muestreada
+        self.inicio = time.perf_counter_ns()
+        self.inicio_unix = time.time_ns()
+        self.fases = {}
+        self.profundidad = {}
+        self.db_en_repo = 0
+        self.spans = []
+        self.pila = [self.span_id]
+
+    def unix(self, perf_ns):
+        return self.inicio_unix + (perf_ns - self.inicio)
+
+    def acumular(self, fase, ns):
+        self.fases[fase] = self.fases.get(fase, 0) + ns
+        if fase == 'db' and self.profundidad.get('repo'):
+            self.db_en_repo += ns
+
+    def abrir(self, nombre, kind, atributos, inicio):
+        span = {'traceId': self.trace_id, 'spanId': _id(64), 'parentSpanId': self.pila[-1],
+                'name': nombre, 'kind': kind, 'inicio': inicio, 'atributos': dict(atributos)}
+        self.spans.append(span)
+        self.pila.append(span['spanId'])
+        return span
+
+    def cerrar(self, span, fin, error=None):
+        span['fin'] = fin
+        if error is not None:
+            span['error'] = f'{type(error).__name__}: {error}'
+        if self.pila[-1] == span['spanId']:
+            self.pila.pop()
+
+    def duraciones_ms(self):
+        ms = {f: ns / 1e6 for f, ns in self.fases.items() if f in FASES}
+        if 'repo' in self.fases:
+            ms['format'] = max(0, self.fases['repo'] - self.db_en_repo) / 1e6
+        return ms
+
+    def server_timing(self, fin, consultas):
+        partes = []
+        ms = self.duraciones_ms()
+        for fase in FASES:
+            if fase in ms:
+                desc = f';desc="{consultas} consultas"' if fase == 'db' else ''
+                partes.append(f'{fase};dur={ms[fase]:.1f}{desc}')
+        partes.append(f'total;dur={(fin - self.inicio) / 1e6:.1f}')
+        if self.muestreada:
+            partes.append(f'traza;desc="{self.trace_id}"')
+        return ', '.join(partes)
+
+    def exportar(self, fin, raiz_nombre, raiz_atributos, servicio, consultas, error=False):
+        """OTLP/JSON ExportTraceServiceRequest with the root span and its children"""
+        def span_otlp(inicio, fin_s, atributos, kind, padre, span_id, nombre, err):
+            out = {'traceId': self.trace_id, 'spanId': span_id, 'name': nombre, 'kind': kind,
+                   'startTimeUnixNano': str(self.unix(inicio)), 'endTimeUnixNano': str(self.unix(fin_s)),
+                   'attributes': [_atributo(k, v) for k, v in atributos.items()],
+                   'status': {'code': 2, 'message': err} if err else {'code': 0}}
+            if padre:
+                out['parentSpanId'] = padre
+            return out
+
+        atributos = dict(raiz_atributos)
+        for fase, ms in self.duraciones_ms().items():
+            atributos[f'shogun.fase.{fase}.ms'] = round(ms, 3)
+        atributos['shogun.db.consultas'] = consultas
+        spans = [span_otlp(self.inicio, fin, atributos, SPAN_SERVER, self.padre_id,
+                           self.span_id, raiz_nombre, 'error' if error else None)]
+        for s in self.spans:
+            spans.append(span_otlp(s['inicio'], s.get('fin', fin), s['atributos'], s['kind'],
+                                   s['parentSpanId'], s['spanId'], s['name'], s.get('error')))
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_atributo('service.name', servicio),
+                                        _atributo('process.pid', os.getpid())]},
+            'scopeSpans': [{'scope': {'name': 'shogun.tracing'}, 'spans': spans}],
+        }]}
+
+
+def _actual():
+    return g.get('traza') if has_request_context() else None
+
+
+class fase:
+    """
+    Context manager timing one phase of the current request; a no-op outside
+    requests. Nested uses of the same phase are counted once (outermost).
+        with fase('db', 'db.query') as f:
+            ...
+            f.atributo('db.statement', sql)
+    """
+    __slots__ = ('fase', 'nombre', 'kind', 'atributos', '_traza', '_inicio', '_span')
+
+    def __init__(self, fase_, nombre=None, kind=SPAN_INTERNAL, **atributos):
+        self.fase = fase_
+        self.nombre = nombre or fase_
+        self.kind = kind
+        self.atributos = atributos
+        self._traza = None
+        self._span = None
+
+    @property
+    def muestreada(self):
+        return self._span is not None
+
+    def atributo(self, clave, valor):
+        if self._span is not None:
+            self._span['atributos'][clave] = valor
+
+    def __enter__(self):
+        t = self._traza = _actual()
+        if t is not None:
+            t.profundidad[self.fase] = t.profundidad.get(self.fase, 0) + 1
+            self._inicio = time.perf_counter_ns()
+            if t.muestreada:
+                self._span = t.abrir(self.nombre, self.kind, self.atributos, self._inicio)
+        return self
+
+    def __exit__(self, tipo, error, tb):
+        t = self._traza
+        if t is not None:
+            fin = time.perf_counter_ns()
+            t.profundidad[self.fase] -= 1
+            if not t.profundidad[self.fase]:
+                t.acumular(self.fase, fin - self._inicio)
+            if self._span is not None:
+                t.cerrar(self._span, fin, error)
+        return False
+
+
+def medido(fase_, nombre=None):
+    """Decorator form of fase"""
+    def decorador(fn):
+        @functools.wraps(fn)
+        def envuelta(*args, **kwargs):
+            with fase(fase_, nombre):
+                return fn(*args, **kwargs)
+        return envuelta
+    return decorador
+
+
+def registrar(fase_, segundos, nombre=None, kind=SPAN_CLIENT, **atributos):
+    """Record a phase that was timed elsewhere (it ended now and lasted `segundos`)"""
+    t = _actual()
+    if t is None:
+        return
+    fin = time.perf_counter_ns()
+    inicio = fin - int(segundos * 1e9)
+    t.acumular(fase_, fin - inicio)
+    if t.muestreada:
+        t.cerrar(t.abrir(nombre or fase_, kind, atributos, inicio), fin)
+
+
+def contexto_padre():
+    """(trace_id, span_id, muestreada) of the current request, for /api/batch sub-requests"""
+    t = _actual()
+    return None if t is None else (t.trace_id, t.pila[-1], t.muestreada)
+
+
+class Trazas:
+    tasa = 0.01
+    archivo = None
+    max_bytes = 50 * 1024 * 1024
+    servicio = 'shogun-sistema-ventas'
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, config):
+        cls.tasa = float(config.get('TRACE_SAMPLE_RATE', cls.tasa))
+        cls.archivo = config.get('TRACE_FILE') or None
+        cls.max_bytes = int(config.get('TRACE_FILE_MAX_BYTES', cls.max_bytes))
+        cls.servicio = config.get('TRACE_SERVICE_NAME', cls.servicio)
+
+    @classmethod
+    def escribir(cls, documento):
+        """Append one JSON line; rotates to <archivo>.1 past max_bytes"""
+        linea = json.dumps(documento, separators=(',', ':')) + '\n'
+        with cls._lock:
+            try:
+                os.makedirs(os.path.dirname(cls.archivo) or '.', exist_ok=True)
+                try:
+                    if os.path.getsize(cls.archivo) > cls.max_bytes:
+                        os.replace(cls.archivo, cls.archivo + '.1')
+                except OSError:
+                    pass
+                with open(cls.archivo, 'a') as f:
+                    f.write(linea)
+            except OSError as e:
+                print(f"[TRACING] No se pudo escribir la traza: {e}")
+
+
+def init_tracing(app):
+    Trazas.configure(app.config)
+
+    @app.before_request
+    def iniciar_traza():
+        padre = request.environ.get(ENVIRON_PADRE)
+        if padre is not None:
+            trace_id, padre_id, muestreada = padre
+        else:
+            m = _TRACEPARENT.match(request.headers.get('traceparent', ''))
+            trace_id, padre_id = (m.group(1), m.group(2)) if m else (_id(128), None)
+            muestreada = Trazas.archivo is not None and random.random() < Trazas.tasa
+        g.traza = _Traza(trace_id, padre_id, muestreada)
+
+    @app.after_request
+    def cerrar_traza(response):
+        t = g.pop('traza', None)
+        if t is None:
+            return response
+        fin = time.perf_counter_ns()
+        # Statement count kept by app/query_log.py
+        consultas = (g.get('consultas') or {}).get('n', 0)
+        response.headers['Server-Timing'] = t.server_timing(fin, consultas)
+        if t.muestreada and Trazas.archivo:
+            regla = request.url_rule.rule if request.url_rule else request.path
+            Trazas.escribir(t.exportar(fin, f'{request.method} {regla}', {
+                'http.request.method': request.method,
+                'http.route': regla,
+                'url.path': request.path,
+                'http.response.status_code': response.status_code,
+                'flask.endpoint': request.endpoint or '',
+            }, Trazas.servicio, consultas, error=response.status_code >= 500))
+        return response
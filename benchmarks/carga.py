@@ -0,0 +1,636 @@
+"""
+Load test - the real Flask app against a seeded local PostgreSQL
+
+1. PostgreSQL: a throwaway cluster under var/bench/pgdata (initdb/pg_ctl
+   from PATH, PG_BIN or pg_config), or any server given with --dsn whose
+   role may CREATE DATABASE. Only databases named shogun_bench_* are touched.
+2. Data: benchmarks/datos_sinteticos.py seeds a template database once per
+   (pedidos, seed, schema+migrations); every run starts from a fresh copy
+   of it (CREATE DATABASE ... TEMPLATE), so writes never leak between runs.
+3. Auth: a local ES256 key signs Supabase-shaped JWTs for an admin and a
+   vendedor; the app verifies them against that key instead of the remote
+   JWKS (SUPABASE_URL points to a dead local address).
+4. Load: --concurrencia threads drive create_app() through the Flask test
+   client with the backoffice's flows (dashboard batch, pedido list with
+   its sparse fieldset, detalle, search, kanban, clientes, pendientes,
+   comments, new pedido, status change), picked by weight.
+5. Report: throughput and p50/p95/p99 per endpoint, saved as JSON
+   (var/bench/<fecha>-<commit>-<pedidos>.json or --salida). With
+   --comparar a previous report, exits 1 when an endpoint's --metrica
+   grows more than --umbral (and --min-ms), its error rate grows more
+   than --umbral-errores, an endpoint of the base run is missing, or total
+   throughput drops more than --umbral.
+
+Everything runs in one process, so the numbers include Flask, auth,
+serialization, compression and SQL, but not a WSGI server or the network,
+and the threads share the GIL. Compare reports from the same machine.
+GET /api/pedidos is unpaginated: at 1M pedidos each call returns every row.
+
+Run:
+    python -m benchmarks.carga --pedidos 1k --duracion 20
+    python -m benchmarks.carga --pedidos 100k --salida base.json
+    python -m benchmarks.carga --pedidos 100k --comparar base.json --umbral 0.15
+    python -m benchmarks.carga --dsn postgresql://postgres@localhost/postgres --pedidos 1M --flujos detalle,buscar
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import shutil
+import socket
+import platform
+import argparse
+import tempfile
+import subprocess
+from urllib.parse import urlencode
+from collections import Counter, defaultdict
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import psycopg2.extensions
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.datos_sinteticos import (  # noqa: E402
+    RAIZ, USUARIOS, NOMBRES, APELLIDOS, COMENTARIOS, PRODUCTOS, VARIANTES, PERSONALIZACIONES,
+    parse_pedidos, huella_esquema, sembrar,
+)
+from benchmarks.storage_backends import _percentiles  # noqa: E402
+
+DIR_RESULTADOS = os.path.join(RAIZ, 'var', 'bench')
+BASE_RUN = 'shogun_bench_run'
+# Never reachable: the JWKS fetch at import fails fast and tokens can't be real ones
+SUPABASE_URL_BENCH = 'http://127.0.0.1:9'
+
+# Same sparse fieldset as frontend/backoffice/js/pedidos.js (CAMPOS_LISTA)
+CAMPOS_LISTA = 'id,cliente,telefono,direccion,producto,color,talla,precio_total,estatus_produccion,canal,comentarios_count'
+CATEGORIAS_PENDIENTE = ('bloqueado', 'retraso', 'personalizacion', 'informacion')
+ESTADOS_SIGUIENTES = {'En Producción': 'Listo para Envío', 'Listo para Envío': 'En Camino',
+                      'En Camino': 'Entregado', 'Bloqueado - Sin Dirección': 'En Producción'}
+
+
+# ------------------------------------------------------------------------------
+# PostgreSQL
+# ------------------------------------------------------------------------------
+
+class ClusterLocal:
+    """Throwaway PostgreSQL cluster in a directory, reachable by Unix socket only"""
+
+    def __init__(self, directorio, puerto):
+        self.directorio = os.path.abspath(directorio)
+        self.puerto = puerto
+        self._iniciado = False
+
+    @staticmethod
+    def _bin(nombre):
+        carpeta = os.environ.get('PG_BIN')
+        if carpeta and os.path.exists(os.path.join(carpeta, nombre)):
+            return os.path.join(carpeta, nombre)
+        encontrado = shutil.which(nombre)
+        if encontrado:
+            return encontrado
+        if shutil.which('pg_config'):
+            carpeta = subprocess.run(['pg_config', '--bindir'], capture_output=True, text=True).stdout.strip()
+            if os.path.exists(os.path.join(carpeta, nombre)):
+                return os.path.join(carpeta, nombre)
+        sys.exit(f"No se encontró {nombre}: instale PostgreSQL (13+, con contrib), defina PG_BIN o use --dsn")
+
+    @property
+    def dsn(self):
+        return psycopg2.extensions.make_dsn(host=self.directorio, port=self.puerto,
+                                            dbname='postgres', user='postgres')
+
+    def iniciar(self):
+        if not os.path.exists(os.path.join(self.directorio, 'PG_VERSION')):
+            print(f"[BENCH] initdb {self.directorio}")
+            os.makedirs(self.directorio, exist_ok=True)
+            subprocess.run([self._bin('initdb'), '-D', self.directorio, '-U', 'postgres', '-A', 'trust',
+                            '-E', 'UTF8', '--locale=C', '--no-sync'], check=True, capture_output=True)
+        pg_ctl = self._bin('pg_ctl')
+        if subprocess.run([pg_ctl, '-D', self.directorio, 'status'], capture_output=True).returncode == 0:
+            return
+        opciones = f"-p {self.puerto} -k {self.directorio} -c listen_addresses=''"
+        subprocess.run([pg_ctl, '-D', self.directorio, '-o', opciones, '-l',
+                        os.path.join(self.directorio, 'postgres.log'), '-w', 'start'], check=True, capture_output=True)
+        self._iniciado = True
+
+    def detener(self):
+        if self._iniciado:
+            subprocess.run([self._bin('pg_ctl'), '-D', self.directorio, '-m', 'fast', '-w', 'stop'],
+                           capture_output=True)
+            self._iniciado = False
+
+
+def _dsn_base(dsn, nombre):
+    return psycopg2.extensions.make_dsn(dsn, dbname=nombre)
+
+
+def _dataset(dsn):
+    """bench_dataset row of a seeded template, or None if missing/incomplete"""
+    try:
+        conn = psycopg2.connect(dsn)
+    except psycopg2.OperationalError:
+        return None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('public.bench_dataset')")
+            if cursor.fetchone()[0] is None:
+                return None
+            cursor.execute("SELECT pedidos, seed, huella, sembrado::text, conteos FROM bench_dataset")
+            row = cursor.fetchone()
+            return row and dict(zip(('pedidos', 'seed', 'huella', 'sembrado', 'conteos'), row))
+    finally:
+        conn.close()
+
+
+def preparar_base(dsn_servidor, pedidos, seed, resembrar=False):
+    """
+    Seeded template (created once) + a fresh copy for this run.
+    Returns (dsn of the run database, dataset info).
+    """
+    plantilla = f'shogun_bench_{pedidos}_s{seed}'
+    huella = huella_esquema()
+    admin = psycopg2.connect(dsn_servidor)
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (plantilla,))
+            existe = cursor.fetchone() is not None
+            dataset = _dataset(_dsn_base(dsn_servidor, plantilla)) if existe else None
+            if existe and (resembrar or dataset is None or dataset['huella'] != huella):
+                print(f"[BENCH] Esquema o migraciones cambiaron: se vuelve a sembrar {plantilla}")
+                cursor.execute(f'DROP DATABASE "{plantilla}"')
+                existe, dataset = False, None
+
+            if not existe:
+                cursor.execute(f'CREATE DATABASE "{plantilla}"')
+                conn = psycopg2.connect(_dsn_base(dsn_servidor, plantilla))
+                try:
+                    t = time.perf_counter()
+                    conteos = sembrar(conn, pedidos, seed)
+                    with conn.cursor() as c:
+                        c.execute("""
+                            CREATE TABLE bench_dataset (pedidos integer, seed integer, huella text,
+                                                        sembrado date DEFAULT CURRENT_DATE, conteos jsonb)
+                        """)
+                        c.execute("INSERT INTO bench_dataset (pedidos, seed, huella, conteos) VALUES (%s, %s, %s, %s)",
+                                  (pedidos, seed, huella, json.dumps(conteos)))
+                    print(f"[BENCH] Plantilla {plantilla} lista en {time.perf_counter() - t:.0f}s")
+                except Exception:
+                    # A half-seeded template would be mistaken for a stale one next time
+                    conn.close()
+                    cursor.execute(f'DROP DATABASE IF EXISTS "{plantilla}"')
+                    raise
+                finally:
+                    conn.close()
+                dataset = _dataset(_dsn_base(dsn_servidor, plantilla))
+
+            cursor.execute(f'DROP DATABASE IF EXISTS "{BASE_RUN}"')
+            cursor.execute(f'CREATE DATABASE "{BASE_RUN}" TEMPLATE "{plantilla}"')
+    finally:
+        admin.close()
+    return _dsn_base(dsn_servidor, BASE_RUN), dataset
+
+
+def borrar_base(dsn_servidor):
+    admin = psycopg2.connect(dsn_servidor)
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{BASE_RUN}"')
+    finally:
+        admin.close()
+
+
+# ------------------------------------------------------------------------------
+# App + JWT
+# ------------------------------------------------------------------------------
+
+def _claves():
+    """Fresh ES256 key pair -> (private PEM, public JWK with kid)"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from jose import jwk
+
+    clave = ec.generate_private_key(ec.SECP256R1())
+    privada = clave.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption())
+    publica = clave.public_key().public_bytes(serialization.Encoding.PEM,
+                                              serialization.PublicFormat.SubjectPublicKeyInfo)
+    publica_jwk = jwk.construct(publica, 'ES256').to_dict()
+    publica_jwk.update(kid='shogun-bench', use='sig')
+    return privada, publica_jwk
+
+
+def emitir_tokens(privada, issuer, horas=12):
+    """{rol: JWT} for USUARIOS, with the claims Supabase Auth puts in access tokens"""
+    from jose import jwt
+
+    ahora = int(time.time())
+    tokens = {}
+    for auth_user_id, email, _, rol in USUARIOS:
+        tokens[rol] = jwt.encode({
+            'sub': auth_user_id, 'email': email, 'role': 'authenticated', 'aud': 'authenticated',
+            'iss': issuer, 'iat': ahora, 'exp': ahora + horas * 3600,
+        }, privada, algorithm='ES256', headers={'kid': 'shogun-bench'})
+    return tokens
+
+
+def crear_app(dsn_run, storage_dir):
+    """create_app() on the run database, trusting a local signing key -> (app, tokens)"""
+    os.environ.update({
+        'DATABASE_URL': dsn_run,
+        'SUPABASE_URL': SUPABASE_URL_BENCH,
+        'STORAGE_BACKEND': 'local',
+        'LOCAL_STORAGE_DIR': storage_dir,
+        'SUBIDAS_ASYNC': 'false',
+        'MINIATURAS_ENABLED': 'false',
+    })
+    os.environ.setdefault('TRACE_FILE', '')
+
+    from app import create_app
+    from app.auth import supabase_helper
+
+    app = create_app('production')
+    privada, publica = _claves()
+    supabase_helper.jwks = {'keys': [publica]}
+    return app, emitir_tokens(privada, f'{supabase_helper.SUPABASE_URL}/auth/v1')
+
+
+# ------------------------------------------------------------------------------
+# Flows
+# ------------------------------------------------------------------------------
+
+class _Sesion:
+    """One simulated backoffice user: a test client, a RNG and the timings it records"""
+
+    def __init__(self, app, tokens, pedidos, rng):
+        self.client = app.test_client()
+        self.tokens = tokens
+        self.pedidos = pedidos
+        self.rng = rng
+        self.registros = []   # (ruta, inicio monotonic, segundos, status)
+        self.errores = []
+
+    def pedir(self, metodo, ruta, path, rol='vendedor', json_body=None):
+        """ruta labels the endpoint in the report; returns the decoded JSON body (or None)"""
+        headers = {'Authorization': f'Bearer {self.tokens[rol]}', 'Accept-Encoding': 'gzip'}
+        inicio = time.monotonic()
+        t = time.perf_counter()
+        resp = self.client.open(path, method=metodo, headers=headers, json=json_body)
+        segundos = time.perf_counter() - t
+        body = _json(resp)
+        status = resp.status_code
+        if status < 400 and ruta == 'POST /api/batch':
+            # A lote answers 200 even when its items fail
+            status = max([r['status'] for r in (body or {}).get('responses', [])] + [status])
+        self.registros.append((ruta, inicio, segundos, status))
+        if status >= 400 and len(self.errores) < 5:
+            self.errores.append(f"{metodo} {path} -> {status}: {str(body)[:200]}")
+        return body if status < 400 else None
+
+    def pedido_id(self):
+        """Recent pedidos are opened far more often than old ones"""
+        i = self.pedidos - int(self.pedidos * self.rng.random() ** 3)
+        return f'SHG-{max(1, i):06d}'
+
+    def nombre(self):
+        return f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)}'
+
+
+def _qs(**params):
+    return urlencode(params)
+
+
+def _json(resp):
+    data = resp.get_data()
+    if resp.headers.get('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    try:
+        return json.loads(data) if data else None
+    except ValueError:
+        return None
+
+
+def flujo_dashboard(s):
+    s.pedir('POST', 'POST /api/batch', '/api/batch', json_body={'requests': [
+        {'path': '/estadisticas'}, {'path': '/estadisticas/canales'}, {'path': '/estadisticas/estados'},
+    ]})
+    s.pedir('GET', 'GET /api/pedidos/pendientes', '/api/pedidos/pendientes?limit=500')
+
+
+def flujo_lista(s):
+    s.pedir('GET', 'GET /api/pedidos', f'/api/pedidos?fields={CAMPOS_LISTA}')
+
+
+def flujo_detalle(s):
+    numero = s.pedido_id()
+    pedido = s.pedir('GET', 'GET /api/pedidos/<id>/detalle', f'/api/pedidos/{numero}/detalle')
+    if pedido and pedido.get('comentarios_next_cursor'):
+        s.pedir('GET', 'GET /api/pedidos/<id>/comentarios',
+                f"/api/pedidos/{numero}/comentarios?" + _qs(cursor=pedido['comentarios_next_cursor']))
+
+
+def flujo_buscar(s):
+    s.pedir('GET', 'GET /api/pedidos/buscar', '/api/pedidos/buscar?' + _qs(q=s.nombre()))
+
+
+def flujo_tablero(s):
+    tablero = s.pedir('GET', 'GET /api/pedidos/tablero', '/api/pedidos/tablero?limit=20')
+    columnas = [c for c in (tablero or {}).get('columnas', []) if c.get('next_cursor')]
+    if columnas:
+        col = s.rng.choice(columnas)
+        s.pedir('GET', 'GET /api/pedidos/tablero?estado', '/api/pedidos/tablero?' + _qs(
+            estado=col['estado'], cursor=col['next_cursor'], limit=20))
+
+
+def flujo_clientes(s):
+    orden = s.rng.choice(('ultimo_pedido', 'ultimo_pedido', 'total_gastado', 'pedidos', 'nombre'))
+    pagina = s.pedir('GET', 'GET /api/clientes', f'/api/clientes?limit=50&orden={orden}')
+    if pagina and pagina.get('next_cursor') and s.rng.random() < 0.5:
+        s.pedir('GET', 'GET /api/clientes', '/api/clientes?' + _qs(limit=50, orden=orden,
+                                                                   cursor=pagina['next_cursor']))
+
+
+def flujo_pendientes(s):
+    categoria = s.rng.choice(CATEGORIAS_PENDIENTE)
+    pagina = s.pedir('GET', 'GET /api/pedidos/pendientes', f'/api/pedidos/pendientes?categoria={categoria}&limit=100')
+    if pagina and pagina.get('next_cursor'):
+        s.pedir('GET', 'GET /api/pedidos/pendientes', '/api/pedidos/pendientes?' + _qs(
+            categoria=categoria, limit=100, cursor=pagina['next_cursor']))
+
+
+def flujo_comentar(s):
+    numero = s.pedido_id()
+    s.pedir('POST', 'POST /api/pedidos/<id>/comentarios', f'/api/pedidos/{numero}/comentarios',
+            json_body={'texto': s.rng.choice(COMENTARIOS)})
+
+
+def flujo_nuevo_pedido(s):
+    s.pedir('GET', 'GET /api/productos', '/api/productos', rol='admin')
+    s.pedir('GET', 'GET /api/personalizaciones', '/api/personalizaciones', rol='admin')
+    nombre = s.nombre()
+    # Autocomplete fires as the name is typed
+    for largo in (3, 5, len(nombre)):
+        s.pedir('GET', 'GET /api/clientes/sugerir', '/api/clientes/sugerir?' + _qs(q=nombre[:largo]), rol='admin')
+    prefijo = s.rng.choice(PRODUCTOS)[0]
+    pers = s.rng.choice((None,) + PERSONALIZACIONES)
+    s.pedir('POST', 'POST /api/pedidos', '/api/pedidos', rol='admin', json_body={
+        'producto_sku': f'{prefijo}-{s.rng.randint(1, len(VARIANTES)):03d}',
+        'talla': s.rng.choice(('S', 'M', 'M', 'L', 'L', 'XL')),
+        'nombre_cliente': nombre,
+        'telefono': f"809-{s.rng.randint(200, 999)}-{s.rng.randint(0, 9999):04d}",
+        'email': f"bench{s.rng.randint(1, 10**6)}@gmail.com",
+        'direccion': 'C/ Duarte #12, Gazcue, Santo Domingo',
+        'color': 'Negro',
+        'canal': s.rng.choice(('WhatsApp', 'Instagram', 'Tienda')),
+        'banco': s.rng.choice(('Transferencia', 'Popular', 'Efectivo')),
+        'estatus_pago': 'Recibido',
+        'personalizacion_tipo': pers[0] if pers else 'ninguna',
+        'personalizacion_detalles': 'Logo pecho izquierdo, 8 cm' if pers else '',
+        'personalizacion_puntadas': 8000 if pers and pers[5] == 'puntadas' else 0,
+        'costo_por_mil_puntadas': pers[6] if pers and pers[5] == 'puntadas' else 0,
+    })
+
+
+def flujo_actualizar(s):
+    numero = s.pedido_id()
+    pedido = s.pedir('GET', 'GET /api/pedidos/<id>', f'/api/pedidos/{numero}', rol='admin')
+    siguiente = ESTADOS_SIGUIENTES.get((pedido or {}).get('estatus_produccion'))
+    if siguiente:
+        s.pedir('PUT', 'PUT /api/pedidos/<id>', f'/api/pedidos/{numero}', rol='admin',
+                json_body={'estatus_produccion': siguiente})
+
+
+# name -> (flow, weight): roughly how often the backoffice triggers each one
+FLUJOS = {
+    'dashboard': (flujo_dashboard, 10),
+    'lista': (flujo_lista, 4),
+    'detalle': (flujo_detalle, 25),
+    'buscar': (flujo_buscar, 10),
+    'tablero': (flujo_tablero, 10),
+    'clientes': (flujo_clientes, 8),
+    'pendientes': (flujo_pendientes, 8),
+    'comentar': (flujo_comentar, 10),
+    'nuevo_pedido': (flujo_nuevo_pedido, 8),
+    'actualizar': (flujo_actualizar, 7),
+}
+
+
+def ejecutar(app, tokens, pedidos, flujos, concurrencia, duracion, calentamiento, seed):
+    """Run the flows for calentamiento + duracion seconds -> ([(ruta, segundos, status)], error samples)"""
+    nombres = list(flujos)
+    pesos = [FLUJOS[n][1] for n in nombres]
+    inicio_medida = time.monotonic() + calentamiento
+    fin = inicio_medida + duracion
+
+    def usuario(k):
+        s = _Sesion(app, tokens, pedidos, random.Random(seed * 1000 + k))
+        while time.monotonic() < fin:
+            FLUJOS[s.rng.choices(nombres, pesos)[0]][0](s)
+        return s
+
+    with ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix='bench') as pool:
+        sesiones = list(pool.map(usuario, range(concurrencia)))
+    registros = [(ruta, seg, status) for s in sesiones
+                 for ruta, inicio, seg, status in s.registros if inicio_medida <= inicio < fin]
+    return registros, [e for s in sesiones for e in s.errores][:10]
+
+
+# ------------------------------------------------------------------------------
+# Report
+# ------------------------------------------------------------------------------
+
+def informe(registros, duracion):
+    por_ruta = defaultdict(list)
+    errores = Counter()
+    for ruta, segundos, status in registros:
+        por_ruta[ruta].append(segundos)
+        if status >= 400:
+            errores[ruta] += 1
+    endpoints = {
+        ruta: {'peticiones': len(tiempos), 'errores': errores[ruta],
+               'rps': round(len(tiempos) / duracion, 2), **_percentiles(tiempos)}
+        for ruta, tiempos in sorted(por_ruta.items())
+    }
+    total = {'peticiones': len(registros), 'errores': sum(errores.values()),
+             'rps': round(len(registros) / duracion, 2), **_percentiles([r[1] for r in registros])}
+    return total, endpoints
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=RAIZ, capture_output=True, text=True, timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def _tasa_errores(datos):
+    return datos['errores'] / datos['peticiones'] if datos and datos.get('peticiones') else 0.0
+
+
+def comparar(actual, base, umbral, metrica, min_ms, umbral_errores=0.0):
+    """
+    -> (table rows, regressions); raises ValueError when the runs are not comparable.
+    Regressions: --metrica slower by more than umbral (and min_ms), error rate
+    up by more than umbral_errores, an endpoint of the base run that got no
+    requests now, or total throughput down by more than umbral.
+    """
+    for clave in ('pedidos', 'seed', 'concurrencia', 'flujos'):
+        if actual['meta'].get(clave) != base['meta'].get(clave):
+            raise ValueError(f"Resultados no comparables: {clave} = {base['meta'].get(clave)} "
+                             f"en la base, {actual['meta'].get(clave)} ahora")
+    if actual['meta'].get('sembrado') != base['meta'].get('sembrado'):
+        # Dates are relative to the seeding day: retrasos and pendientes shift with it
+        print(f"[BENCH] Aviso: datos sembrados el {base['meta'].get('sembrado')} en la base "
+              f"y el {actual['meta'].get('sembrado')} ahora", file=sys.stderr)
+    filas, regresiones = [], []
+    for ruta, datos in actual['endpoints'].items():
+        previo = base['endpoints'].get(ruta)
+        tasa_antes, tasa_ahora = _tasa_errores(previo), _tasa_errores(datos)
+        if tasa_ahora - tasa_antes > umbral_errores:
+            regresiones.append(f"{ruta}: errores {tasa_antes:.1%} -> {tasa_ahora:.1%} "
+                               f"({datos['errores']}/{datos['peticiones']})")
+        if not previo or metrica not in previo or metrica not in datos:
+            filas.append((ruta, None, datos.get(metrica), None))
+            continue
+        antes, ahora = previo[metrica], datos[metrica]
+        cambio = (ahora - antes) / antes if antes else 0.0
+        filas.append((ruta, antes, ahora, cambio))
+        if cambio > umbral and ahora - antes >= min_ms:
+            regresiones.append(f"{ruta}: {metrica} {antes} -> {ahora} ms (+{cambio:.0%})")
+    # Same flujos on both sides, so a missing endpoint means its calls stopped happening
+    for ruta, previo in base['endpoints'].items():
+        if ruta not in actual['endpoints']:
+            filas.append((ruta, previo.get(metrica), None, None))
+            regresiones.append(f"{ruta}: {previo['peticiones']} peticiones en la base, ninguna ahora")
+    antes, ahora = base['total']['rps'], actual['total']['rps']
+    if antes and (antes - ahora) / antes > umbral:
+        regresiones.append(f"throughput total: {antes} -> {ahora} req/s ({(ahora - antes) / antes:.0%})")
+    return filas, regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pedidos', type=parse_pedidos, default=parse_pedidos('1k'), help='1k, 100k, 1M, ...')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dsn', help='Existing server (maintenance database); default: local cluster')
+    parser.add_argument('--pgdata', default=os.path.join(RAIZ, 'var', 'bench', 'pgdata'),
+                        help='Directory of the local cluster (kept between runs)')
+    parser.add_argument('--pg-puerto', type=int, default=54329)
+    parser.add_argument('--resembrar', action='store_true', help='Rebuild the seeded template')
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--duracion', type=float, default=30, help='Measured seconds')
+    parser.add_argument('--calentamiento', type=float, default=5, help='Unmeasured seconds first')
+    parser.add_argument('--flujos', default=','.join(FLUJOS), help=f"Subset of: {', '.join(FLUJOS)}")
+    parser.add_argument('--salida', help='Write the JSON report here')
+    parser.add_argument('--comparar', help='Previous JSON report to check for regressions')
+    parser.add_argument('--umbral', type=float, default=0.15, help='Allowed relative slowdown (0.15 = 15%%)')
+    parser.add_argument('--metrica', choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'], default='p95_ms')
+    parser.add_argument('--min-ms', type=float, default=2.0, help='Ignore regressions smaller than this')
+    parser.add_argument('--umbral-errores', type=float, default=0.0,
+                        help='Allowed rise of an endpoint error rate (0.01 = 1 point; default: any)')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    flujos = [f.strip() for f in args.flujos.split(',') if f.strip()]
+    desconocidos = [f for f in flujos if f not in FLUJOS]
+    if desconocidos or not flujos:
+        parser.error(f"flujos desconocidos: {', '.join(desconocidos)}")
+
+    base = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+
+    cluster = None
+    if args.dsn:
+        dsn_servidor = args.dsn
+    else:
+        cluster = ClusterLocal(args.pgdata, args.pg_puerto)
+        cluster.iniciar()
+        dsn_servidor = cluster.dsn
+
+    storage_dir = tempfile.mkdtemp(prefix='shogun-bench-')
+    try:
+        dsn_run, dataset = preparar_base(dsn_servidor, args.pedidos, args.seed, args.resembrar)
+        app, tokens = crear_app(dsn_run, storage_dir)
+        from app.models.database import DatabaseManager
+        try:
+            with DatabaseManager.get_cursor(dict_cursor=False) as cursor:
+                cursor.execute("SHOW server_version")
+                version_pg = cursor.fetchone()[0]
+            print(f"[BENCH] {args.pedidos} pedidos, {args.concurrencia} usuarios, "
+                  f"{args.calentamiento:g}s + {args.duracion:g}s, flujos: {', '.join(flujos)}")
+            registros, errores = ejecutar(app, tokens, args.pedidos, flujos, args.concurrencia,
+                                          args.duracion, args.calentamiento, args.seed)
+        finally:
+            DatabaseManager.close_all()
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+        try:
+            borrar_base(dsn_servidor)
+        finally:
+            if cluster is not None:
+                cluster.detener()
+
+    total, endpoints = informe(registros, args.duracion)
+    commit = _git('rev-parse', '--short', 'HEAD')
+    reporte = {
+        'meta': {
+            'commit': commit,
+            'cambios_sin_commit': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'pedidos': args.pedidos, 'seed': args.seed, 'sembrado': dataset['sembrado'],
+            'conteos': dataset['conteos'],
+            'concurrencia': args.concurrencia, 'duracion_s': args.duracion,
+            'calentamiento_s': args.calentamiento, 'flujos': flujos,
+            'python': platform.python_version(), 'postgres': version_pg,
+            'maquina': f"{socket.gethostname()} {platform.machine()} {os.cpu_count()} cpus",
+        },
+        'total': total,
+        'endpoints': endpoints,
+    }
+
+    salida = args.salida or os.path.join(
+        DIR_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'sin-git'}-{args.pedidos}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+    filas, regresiones = [], []
+    if base is not None:
+        try:
+            filas, regresiones = comparar(reporte, base, args.umbral, args.metrica, args.min_ms,
+                                          args.umbral_errores)
+        except ValueError as e:
+            print(f"[BENCH] {e}", file=sys.stderr)
+            sys.exit(2)
+
+    if args.json:
+        print(json.dumps({**reporte, 'regresiones': regresiones}, indent=2, ensure_ascii=False))
+    else:
+        print(f"\n{'endpoint':<40} {'req':>7} {'err':>5} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for ruta, d in list(endpoints.items()) + [('TOTAL', total)]:
+            print(f"{ruta:<40} {d['peticiones']:>7} {d['errores']:>5} {d['rps']:>8} "
+                  f"{d.get('p50_ms', '-'):>9} {d.get('p95_ms', '-'):>9} {d.get('p99_ms', '-'):>9}")
+        if filas:
+            print(f"\n{args.metrica} vs {args.comparar} (commit {base['meta'].get('commit')}):")
+            for ruta, antes, ahora, cambio in filas:
+                delta = f"{cambio:+.1%}" if cambio is not None else ('falta' if ahora is None else 'nuevo')
+                print(f"{ruta:<40} {antes if antes is not None else '-':>9} -> "
+                      f"{ahora if ahora is not None else '-':>9}  {delta}")
+        print(f"\nResultados: {salida}")
+    for e in errores:
+        print(f"[BENCH] error: {e}", file=sys.stderr)
+    if regresiones:
+        for r in regresiones:
+            print(f"[BENCH] REGRESIÓN {r}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
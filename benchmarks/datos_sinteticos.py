@@ -0,0 +1,369 @@
+"""
+Synthetic data generator - a reproducible Shogun database at any scale
+
+Builds benchmarks/schema_base.sql + migrations/*.sql and fills them with
+pedidos generated inside Postgres (generate_series + setseed, so 1M rows
+take a minute, not an hour). Same --pedidos and --seed -> same rows,
+except for dates, which are relative to the day the data is seeded.
+
+Distributions follow the real business:
+- clientes: about one per 2.5 pedidos, power-law skew (few VIPs with
+  dozens of pedidos, most customers with one); stable name/phone/address
+  per customer, 30% without email
+- canal: WhatsApp 45%, Instagram 25%, Tienda 12%, Facebook 10%, Referido 8%
+- created_at over two years, denser in recent months (growing business)
+- estado_produccion by age: old pedidos are mostly Entregado (a few
+  Cancelado or stuck), recent ones spread across the open columns;
+  a missing address blocks the pedido
+- 65% with personalizacion (bordados priced by puntadas, the rest fixed)
+- comentarios: most pedidos none, mean ~1, 0.1% with 60-120 (pagination)
+- adjuntos: 8% of pedidos, 1-2 content-addressed blobs each (no files)
+
+Run:
+    python -m benchmarks.datos_sinteticos --dsn postgresql://localhost/shogun_dev --pedidos 100k
+The target database must be empty; benchmarks/carga.py manages its own.
+"""
+import os
+import sys
+import glob
+import time
+import random
+import hashlib
+import argparse
+
+import psycopg2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SCHEMA_BASE = os.path.join(RAIZ, 'benchmarks', 'schema_base.sql')
+
+# Test accounts for the minted JWTs (benchmarks/carga.py)
+USUARIOS = (
+    ('00000000-0000-4000-8000-00000000ad01', 'admin@bench.shogun.do', 'Admin Bench', 'admin'),
+    ('00000000-0000-4000-8000-00000000fe01', 'ventas@bench.shogun.do', 'Ventas Bench', 'vendedor'),
+)
+
+NOMBRES = ('María', 'José', 'Juan', 'Ana', 'Luis', 'Carmen', 'Pedro', 'Rosa', 'Carlos', 'Yokasta',
+           'Miguel', 'Altagracia', 'Rafael', 'Francisca', 'Ramón', 'Juana', 'Manuel', 'Mercedes', 'Jorge', 'Ángela',
+           'Francisco', 'Yolanda', 'Ángel', 'Esther', 'Félix', 'Lucía', 'Héctor', 'Marisol', 'Wilson', 'Yaniris',
+           'Víctor', 'Daniela', 'Julio', 'Paola', 'Andrés', 'Nicole', 'Eduardo', 'Katherine', 'Domingo', 'Elena')
+APELLIDOS = ('Rodríguez', 'Pérez', 'Martínez', 'García', 'Fernández', 'Gómez', 'Sánchez', 'Díaz', 'Reyes', 'Ramírez',
+             'Cruz', 'Santana', 'Jiménez', 'Núñez', 'Castillo', 'Báez', 'Peña', 'Batista', 'Vásquez', 'Mejía',
+             'Rosario', 'Guzmán', 'Herrera', 'Hernández', 'Polanco', 'Almonte', 'Tavárez', 'Féliz', 'Encarnación', 'Ureña',
+             'Paulino', 'Abreu', 'Marte', 'Cabrera', 'De la Cruz', 'Morillo', 'Medina', 'Taveras', 'Suero', 'Cuevas')
+SECTORES = ('Naco', 'Piantini', 'Gazcue', 'Los Prados', 'Arroyo Hondo', 'Bella Vista', 'Los Mina', 'Herrera',
+            'Villa Mella', 'Ensanche Ozama', 'Los Alcarrizos', 'Evaristo Morales', 'Zona Colonial', 'Mirador Sur')
+CALLES = ('Duarte', 'Mella', 'Independencia', 'Las Américas', 'Sarasota', 'Núñez de Cáceres', 'Lope de Vega',
+          'Churchill', 'Charles de Gaulle', 'Venezuela', '27 de Febrero', 'San Vicente de Paúl')
+COLORES = ('Negro', 'Blanco', 'Azul Marino', 'Gris', 'Rojo', 'Verde Olivo', 'Beige', 'Vino')
+COMENTARIOS = ('Cliente confirma talla y color.', 'Pendiente de enviar el logo en mejor resolución.',
+               'Se envió prueba del diseño por WhatsApp.', 'Cliente aprobó el diseño.',
+               'Cambio de dirección de envío, ver nota.', 'Llamar antes de entregar.',
+               'Pago confirmado en el banco.', 'Retraso por falta de hilo dorado.',
+               'Entregado al mensajero.', 'Cliente pide factura con RNC.')
+
+CATEGORIAS = (('Camisetas', 'Camisetas y polos'), ('Hoodies', 'Sudaderas con capucha'),
+              ('Abrigos', 'Chaquetas y abrigos'), ('Gorras', 'Gorras bordadas'), ('Otros', 'Tazas, bolsos y más'))
+PRODUCTOS = (('CAM', 'Camisetas', 'Camiseta', 650, 180, 5), ('POL', 'Camisetas', 'Polo', 950, 320, 6),
+             ('HOO', 'Hoodies', 'Hoodie', 1850, 720, 8), ('SUD', 'Hoodies', 'Sudadera', 1450, 540, 7),
+             ('CHA', 'Abrigos', 'Chaqueta', 2900, 1300, 10), ('GOR', 'Gorras', 'Gorra', 550, 160, 4),
+             ('BOL', 'Otros', 'Bolso tote', 450, 120, 4), ('TAZ', 'Otros', 'Taza', 350, 90, 3))
+VARIANTES = ('Clásica', 'Premium', 'Oversize')
+PERSONALIZACIONES = (
+    ('BORD-PECHO', 'Bordado', 'Logo bordado en el pecho', 0, 2, 'puntadas', 35),
+    ('BORD-ESPALDA', 'Bordado', 'Bordado grande en la espalda', 0, 3, 'puntadas', 30),
+    ('SUB-FULL', 'Sublimación', 'Sublimación completa', 450, 1, 'fijo', None),
+    ('SERI-1C', 'Serigrafía', 'Serigrafía a una tinta', 250, 2, 'fijo', None),
+    ('VINIL', 'Vinil', 'Vinil textil', 300, 1, 'fijo', None),
+    ('DTF', 'DTF', 'Impresión DTF a color', 350, 1, 'fijo', None),
+)
+
+
+def parse_pedidos(valor):
+    """'1k' / '100k' / '1M' / '2500' -> int"""
+    v = str(valor).strip()
+    mult = {'k': 1_000, 'K': 1_000, 'm': 1_000_000, 'M': 1_000_000}.get(v[-1:], 1)
+    try:
+        n = int(float(v[:-1] if mult > 1 else v) * mult)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"escala inválida: {valor}")
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"escala inválida: {valor}")
+    return n
+
+
+def huella_esquema():
+    """Hash of schema_base.sql + migrations: seeded templates are rebuilt when it changes"""
+    h = hashlib.sha256()
+    for path in [SCHEMA_BASE] + sorted(glob.glob(os.path.join(RAIZ, 'migrations', '*.sql'))):
+        with open(path, 'rb') as f:
+            h.update(os.path.basename(path).encode() + b'\0' + f.read())
+    return h.hexdigest()[:16]
+
+
+def _catalogo(cursor, seed):
+    rnd = random.Random(seed)
+    cursor.executemany("INSERT INTO categorias_producto_tabla (nombre, descripcion) VALUES (%s, %s)", CATEGORIAS)
+    productos = []
+    for prefijo, categoria, nombre, precio, costo, dias in PRODUCTOS:
+        for n, variante in enumerate(VARIANTES, 1):
+            factor = 1 + 0.25 * (n - 1)
+            productos.append((f'{prefijo}-{n:03d}', f'{nombre} {variante}', categoria, round(precio * factor, -1),
+                              round(costo * factor * rnd.uniform(0.9, 1.1), 2), round(costo * 0.2, 2), dias))
+    cursor.executemany("""
+        INSERT INTO productos (sku, nombre, categoria, precio_base, costo_material, costo_mano_obra,
+                               tiempo_produccion_dias)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, productos)
+    cursor.executemany("""
+        INSERT INTO personalizaciones (codigo, tipo, descripcion, precio, tiempo_adicional_dias,
+                                       metodo_calculo, costo_por_mil_puntadas)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, PERSONALIZACIONES)
+    cursor.executemany("INSERT INTO usuarios (auth_user_id, email, nombre, rol) VALUES (%s, %s, %s, %s)", USUARIOS)
+
+
+_PEDIDOS = """
+    CREATE TEMP TABLE _prod AS
+        SELECT row_number() OVER (ORDER BY sku) AS n, * FROM productos;
+    CREATE TEMP TABLE _pers AS
+        SELECT row_number() OVER (ORDER BY codigo) AS n, * FROM personalizaciones;
+
+    INSERT INTO pedidos (
+        numero_pedido, cliente_nombre, cliente_telefono, cliente_email, direccion_envio,
+        producto_id, producto_sku, producto_nombre, talla_seleccionada, color,
+        personalizacion_id, personalizacion_codigo, personalizacion_detalles, personalizacion_puntadas,
+        fecha_pago, fecha_compromiso, fecha_entrega_real, dias_retraso,
+        precio_producto, precio_personalizacion, precio_envio,
+        costo_producto, costo_personalizacion, costo_mano_obra, costos_adicionales,
+        canal, metodo_pago, estado_pago, estado_produccion, created_at
+    )
+    SELECT
+        'SHG-' || to_char(i, 'FM999999000000'),
+        cli_nombre, cli_telefono, cli_email,
+        CASE WHEN r_dir < 0.015 THEN NULL WHEN r_dir < 0.025 THEN 'Pendiente' ELSE cli_direccion END,
+        pr.id, pr.sku, pr.nombre,
+        (CASE WHEN r_talla < 0.05 THEN 'XS' WHEN r_talla < 0.23 THEN 'S' WHEN r_talla < 0.55 THEN 'M'
+              WHEN r_talla < 0.82 THEN 'L' WHEN r_talla < 0.95 THEN 'XL' ELSE 'XXL' END)::talla,
+        (%(colores)s)[1 + floor(r_color * 8)::int],
+        pe.id, pe.codigo,
+        CASE WHEN pe.id IS NULL OR r_extra < 0.03 THEN NULL
+             ELSE 'Logo ' || (ARRAY['pecho izquierdo', 'centro', 'espalda', 'manga'])[1 + floor(r_extra * 4)::int]
+                  || ', ' || (6 + floor(r_extra * 20)::int) || ' cm' END,
+        puntadas,
+        fecha_pago, fecha_compromiso,
+        CASE WHEN estado = 'Entregado'
+             THEN LEAST(fecha_compromiso - 2 + floor(r_extra * 6)::int, CURRENT_DATE) END,
+        CASE WHEN estado = 'Entregado' THEN GREATEST(floor(r_extra * 6)::int - 2, 0)
+             WHEN estado IN ('Cancelado') THEN 0
+             ELSE GREATEST(CURRENT_DATE - fecha_compromiso, 0) END,
+        pr.precio_base,
+        CASE WHEN pe.metodo_calculo = 'fijo' THEN pe.precio ELSE 0 END,
+        CASE WHEN canal = 'Tienda' THEN 0 ELSE 200 END,
+        pr.costo_material,
+        CASE WHEN pe.metodo_calculo = 'fijo' THEN pe.precio * 0.5 ELSE 0 END,
+        round(puntadas / 1000.0 * COALESCE(pe.costo_por_mil_puntadas, 0), 2),
+        CASE WHEN r_extra > 0.95 THEN 150 ELSE 0 END,
+        canal::canal_venta,
+        (CASE WHEN r_banco < 0.30 THEN 'Transferencia' WHEN r_banco < 0.45 THEN 'Efectivo'
+              WHEN r_banco < 0.70 THEN 'Popular' WHEN r_banco < 0.90 THEN 'Banreservas' ELSE 'BHD' END)::metodo_pago,
+        (CASE WHEN estado = 'Cancelado' THEN CASE WHEN r_pago < 0.6 THEN 'Reembolsado' ELSE 'Pendiente' END
+              WHEN estado = 'Entregado' THEN CASE WHEN r_pago < 0.97 THEN 'Recibido' ELSE 'Parcial' END
+              WHEN r_pago < 0.70 THEN 'Recibido' WHEN r_pago < 0.90 THEN 'Parcial' ELSE 'Pendiente' END)::estado_pago,
+        estado::estado_produccion,
+        p.created_at
+    FROM (
+        SELECT *,
+               CASE WHEN pe_n IS NULL THEN 0
+                    WHEN pe_metodo = 'puntadas' THEN 3000 + floor(r_puntadas * 15000)::int ELSE 0 END AS puntadas,
+               CASE
+                   WHEN r_dir < 0.025 AND fecha_compromiso >= CURRENT_DATE - 30 THEN 'Bloqueado - Sin Dirección'
+                   WHEN fecha_compromiso < CURRENT_DATE - 10 THEN
+                       CASE WHEN r_estado < 0.93 THEN 'Entregado' WHEN r_estado < 0.975 THEN 'Cancelado'
+                            WHEN r_estado < 0.99 THEN 'En Camino' ELSE 'En Producción' END
+                   WHEN fecha_compromiso < CURRENT_DATE THEN
+                       CASE WHEN r_estado < 0.55 THEN 'Entregado' WHEN r_estado < 0.70 THEN 'En Camino'
+                            WHEN r_estado < 0.82 THEN 'Listo para Envío' WHEN r_estado < 0.86 THEN 'Cancelado'
+                            ELSE 'En Producción' END
+                   ELSE
+                       CASE WHEN r_estado < 0.70 THEN 'En Producción' WHEN r_estado < 0.86 THEN 'Listo para Envío'
+                            WHEN r_estado < 0.95 THEN 'En Camino' WHEN r_estado < 0.98 THEN 'Entregado'
+                            ELSE 'Cancelado' END
+               END AS estado
+        FROM (
+            SELECT *,
+                   created_at::date AS fecha_pago,
+                   created_at::date + dias AS fecha_compromiso
+            FROM (
+                SELECT i, r_dir, r_talla, r_color, r_extra, r_banco, r_pago, r_estado, r_puntadas,
+                       CASE WHEN r_canal < 0.45 THEN 'WhatsApp' WHEN r_canal < 0.70 THEN 'Instagram'
+                            WHEN r_canal < 0.80 THEN 'Facebook' WHEN r_canal < 0.92 THEN 'Tienda'
+                            ELSE 'Referido' END AS canal,
+                       1 + floor(r_prod * %(productos)s)::int AS pr_n,
+                       CASE WHEN r_pers < 0.35 THEN NULL
+                            ELSE 1 + floor((r_pers - 0.35) / 0.65 * %(personalizaciones)s)::int END AS pe_n,
+                       (SELECT metodo_calculo FROM _pers
+                        WHERE n = 1 + floor((r_pers - 0.35) / 0.65 * %(personalizaciones)s)::int) AS pe_metodo,
+                       (SELECT tiempo_produccion_dias FROM _prod WHERE n = 1 + floor(r_prod * %(productos)s)::int)
+                           + floor(r_dias * 4)::int AS dias,
+                       now() - (730 * power(1 - (i - 1)::float / %(n)s, 1.6) + r_hora) * interval '1 day' AS created_at,
+                       nombres[1 + cli %% 40] || ' ' || apellidos[1 + (cli / 40) %% 40]
+                           || ' ' || apellidos[1 + (cli / 1600) %% 40] AS cli_nombre,
+                       (ARRAY['809', '829', '849'])[1 + cli %% 3] || '-'
+                           || substr(lpad(((cli::bigint * 7919 + 104729) %% 10000000)::text, 7, '0'), 1, 3) || '-'
+                           || substr(lpad(((cli::bigint * 7919 + 104729) %% 10000000)::text, 7, '0'), 4, 4)
+                           AS cli_telefono,
+                       CASE WHEN cli %% 10 < 7
+                            THEN translate(lower(nombres[1 + cli %% 40]), 'áéíóúñ', 'aeioun') || '.' || cli
+                                 || (ARRAY['@gmail.com', '@hotmail.com', '@outlook.com', '@yahoo.com'])[1 + cli %% 4]
+                       END AS cli_email,
+                       'C/ ' || calles[1 + cli %% 12] || ' #' || (1 + cli %% 150) || ', '
+                           || sectores[1 + (cli / 12) %% 14] || ', Santo Domingo' AS cli_direccion
+                FROM (
+                    SELECT i,
+                           floor(%(clientes)s * power(random(), 2.5))::int AS cli,
+                           random() AS r_canal, random() AS r_estado, random() AS r_pago, random() AS r_prod,
+                           random() AS r_pers, random() AS r_talla, random() AS r_color, random() AS r_dir,
+                           random() AS r_dias, random() AS r_extra, random() AS r_banco, random() AS r_puntadas,
+                           random() AS r_hora
+                    FROM generate_series(1, %(n)s) AS i
+                ) azar,
+                (SELECT %(nombres)s AS nombres, %(apellidos)s AS apellidos,
+                        %(calles)s AS calles, %(sectores)s AS sectores) listas
+            ) base
+        ) fechas
+    ) p
+    JOIN _prod pr ON pr.n = p.pr_n
+    LEFT JOIN _pers pe ON pe.n = p.pe_n
+    ORDER BY i;
+
+    SELECT setval('pedidos_numero_seq', %(n)s);
+"""
+
+_COMENTARIOS = """
+    INSERT INTO pedido_comentarios (pedido_numero, autor_email, autor_nombre, texto, created_at)
+    SELECT p.numero_pedido,
+           (ARRAY[%(email_admin)s, %(email_ventas)s])[1 + k %% 2],
+           (ARRAY[%(nombre_admin)s, %(nombre_ventas)s])[1 + k %% 2],
+           (%(textos)s)[1 + abs(hashtext(p.numero_pedido)::bigint + k) %% 10],
+           LEAST(p.created_at + k * interval '7 hours', now())
+    FROM (
+        SELECT numero_pedido, created_at,
+               CASE WHEN random() < 0.001 THEN 60 + floor(random() * 60)::int
+                    ELSE floor(power(random(), 3) * 6)::int END AS n
+        FROM pedidos
+        ORDER BY numero_pedido
+    ) p
+    CROSS JOIN LATERAL generate_series(1, p.n) AS k
+"""
+
+_ADJUNTOS = """
+    CREATE TEMP TABLE _adj AS
+        SELECT p.numero_pedido, k, p.created_at,
+               encode(sha256((p.numero_pedido || ':' || k)::bytea), 'hex') AS sha,
+               (ARRAY['image/png', 'image/jpeg', 'application/pdf'])[1 + (k + length(p.numero_pedido)) %% 3] AS mime,
+               150000 + floor(random() * 2500000)::bigint AS bytes
+        FROM (SELECT numero_pedido, created_at, random() AS r FROM pedidos ORDER BY numero_pedido) p
+        CROSS JOIN LATERAL generate_series(1, CASE WHEN p.r < 0.06 THEN 1 WHEN p.r < 0.08 THEN 2 ELSE 0 END) AS k;
+
+    INSERT INTO adjunto_blobs (sha256, storage_path, tamano_bytes, ref_count, estado, created_at)
+    SELECT sha, 'blobs/' || substr(sha, 1, 2) || '/' || substr(sha, 3, 2) || '/' || sha, bytes, 1, 'stored', created_at
+    FROM _adj;
+
+    INSERT INTO pedido_adjuntos (pedido_numero, nombre_archivo, nombre_original, tipo_mime, tamano_bytes,
+                                 storage_path, subido_por_email, subido_por_nombre, sha256, blob_sha256, created_at)
+    SELECT numero_pedido, sha,
+           'diseno_' || k || CASE mime WHEN 'image/png' THEN '.png' WHEN 'image/jpeg' THEN '.jpg' ELSE '.pdf' END,
+           mime, bytes, 'blobs/' || substr(sha, 1, 2) || '/' || substr(sha, 3, 2) || '/' || sha,
+           %(email)s, %(nombre)s, sha, sha, created_at + interval '1 hour'
+    FROM _adj;
+"""
+
+
+def aplicar_migraciones(cursor):
+    for path in sorted(glob.glob(os.path.join(RAIZ, 'migrations', '*.sql'))):
+        with open(path) as f:
+            cursor.execute(f.read())
+
+
+def sembrar(conn, pedidos, seed=42, log=print):
+    """
+    Create the schema in the (empty) database of conn and fill it with
+    `pedidos` synthetic pedidos. Commits; returns row counts per table.
+    """
+    conn.autocommit = False
+    with conn.cursor() as cursor:
+        # Deterministic random(): one backend, no parallel workers
+        cursor.execute("SET max_parallel_workers_per_gather = 0")
+        cursor.execute("SET synchronous_commit = off")
+        cursor.execute("SELECT setseed(%s)", (((seed * 2654435761) % 2**31) / 2**31 * 2 - 1,))
+
+        t = time.perf_counter()
+        with open(SCHEMA_BASE) as f:
+            cursor.execute(f.read())
+        _catalogo(cursor, seed)
+        log(f"[BENCH] Esquema base y catálogo ({time.perf_counter() - t:.1f}s)")
+
+        t = time.perf_counter()
+        cursor.execute(_PEDIDOS, {
+            'n': pedidos, 'clientes': max(1, int(pedidos / 2.5)),
+            'productos': len(PRODUCTOS) * len(VARIANTES), 'personalizaciones': len(PERSONALIZACIONES),
+            'nombres': list(NOMBRES), 'apellidos': list(APELLIDOS), 'calles': list(CALLES),
+            'sectores': list(SECTORES), 'colores': list(COLORES),
+        })
+        log(f"[BENCH] {pedidos} pedidos ({time.perf_counter() - t:.1f}s)")
+
+        t = time.perf_counter()
+        (email_admin, email_ventas), (nombre_admin, nombre_ventas) = zip(*[(u[1], u[2]) for u in USUARIOS])
+        cursor.execute(_COMENTARIOS, {'email_admin': email_admin, 'email_ventas': email_ventas,
+                                      'nombre_admin': nombre_admin, 'nombre_ventas': nombre_ventas,
+                                      'textos': list(COMENTARIOS)})
+        log(f"[BENCH] {cursor.rowcount} comentarios ({time.perf_counter() - t:.1f}s)")
+
+        # Migrations backfill clientes, pedidos_pendientes and comentarios_count
+        t = time.perf_counter()
+        aplicar_migraciones(cursor)
+        log(f"[BENCH] Migraciones ({time.perf_counter() - t:.1f}s)")
+
+        t = time.perf_counter()
+        cursor.execute(_ADJUNTOS, {'email': USUARIOS[1][1], 'nombre': USUARIOS[1][2]})
+        log(f"[BENCH] Adjuntos ({time.perf_counter() - t:.1f}s)")
+
+        conteos = {}
+        for tabla in ('pedidos', 'clientes', 'pedido_comentarios', 'pedido_adjuntos', 'pedidos_pendientes'):
+            cursor.execute(f"SELECT count(*) FROM {tabla}")
+            conteos[tabla] = cursor.fetchone()[0]
+    conn.commit()
+
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        t = time.perf_counter()
+        cursor.execute("VACUUM ANALYZE")
+        log(f"[BENCH] VACUUM ANALYZE ({time.perf_counter() - t:.1f}s)")
+    return conteos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', required=True, help='Empty target database')
+    parser.add_argument('--pedidos', type=parse_pedidos, default=parse_pedidos('10k'), help='e.g. 1k, 100k, 1M')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('public.pedidos')")
+            if cursor.fetchone()[0] is not None:
+                sys.exit("La base de datos ya tiene tablas de Shogun; use una base vacía")
+        conn.rollback()
+        conteos = sembrar(conn, args.pedidos, args.seed)
+    finally:
+        conn.close()
+    for tabla, n in conteos.items():
+        print(f"{tabla:>20}  {n}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+JSON serialization benchmark - Flask's default provider vs FastJSONProvider
+
+Payloads mimic the real list endpoints: /api/pedidos (33 fields per row),
+/api/clientes pages and a pedido detalle with comentarios/adjuntos. Each
+provider goes through app.json.response(), i.e. the jsonify path.
+
+Run:
+    python -m benchmarks.json_encoding
+    python -m benchmarks.json_encoding --pedidos 20000 --repeat 5 --json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+from decimal import Decimal
+from datetime import date, datetime, timezone, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import json_provider  # noqa: E402
+from app.json_provider import FastJSONProvider  # noqa: E402
+
+BASE = datetime(2024, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _pedido(i):
+    dinero = lambda x: float(Decimal(x).quantize(Decimal('0.01')))
+    return {
+        'id': f'SHG-{i:06d}', 'cliente': f'Cliente {i}', 'telefono': f'809-555-{i % 10000:04d}',
+        'email': f'cliente{i}@correo.com', 'direccion': f'Calle {i % 300} #{i % 90}, Santo Domingo',
+        'sku': f'CAM-{i % 40:03d}', 'producto': 'Camiseta bordada', 'talla': 'M', 'color': 'Negro',
+        'personalizacion_codigo': 'BORD-01', 'personalizacion': 'Logo pecho izquierdo, 8cm, hilo dorado',
+        'puntadas': 7500 + i % 5000,
+        'fecha_pago': '01/02/2024', 'fecha_compromiso': '15/02/2024', 'fecha_entrega_real': None,
+        'dias_produccion': 7, 'dias_retraso': i % 4,
+        'precio_producto': dinero(1200 + i % 300), 'precio_person': 350.0, 'precio_envio': 200.0,
+        'precio_total': dinero(1750 + i % 300), 'costo_producto': 450.0, 'costo_person': 120.0,
+        'costo_mano_obra': 80.0, 'costos_adicionales': 0.0, 'costo_total': 650.0,
+        'ganancia': dinero(1100 + i % 300), 'canal': 'WhatsApp', 'banco': 'Popular',
+        'estatus_produccion': 'En Producción', 'estatus_pago': 'Recibido', 'comentarios_count': i % 6,
+        'created_at': BASE + timedelta(minutes=i),
+    }
+
+
+def _cliente(i):
+    return {
+        'nombre': f'Cliente {i}', 'telefono': f'809-555-{i % 10000:04d}', 'email': f'cliente{i}@correo.com',
+        'pedidos': i % 12, 'total_gastado': Decimal(f'{1750 * (i % 12)}.00'),
+        'ultimo_pedido': date(2024, 1 + i % 12, 1 + i % 28), 'tipo': ('Nuevo', 'Recurrente', 'VIP')[i % 3],
+    }
+
+
+def _detalle():
+    p = _pedido(1)
+    p['comentarios'] = [{
+        'id': str(uuid.uuid4()), 'pedido_numero': p['id'], 'autor_email': 'admin@shogun.do',
+        'autor_nombre': 'Admin', 'texto': 'Cliente confirma color y talla. ' * 3,
+        'created_at': BASE + timedelta(hours=n),
+    } for n in range(50)]
+    p['adjuntos'] = [{
+        'id': uuid.uuid4(), 'pedido_numero': p['id'], 'nombre_original': f'diseno_{n}.png',
+        'tipo_mime': 'image/png', 'tamano_bytes': 250000 + n, 'storage_path': f'blobs/ab/cd/{n:064x}',
+        'created_at': BASE + timedelta(hours=n), 'estado': 'stored',
+    } for n in range(10)]
+    return p
+
+
+def _medir(app, payload, repeat):
+    tiempos = []
+    with app.app_context():
+        for _ in range(repeat):
+            t = time.perf_counter()
+            body = app.json.response(payload).get_data()
+            tiempos.append(time.perf_counter() - t)
+    return {'ms': round(statistics.median(tiempos) * 1000, 2), 'bytes': len(body)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    parser.add_argument('--clientes', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    payloads = {
+        f'pedidos[{args.pedidos}]': [_pedido(i) for i in range(args.pedidos)],
+        f'clientes[{args.clientes}]': {'clientes': [_cliente(i) for i in range(args.clientes)], 'next_cursor': 'x'},
+        'detalle': _detalle(),
+    }
+
+    def app_con(provider):
+        app = Flask(__name__)
+        app.json = provider(app)
+        return app
+
+    orjson = json_provider.orjson
+    providers = {'flask-default': app_con(DefaultJSONProvider)}
+    json_provider.orjson = None
+    providers['fast (stdlib fallback)'] = app_con(FastJSONProvider)
+    report = []
+    for nombre, payload in payloads.items():
+        for prov, app in providers.items():
+            json_provider.orjson = None
+            report.append({'payload': nombre, 'provider': prov, **_medir(app, payload, args.repeat)})
+        if orjson is not None:
+            json_provider.orjson = orjson
+            report.append({'payload': nombre, 'provider': 'fast (orjson)',
+                           **_medir(app_con(FastJSONProvider), payload, args.repeat)})
+    json_provider.orjson = orjson
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for r in report:
+        print(f"{r['payload']:>16}  {r['provider']:<24} {r['ms']:>9} ms  {r['bytes']:>10} bytes")
+    if orjson is None:
+        print("(orjson not installed: only the stdlib paths were measured)")
+
+
+if __name__ == '__main__':
+    main()
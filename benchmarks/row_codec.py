@@ -0,0 +1,154 @@
+"""
+Row codec micro-benchmark - per-row cost of reading pedidos
+
+before: default psycopg2 casters (Decimal/date/datetime) + RealDictRow copy
+        + PedidosRepository._format_pedido (float()/strftime per field)
+after:  wire typecasters + tuple rows zipped into dicts (filas())
+
+Run:
+    python -m benchmarks.row_codec                # offline, simulated casting
+    python -m benchmarks.row_codec --dsn $DATABASE_URL   # real cursors, generate_series
+
+Offline mode feeds both paths the text values Postgres would send and calls
+the typecasters directly, so it measures the Python-side work only.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import psycopg2
+import psycopg2.extensions
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import (  # noqa: E402
+    PedidosRepository, _cast_numeric, _cast_fecha, _cast_timestamp, filas
+)
+
+# (column, type) in _SELECT_FIELDS order
+COLUMNAS = [
+    ('id', 'text'), ('cliente', 'text'), ('telefono', 'text'), ('email', 'text'), ('direccion', 'text'),
+    ('sku', 'text'), ('producto', 'text'), ('talla', 'text'), ('color', 'text'),
+    ('personalizacion_codigo', 'text'), ('personalizacion', 'text'), ('puntadas', 'int'),
+    ('fecha_pago', 'date'), ('fecha_compromiso', 'date'), ('fecha_entrega_real', 'date'),
+    ('dias_produccion', 'int'), ('dias_retraso', 'int'),
+    ('precio_producto', 'numeric'), ('precio_person', 'numeric'), ('precio_envio', 'numeric'),
+    ('precio_total', 'numeric'), ('costo_producto', 'numeric'), ('costo_person', 'numeric'),
+    ('costo_mano_obra', 'numeric'), ('costos_adicionales', 'numeric'), ('costo_total', 'numeric'),
+    ('ganancia', 'numeric'), ('canal', 'text'), ('banco', 'text'), ('estatus_produccion', 'text'),
+    ('estatus_pago', 'text'), ('comentarios_count', 'int'), ('created_at', 'timestamp'),
+]
+
+NOMBRES = [c for c, _ in COLUMNAS]
+DEFAULT = {
+    'numeric': psycopg2.extensions.DECIMAL,
+    'date': psycopg2.extensions.PYDATE,
+    'timestamp': psycopg2.extensions.PYDATETIME,
+    'int': lambda v, cur: int(v),
+    'text': lambda v, cur: v,
+}
+WIRE = {
+    'numeric': _cast_numeric,
+    'date': _cast_fecha,
+    'timestamp': _cast_timestamp,
+    'int': lambda v, cur: int(v),
+    'text': lambda v, cur: v,
+}
+
+
+def _texto(i):
+    """One pedido row as the text values Postgres sends"""
+    valores = {
+        'text': f'valor-{i}', 'int': str(i % 5000),
+        'date': f'2024-{1 + i % 12:02d}-{1 + i % 28:02d}',
+        'timestamp': f'2024-{1 + i % 12:02d}-{1 + i % 28:02d} 10:{i % 60:02d}:00.123456',
+        'numeric': f'{1000 + i % 997}.50',
+    }
+    return [valores[t] for _, t in COLUMNAS]
+
+
+def _medir(nombre, fn, n):
+    t = time.perf_counter()
+    rows = fn()
+    total = time.perf_counter() - t
+    t = time.perf_counter()
+    json.dumps(rows, default=str)
+    ser = time.perf_counter() - t
+    return {'path': nombre, 'rows': n, 'decode_ms': round(total * 1000, 1),
+            'us_per_row': round(total / n * 1e6, 2), 'json_ms': round(ser * 1000, 1)}
+
+
+def offline(n):
+    texto = [_texto(i) for i in range(n)]
+    tipos = [t for _, t in COLUMNAS]
+    default = [DEFAULT[t] for t in tipos]
+    wire = [WIRE[t] for t in tipos]
+
+    def antes():
+        out = []
+        for r in texto:
+            row = dict(zip(NOMBRES, [c(v, None) for c, v in zip(default, r)]))  # RealDictRow
+            out.append(PedidosRepository._format_pedido(row))
+        return out
+
+    def despues():
+        return [dict(zip(NOMBRES, [c(v, None) for c, v in zip(wire, r)])) for r in texto]
+
+    return [_medir('before', antes, n), _medir('after', despues, n)]
+
+
+def online(dsn, n):
+    from psycopg2.extras import RealDictCursor
+    from app.models.database import _WIRE_TYPES
+    cols = []
+    for nombre, tipo in COLUMNAS:
+        expr = {
+            'text': "'valor-' || i", 'int': 'i % 5000',
+            'date': "date '2024-01-01' + (i % 365)",
+            'timestamp': "timestamp '2024-01-01 10:00' + i * interval '1 minute'",
+            'numeric': '(1000 + i % 997 + 0.5)::numeric(12,2)',
+        }[tipo]
+        cols.append(f"{expr} AS {nombre}")
+    query = f"SELECT {', '.join(cols)} FROM generate_series(1, {n}) AS i"
+
+    conn = psycopg2.connect(dsn)
+    try:
+        def antes():
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(query)
+                return [PedidosRepository._format_pedido(r) for r in cur.fetchall()]
+
+        def despues():
+            with conn.cursor() as cur:
+                for t in _WIRE_TYPES:
+                    psycopg2.extensions.register_type(t, cur)
+                cur.execute(query)
+                return filas(cur)
+
+        antes()  # warm up
+        return [_medir('before', antes, n), _medir('after', despues, n)]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--dsn', help='Postgres DSN; omit for the offline simulation')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    report = online(args.dsn, args.rows) if args.dsn else offline(args.rows)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for r in report:
+        print(f"{r['path']:>7}: {r['rows']} rows  decode {r['decode_ms']} ms ({r['us_per_row']} µs/row)  "
+              f"json {r['json_ms']} ms")
+    antes, despues = report
+    print(f"speedup: {antes['us_per_row'] / despues['us_per_row']:.2f}x per row")
+
+
+if __name__ == '__main__':
+    main()
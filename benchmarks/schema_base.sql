@@ -0,0 +1,173 @@
+-- =============================================================================
+-- Esquema base para benchmarks (benchmarks/carga.py)
+-- Las tablas originales viven en Supabase y no tienen migración en el repo
+-- (migrations/ empieza en 003). Esto las reconstruye a partir de las
+-- consultas de app/models/database.py, con los mismos nombres, tipos y enums,
+-- para poder levantar una base local desechable y aplicar 003..N encima.
+-- No usar en producción.
+-- =============================================================================
+
+-- Requiere PostgreSQL 13+ (gen_random_uuid) y contrib (pg_trgm, migración 004)
+
+CREATE TYPE talla AS ENUM ('XS', 'S', 'M', 'L', 'XL', 'XXL');
+CREATE TYPE canal_venta AS ENUM ('WhatsApp', 'Instagram', 'Facebook', 'Tienda', 'Referido');
+CREATE TYPE metodo_pago AS ENUM ('Transferencia', 'Efectivo', 'Popular', 'Banreservas', 'BHD');
+CREATE TYPE estado_pago AS ENUM ('Recibido', 'Pendiente', 'Parcial', 'Reembolsado');
+CREATE TYPE estado_produccion AS ENUM (
+    'En Producción', 'Listo para Envío', 'En Camino', 'Entregado',
+    'Bloqueado - Sin Dirección', 'Cancelado'
+);
+
+CREATE TABLE categorias_producto_tabla (
+    id              uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    nombre          text NOT NULL UNIQUE,
+    descripcion     text,
+    activo          boolean NOT NULL DEFAULT true
+);
+
+CREATE TABLE productos (
+    id                      uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    sku                     text NOT NULL UNIQUE,
+    nombre                  text NOT NULL,
+    categoria               text NOT NULL,
+    precio_base             numeric(10, 2) NOT NULL DEFAULT 0,
+    costo_material          numeric(10, 2) NOT NULL DEFAULT 0,
+    costo_mano_obra         numeric(10, 2) NOT NULL DEFAULT 0,
+    costo_total             numeric(10, 2) GENERATED ALWAYS AS (costo_material + costo_mano_obra) STORED,
+    margen_dinero           numeric(10, 2) GENERATED ALWAYS AS (precio_base - costo_material - costo_mano_obra) STORED,
+    margen_porcentaje       numeric(6, 2) GENERATED ALWAYS AS (
+        CASE WHEN precio_base > 0
+             THEN round((precio_base - costo_material - costo_mano_obra) / precio_base * 100, 2) END) STORED,
+    tiempo_produccion_dias  integer NOT NULL DEFAULT 7,
+    activo                  boolean NOT NULL DEFAULT true,
+    created_at              timestamptz NOT NULL DEFAULT now(),
+    updated_at              timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE personalizaciones (
+    id                      uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    codigo                  text NOT NULL UNIQUE,
+    tipo                    text NOT NULL,
+    descripcion             text,
+    precio                  numeric(10, 2) NOT NULL DEFAULT 0,
+    tiempo_adicional_dias   integer NOT NULL DEFAULT 0,
+    metodo_calculo          text NOT NULL DEFAULT 'fijo',
+    costo_por_mil_puntadas  numeric(10, 2),
+    activo                  boolean NOT NULL DEFAULT true
+);
+
+CREATE TABLE usuarios (
+    auth_user_id    uuid PRIMARY KEY,
+    email           text NOT NULL,
+    nombre          text NOT NULL,
+    rol             text NOT NULL DEFAULT 'vendedor',
+    activo          boolean NOT NULL DEFAULT true
+);
+
+CREATE SEQUENCE pedidos_numero_seq;
+
+CREATE TABLE pedidos (
+    numero_pedido               text PRIMARY KEY
+                                DEFAULT 'SHG-' || to_char(nextval('pedidos_numero_seq'), 'FM999999000000'),
+    cliente_nombre              text NOT NULL,
+    cliente_telefono            text NOT NULL,
+    cliente_email               text,
+    direccion_envio             text,
+    producto_id                 uuid REFERENCES productos (id),
+    producto_sku                text NOT NULL,
+    producto_nombre             text NOT NULL,
+    talla_seleccionada          talla NOT NULL,
+    color                       text,
+    personalizacion_id          uuid REFERENCES personalizaciones (id),
+    personalizacion_codigo      text,
+    personalizacion_detalles    text,
+    personalizacion_puntadas    integer NOT NULL DEFAULT 0,
+    fecha_pago                  date NOT NULL DEFAULT CURRENT_DATE,
+    fecha_compromiso            date NOT NULL,
+    fecha_entrega_real          date,
+    dias_produccion             integer GENERATED ALWAYS AS (fecha_compromiso - fecha_pago) STORED,
+    dias_retraso                integer NOT NULL DEFAULT 0,
+    precio_producto             numeric(10, 2) NOT NULL DEFAULT 0,
+    precio_personalizacion      numeric(10, 2) NOT NULL DEFAULT 0,
+    precio_envio                numeric(10, 2) NOT NULL DEFAULT 0,
+    precio_total                numeric(10, 2) GENERATED ALWAYS AS (
+        precio_producto + precio_personalizacion + precio_envio) STORED,
+    costo_producto              numeric(10, 2) NOT NULL DEFAULT 0,
+    costo_personalizacion       numeric(10, 2) NOT NULL DEFAULT 0,
+    costo_mano_obra             numeric(10, 2) NOT NULL DEFAULT 0,
+    costos_adicionales          numeric(10, 2) DEFAULT 0,
+    costo_total                 numeric(10, 2) GENERATED ALWAYS AS (
+        costo_producto + costo_personalizacion + costo_mano_obra + COALESCE(costos_adicionales, 0)) STORED,
+    ganancia                    numeric(10, 2) GENERATED ALWAYS AS (
+        precio_producto + precio_personalizacion + precio_envio
+        - costo_producto - costo_personalizacion - costo_mano_obra - COALESCE(costos_adicionales, 0)) STORED,
+    canal                       canal_venta NOT NULL,
+    metodo_pago                 metodo_pago NOT NULL,
+    estado_pago                 estado_pago NOT NULL DEFAULT 'Pendiente',
+    estado_produccion           estado_produccion NOT NULL DEFAULT 'En Producción',
+    created_at                  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_pedidos_created_at ON pedidos (created_at DESC);
+
+CREATE TABLE pedido_comentarios (
+    id              uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    pedido_numero   text NOT NULL REFERENCES pedidos (numero_pedido) ON DELETE CASCADE,
+    autor_email     text NOT NULL,
+    autor_nombre    text NOT NULL,
+    texto           text NOT NULL,
+    created_at      timestamptz NOT NULL DEFAULT now()
+);
+
+-- Sin FK a pedidos: AdjuntosRepository.purgar_filas_huerfanas limpia las huérfanas
+CREATE TABLE pedido_adjuntos (
+    id                  uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    pedido_numero       text NOT NULL,
+    nombre_archivo      text NOT NULL,
+    nombre_original     text NOT NULL,
+    tipo_mime           text,
+    tamano_bytes        bigint,
+    storage_path        text NOT NULL,
+    subido_por_email    text,
+    subido_por_nombre   text,
+    created_at          timestamptz NOT NULL DEFAULT now()
+);
+
+-- Backlog de pendientes: pedidos abiertos con algún motivo, clasificados
+-- en la categoría del motivo más grave
+CREATE VIEW vista_pedidos_pendientes AS
+SELECT p.numero_pedido AS id,
+       p.cliente_nombre AS cliente,
+       p.cliente_telefono AS telefono,
+       p.producto_nombre AS producto,
+       p.precio_total,
+       p.estado_produccion::text AS estatus_produccion,
+       p.estado_pago::text AS estatus_pago,
+       GREATEST(CURRENT_DATE - p.fecha_compromiso, 0) AS dias_retraso,
+       p.fecha_compromiso,
+       p.direccion_envio AS direccion,
+       p.personalizacion_codigo,
+       p.personalizacion_detalles AS personalizacion,
+       p.cliente_email AS email,
+       p.talla_seleccionada::text AS talla,
+       p.canal::text AS canal,
+       p.color,
+       m.motivos,
+       m.motivos[1] AS motivo_pendiente,
+       CASE WHEN m.motivos && ARRAY['sin_direccion', 'direccion_pendiente'] THEN 'bloqueado'
+            WHEN 'retraso' = ANY (m.motivos) THEN 'retraso'
+            WHEN 'sin_detalles_personalizacion' = ANY (m.motivos) THEN 'personalizacion'
+            ELSE 'informacion' END AS categoria_pendiente
+FROM pedidos p
+CROSS JOIN LATERAL (
+    SELECT array_remove(ARRAY[
+        CASE WHEN COALESCE(btrim(p.direccion_envio), '') = '' THEN 'sin_direccion' END,
+        CASE WHEN p.direccion_envio ILIKE 'pendiente' THEN 'direccion_pendiente' END,
+        CASE WHEN p.fecha_compromiso < CURRENT_DATE THEN 'retraso' END,
+        CASE WHEN p.personalizacion_id IS NOT NULL
+              AND COALESCE(btrim(p.personalizacion_detalles), '') = '' THEN 'sin_detalles_personalizacion' END,
+        CASE WHEN p.cliente_email IS NULL THEN 'sin_email' END
+    ], NULL) AS motivos
+) m
+WHERE p.estado_produccion NOT IN ('Entregado', 'Cancelado')
+  AND cardinality(m.motivos) > 0;
@@ -0,0 +1,125 @@
+"""
+Storage backend benchmark - same upload/download workload on each backend
+
+Run:
+    python -m benchmarks.storage_backends --backend local
+    SUPABASE_SERVICE_ROLE_KEY=... python -m benchmarks.storage_backends --backend both
+
+Local downloads go through the real /api/archivos route (Flask test client,
+send_file path); Supabase downloads fetch the signed URL over HTTP.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {
+        'p50_ms': round(pick(0.50) * 1000, 2),
+        'p95_ms': round(pick(0.95) * 1000, 2),
+        'p99_ms': round(pick(0.99) * 1000, 2),
+        'mean_ms': round(statistics.mean(values) * 1000, 2),
+    }
+
+
+def run(backend, payloads, concurrency, download):
+    """Upload every payload, download each once, delete them. Returns a report dict."""
+    from app.auth.storage_backend import iter_file
+    import io
+
+    def subir(item):
+        i, data = item
+        t = time.perf_counter()
+        res = backend.upload_stream('BENCH', iter_file(io.BytesIO(data)), f'bench_{i}.bin', max_bytes=None)
+        return time.perf_counter() - t, res['storage_path']
+
+    def bajar(path):
+        t = time.perf_counter()
+        n = download(backend.get_signed_url(path, expires_in=600, download_name='bench.bin'))
+        return time.perf_counter() - t, n
+
+    total_bytes = sum(len(p) for p in payloads)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        t0 = time.perf_counter()
+        subidas = list(pool.map(subir, enumerate(payloads)))
+        t_up = time.perf_counter() - t0
+
+        paths = [p for _, p in subidas]
+        t0 = time.perf_counter()
+        bajadas = list(pool.map(bajar, paths))
+        t_down = time.perf_counter() - t0
+
+    for path in set(paths):
+        backend.delete_file(path)
+
+    return {
+        'backend': backend.name,
+        'files': len(payloads),
+        'bytes': total_bytes,
+        'upload': {**_percentiles([t for t, _ in subidas]), 'mb_s': round(total_bytes / t_up / 1e6, 2)},
+        'download': {**_percentiles([t for t, _ in bajadas]), 'mb_s': round(total_bytes / t_down / 1e6, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['local', 'supabase', 'both'], default='local')
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--size-kb', type=int, default=512)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    payloads = [os.urandom(args.size_kb * 1024) for _ in range(args.files)]
+    reports = []
+
+    if args.backend in ('local', 'both'):
+        from app import create_app
+        from app.auth.local_storage import LocalStorage
+        import app.auth.storage_backend as sb
+
+        root = tempfile.mkdtemp(prefix='bench_storage_')
+        flask_app = create_app()
+        backend = sb._backend = LocalStorage(root, flask_app.config['SECRET_KEY'])
+        client = flask_app.test_client()
+
+        def download_local(url):
+            r = client.get(url)
+            assert r.status_code == 200, r.status_code
+            return len(r.data)
+
+        reports.append(run(backend, payloads, args.concurrency, download_local))
+
+    if args.backend in ('supabase', 'both'):
+        from app.auth.storage import SupabaseStorage
+        session = requests.Session()
+
+        def download_remote(url):
+            r = session.get(url, timeout=60)
+            r.raise_for_status()
+            return len(r.content)
+
+        reports.append(run(SupabaseStorage(), payloads, args.concurrency, download_remote))
+
+    out = json.dumps(reports, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(out)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,65 @@ class Config:
     # Supabase
     SUPABASE_URL = os.environ.get('SUPABASE_URL', 'https://namjhrpumgywarhjxjxx.supabase.co')
 
+    # Attachment storage: 'supabase' or 'local'
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'supabase')
+    LOCAL_STORAGE_DIR = os.environ.get('LOCAL_STORAGE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'storage'))
+    # Background upload queue: requests return 202 once the file is spooled
+    SUBIDAS_ASYNC = os.environ.get('SUBIDAS_ASYNC', 'true').lower() in ('1', 'true')
+    SUBIDAS_SPOOL_DIR = os.environ.get('SUBIDAS_SPOOL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'spool'))
+    SUBIDAS_WORKERS = int(os.environ.get('SUBIDAS_WORKERS', 2))
+    SUBIDAS_MAX_INTENTOS = int(os.environ.get('SUBIDAS_MAX_INTENTOS', 5))
+    # Seconds before a pending blob with no spool file on this host is marked 'failed'
+    SUBIDAS_PENDIENTE_TIMEOUT = int(os.environ.get('SUBIDAS_PENDIENTE_TIMEOUT', 3600))
+    # Scan position of `flask gc-adjuntos` over the bucket
+    GC_CHECKPOINT = os.environ.get('GC_CHECKPOINT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'gc_checkpoint.json'))
+    # WebP thumbnails/previews for image attachments (requires Pillow)
+    MINIATURAS_ENABLED = os.environ.get('MINIATURAS_ENABLED', 'true').lower() in ('1', 'true')
+    MINIATURAS_WORKERS = int(os.environ.get('MINIATURAS_WORKERS', 2))
+    MINIATURAS_QUEUE = int(os.environ.get('MINIATURAS_QUEUE', 64))
+    # Let the front server (Apache/lighttpd) send local files via X-Sendfile
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true')
+
+    # Response compression (app/compression.py)
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BR_QUALITY = 4
+    # Output of `flask build-assets`
+    ASSETS_DIST_DIR = os.environ.get('ASSETS_DIST_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend', 'dist'))
+
+    # POST /api/batch: sub-requests per lote, shared worker threads (= DB connections) and deadline
+    BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 20))
+    BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+    BATCH_TIMEOUT = int(os.environ.get('BATCH_TIMEOUT', 30))
+
+    # Slow-query log (app/query_log.py); SLOW_QUERY_MS=0 disables it
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_EXPLAIN_SAMPLE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE', 0.2))
+    SLOW_QUERY_EXPLAIN_COOLDOWN = 600  # seconds between EXPLAINs of the same statement
+    # SQL statements per request before [QUERY-BUDGET] is logged; per-endpoint overrides
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 8))
+    QUERY_BUDGETS = {
+        'pedidos.crear_pedido': 12,
+        'pedidos.actualizar_pedido': 12,
+        'pedido_extras.subir_adjunto': 10,
+    }
+    N_PLUS_ONE_REPETICIONES = 5
+
+    # Sampled request traces, OTLP/JSON lines (app/tracing.py); empty TRACE_FILE disables them
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+    TRACE_FILE = os.environ.get('TRACE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'traces.jsonl'))
+    TRACE_FILE_MAX_BYTES = 50 * 1024 * 1024
+
+    # X-Profile request profiling for admins (app/profiling.py); limits are per host
+    PROFILE_ENABLED = os.environ.get('PROFILE_ENABLED', 'true').lower() in ('1', 'true')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'profiles'))
+    PROFILE_MAX_POR_HORA = int(os.environ.get('PROFILE_MAX_POR_HORA', 10))
+    PROFILE_INTERVALO_MS = 5
+    PROFILE_RETENER = 50
+
+    # /metrics: scrapes must send "Authorization: Bearer <token>"; unset = 404 (open only with DEBUG)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
     # Server
     HOST = os.environ.get('HOST', '0.0.0.0')
     PORT = int(os.environ.get('PORT', 5000))
@@ -24,6 +83,13 @@ class Config:
     COSTO_ENVIO_DEFAULT = 200
     TIEMPO_PRODUCCION_BASE = 7
 
+    # Production capacity (fecha_compromiso planner)
+    CAPACIDAD_UNIDADES_DIA = int(os.environ.get('CAPACIDAD_UNIDADES_DIA', 40))
+    CAPACIDAD_PUNTADAS_DIA = int(os.environ.get('CAPACIDAD_PUNTADAS_DIA', 400000))
+    DIAS_LABORABLES = os.environ.get('DIAS_LABORABLES', '0,1,2,3,4,5')  # Mon=0
+    PLANIFICADOR_HORIZONTE_DIAS = 180
+    PLANIFICADOR_TTL_SEGUNDOS = int(os.environ.get('PLANIFICADOR_TTL_SEGUNDOS', 300))
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
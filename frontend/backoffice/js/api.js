@@ -24,14 +24,47 @@ const api = {
         return response.json();
     },
 
+    /**
+     * Several GETs in one HTTP request (POST /api/batch).
+     * paths: endpoints as passed to request(). Resolves to the bodies in the
+     * same order; rejects if any sub-request failed.
+     */
+    async batch(paths) {
+        const data = await this.request('/batch', {
+            method: 'POST',
+            body: JSON.stringify({ requests: paths.map((path, i) => ({ id: String(i), path })) })
+        });
+        if (!data) return null;
+        if (!data.responses) throw new Error(data.error || 'Error en lote');
+        return data.responses.map(r => {
+            if (r.status >= 400) throw new Error((r.body && r.body.error) || ('Error ' + r.status + ' en ' + paths[r.id]));
+            return r.body;
+        });
+    },
+
     // --- Pedidos ---
-    getPedidos() { return this.request('/pedidos'); },
+    getPedidos(fields) { return this.request('/pedidos' + (fields ? '?fields=' + fields.join(',') : '')); },
     getPedido(id) { return this.request('/pedidos/' + id); },
+    getPedidoDetalle(id, conUrls) { return this.request('/pedidos/' + id + '/detalle' + (conUrls ? '?urls=true' : '')); },
     createPedido(data) { return this.request('/pedidos', { method: 'POST', body: JSON.stringify(data) }); },
     updatePedido(id, data) { return this.request('/pedidos/' + id, { method: 'PUT', body: JSON.stringify(data) }); },
     deletePedido(id) { return this.request('/pedidos/' + id, { method: 'DELETE' }); },
-    getPedidosPendientes() { return this.request('/pedidos/pendientes'); },
+    getPedidosPendientes(opts = {}) {
+        const p = new URLSearchParams();
+        if (opts.categoria) p.set('categoria', opts.categoria);
+        if (opts.limit) p.set('limit', opts.limit);
+        if (opts.cursor) p.set('cursor', opts.cursor);
+        const qs = p.toString();
+        return this.request('/pedidos/pendientes' + (qs ? '?' + qs : ''));
+    },
     buscarPedidos(q) { return this.request('/pedidos/buscar?q=' + encodeURIComponent(q)); },
+    getTablero(limit) { return this.request('/pedidos/tablero' + (limit ? '?limit=' + limit : '')); },
+    getTableroColumna(estado, cursor, limit) {
+        const p = new URLSearchParams({ estado });
+        if (cursor) p.set('cursor', cursor);
+        if (limit) p.set('limit', limit);
+        return this.request('/pedidos/tablero?' + p.toString());
+    },
 
     // --- Productos ---
     getProductos(all) { return this.request('/productos' + (all ? '?all=true' : '')); },
@@ -57,7 +90,15 @@ const api = {
     togglePersonalizacion(id, activo) { return this.request('/personalizaciones/' + id + '/toggle', { method: 'PATCH', body: JSON.stringify({ activo }) }); },
 
     // --- Clientes ---
-    getClientes() { return this.request('/clientes'); },
+    getClientes(opts = {}) {
+        const p = new URLSearchParams();
+        if (opts.limit) p.set('limit', opts.limit);
+        if (opts.orden) p.set('orden', opts.orden);
+        if (opts.cursor) p.set('cursor', opts.cursor);
+        const qs = p.toString();
+        return this.request('/clientes' + (qs ? '?' + qs : ''));
+    },
+    getCliente(telefono) { return this.request('/clientes/' + encodeURIComponent(telefono)); },
 
     // --- Estadísticas ---
     getEstadisticas(desde, hasta) {
@@ -83,12 +124,12 @@ const api = {
     getVentasPorEstado() { return this.request('/estadisticas/estados'); },
 
     // --- Comentarios ---
-    getComentarios(pedidoId) { return this.request('/pedidos/' + pedidoId + '/comentarios'); },
+    getComentarios(pedidoId, cursor) { return this.request('/pedidos/' + pedidoId + '/comentarios' + (cursor ? '?cursor=' + encodeURIComponent(cursor) : '')); },
     crearComentario(pedidoId, texto) { return this.request('/pedidos/' + pedidoId + '/comentarios', { method: 'POST', body: JSON.stringify({ texto }) }); },
     eliminarComentario(id) { return this.request('/comentarios/' + id, { method: 'DELETE' }); },
 
     // --- Adjuntos ---
-    getAdjuntos(pedidoId) { return this.request('/pedidos/' + pedidoId + '/adjuntos'); },
+    getAdjuntos(pedidoId, conUrls) { return this.request('/pedidos/' + pedidoId + '/adjuntos' + (conUrls ? '?urls=true' : '')); },
     async subirAdjunto(pedidoId, file) {
         const token = Auth.getToken();
         const fd = new FormData();
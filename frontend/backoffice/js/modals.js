@@ -71,7 +71,7 @@
             modalManager.open(this.modal);
 
             try {
-                const p = await api.getPedido(id);
+                const p = await api.getPedidoDetalle(id, true);
                 if (!p) { this.modal.innerHTML = '<div class="modal-content"><div class="modal-body"><p style="color:#dc3545;">Pedido no encontrado</p></div></div>'; return; }
 
                 this.modal.innerHTML = `
@@ -182,8 +182,8 @@
                 this.modal.querySelectorAll('[data-close]').forEach(b => b.onclick = () => closeModal(this.modal));
                 this.modal.querySelector('[data-edit]').onclick = () => { closeModal(this.modal); editarPedidoModal.open(id); };
 
-                // --- Load comments ---
-                this._loadComentarios(id);
+                // --- Comments (already in the detalle response) ---
+                this._loadComentarios(id, { comentarios: p.comentarios, next_cursor: p.comentarios_next_cursor });
 
                 // --- Add comment ---
                 document.getElementById('btnAddComment').onclick = async () => {
@@ -206,8 +206,8 @@
                     if (e.key === 'Enter') document.getElementById('btnAddComment').click();
                 });
 
-                // --- Load attachments ---
-                this._loadAdjuntos(id);
+                // --- Attachments (already in the detalle response) ---
+                this._loadAdjuntos(id, p.adjuntos);
 
                 // --- Upload file ---
                 document.getElementById('btnAddFile').onclick = () => document.getElementById('adjuntoInput').click();
@@ -233,16 +233,17 @@
             }
         }
 
-        async _loadComentarios(pedidoId) {
+        async _loadComentarios(pedidoId, datos, append) {
             const container = document.getElementById('comentariosLista');
             if (!container) return;
             try {
-                const comentarios = await api.getComentarios(pedidoId);
-                if (!comentarios || comentarios.length === 0) {
+                const pagina = datos || await api.getComentarios(pedidoId);
+                const comentarios = (pagina && pagina.comentarios) || [];
+                if (!append && comentarios.length === 0) {
                     container.innerHTML = '<p style="color:#999;font-size:.9em;">Sin comentarios</p>';
                     return;
                 }
-                container.innerHTML = comentarios.map(c => {
+                const html = comentarios.map(c => {
                     const fecha = c.created_at ? new Date(c.created_at).toLocaleString('es-DO', {day:'2-digit',month:'2-digit',year:'numeric',hour:'2-digit',minute:'2-digit'}) : '';
                     return `<div style="padding:10px 12px;background:#f8f9fa;border-radius:8px;margin-bottom:8px;border-left:3px solid #2F5496;">
                         <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:4px;">
@@ -255,16 +256,26 @@
                         <div style="font-size:.9em;">${esc(c.texto)}</div>
                     </div>`;
                 }).join('');
+                const masBtn = container.querySelector('[data-mas-comentarios]');
+                if (masBtn) masBtn.remove();
+                if (append) container.insertAdjacentHTML('beforeend', html);
+                else container.innerHTML = html;
+                if (pagina.next_cursor) {
+                    container.insertAdjacentHTML('beforeend', '<button data-mas-comentarios class="btn-modal btn-secondary" style="font-size:.8em;padding:6px 12px;">Ver comentarios anteriores</button>');
+                    container.querySelector('[data-mas-comentarios]').onclick = async () => {
+                        this._loadComentarios(pedidoId, await api.getComentarios(pedidoId, pagina.next_cursor), true);
+                    };
+                }
             } catch (e) {
                 container.innerHTML = '<p style="color:#dc3545;font-size:.85em;">Error cargando comentarios</p>';
             }
         }
 
-        async _loadAdjuntos(pedidoId) {
+        async _loadAdjuntos(pedidoId, datos) {
             const container = document.getElementById('adjuntosLista');
             if (!container) return;
             try {
-                const adjuntos = await api.getAdjuntos(pedidoId);
+                const adjuntos = datos || await api.getAdjuntos(pedidoId, true);
                 if (!adjuntos || adjuntos.length === 0) {
                     container.innerHTML = '<p style="color:#999;font-size:.9em;">Sin adjuntos</p>';
                     return;
@@ -287,11 +298,14 @@
 
                 container.innerHTML = adjuntos.map(a => {
                     const fecha = a.created_at ? new Date(a.created_at).toLocaleString('es-DO', {day:'2-digit',month:'2-digit',year:'numeric',hour:'2-digit',minute:'2-digit'}) : '';
+                    const icono = a.thumb_url
+                        ? `<a href="${esc(a.preview_url || a.url || a.thumb_url)}" target="_blank"><img src="${esc(a.thumb_url)}" loading="lazy" alt="" style="width:40px;height:40px;object-fit:cover;border-radius:4px;"></a>`
+                        : `<i class="fas ${fileIcon(a.tipo_mime)}" style="font-size:1.2em;color:#2F5496;width:20px;text-align:center;"></i>`;
                     return `<div style="display:flex;align-items:center;gap:10px;padding:8px 12px;background:#f8f9fa;border-radius:8px;margin-bottom:6px;">
-                        <i class="fas ${fileIcon(a.tipo_mime)}" style="font-size:1.2em;color:#2F5496;width:20px;text-align:center;"></i>
+                        ${icono}
                         <div style="flex:1;min-width:0;">
                             <div style="font-size:.88em;font-weight:600;overflow:hidden;text-overflow:ellipsis;white-space:nowrap;">${esc(a.nombre_original)}</div>
-                            <div style="font-size:.75em;color:#999;">${fileSize(a.tamano_bytes)} · ${esc(a.subido_por_nombre)} · ${fecha}</div>
+                            <div style="font-size:.75em;color:#999;">${fileSize(a.tamano_bytes)} · ${esc(a.subido_por_nombre)} · ${fecha}${a.estado === 'pending' ? ' · <span style="color:#f0ad4e;">Subiendo…</span>' : a.estado === 'failed' ? ' · <span style="color:#dc3545;">Error al subir</span>' : ''}</div>
                         </div>
                         <button onclick="descargarAdjuntoUI('${a.id}')" style="background:none;border:none;cursor:pointer;color:#2F5496;font-size:1em;" title="Descargar"><i class="fas fa-download"></i></button>
                         <button onclick="eliminarAdjuntoUI('${a.id}','${pedidoId}')" style="background:none;border:none;cursor:pointer;color:#dc3545;font-size:.9em;" title="Eliminar"><i class="fas fa-trash"></i></button>
@@ -473,13 +487,14 @@
             }
         }
 
-        async _loadComentarios(pedidoId) {
+        async _loadComentarios(pedidoId, cursor) {
             const container = document.getElementById('editComentariosLista');
             if (!container) return;
             try {
-                const comentarios = await api.getComentarios(pedidoId);
-                if (!comentarios || comentarios.length === 0) { container.innerHTML = '<p style="color:#999;font-size:.85em;">Sin comentarios</p>'; return; }
-                container.innerHTML = comentarios.map(c => {
+                const pagina = await api.getComentarios(pedidoId, cursor);
+                const comentarios = (pagina && pagina.comentarios) || [];
+                if (!cursor && comentarios.length === 0) { container.innerHTML = '<p style="color:#999;font-size:.85em;">Sin comentarios</p>'; return; }
+                const html = comentarios.map(c => {
                     const fecha = c.created_at ? new Date(c.created_at).toLocaleString('es-DO', {day:'2-digit',month:'2-digit',year:'numeric',hour:'2-digit',minute:'2-digit'}) : '';
                     return `<div style="padding:8px 10px;background:#f8f9fa;border-radius:6px;margin-bottom:6px;border-left:3px solid #2F5496;">
                         <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:2px;">
@@ -492,6 +507,14 @@
                         <div style="font-size:.85em;">${esc(c.texto)}</div>
                     </div>`;
                 }).join('');
+                const masBtn = container.querySelector('[data-mas-comentarios]');
+                if (masBtn) masBtn.remove();
+                if (cursor) container.insertAdjacentHTML('beforeend', html);
+                else container.innerHTML = html;
+                if (pagina.next_cursor) {
+                    container.insertAdjacentHTML('beforeend', '<button type="button" data-mas-comentarios class="btn-modal btn-secondary" style="font-size:.78em;padding:5px 10px;">Ver comentarios anteriores</button>');
+                    container.querySelector('[data-mas-comentarios]').onclick = () => this._loadComentarios(pedidoId, pagina.next_cursor);
+                }
             } catch (e) { container.innerHTML = '<p style="color:#dc3545;font-size:.82em;">Error cargando comentarios</p>'; }
         }
 
@@ -4,10 +4,14 @@
 
 let pedidosCache = [];
 
+// Columns the table, filters and row alerts use (sparse fieldset)
+const CAMPOS_LISTA = ['id', 'cliente', 'telefono', 'direccion', 'producto', 'color', 'talla',
+    'precio_total', 'estatus_produccion', 'canal', 'comentarios_count'];
+
 async function cargarPedidos() {
     try {
         showLoading(true);
-        const pedidos = await api.getPedidos();
+        const pedidos = await api.getPedidos(CAMPOS_LISTA);
         pedidosCache = pedidos || [];
         renderizarTablaPedidos(pedidosCache);
         showLoading(false);
@@ -39,7 +43,7 @@ function crearFilaPedido(pedido, isAdmin) {
 
     return `
         <tr class="${alerta}" data-pedido-id="${pedido.id}">
-            <td data-label="ID"><strong>${pedido.id}</strong></td>
+            <td data-label="ID"><strong>${pedido.id}</strong>${pedido.comentarios_count ? ` <small style="color:#666;" title="Comentarios"><i class="fas fa-comment"></i> ${pedido.comentarios_count}</small>` : ''}</td>
             <td data-label="Cliente">${pedido.cliente || ''}</td>
             <td data-label="Producto">${pedido.producto || ''}${pedido.color ? ' · ' + pedido.color : ''}<br><small style="color:#666;">Talla: ${pedido.talla || ''}</small></td>
             <td data-label="Total"><strong>${formatearMoneda(pedido.precio_total)}</strong></td>
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings - read automatically from the working directory
+
+Prometheus multi-process mode (app/metrics.py): workers write their samples
+to PROMETHEUS_MULTIPROC_DIR and /metrics aggregates the files of all of them.
+The variable has to be set before prometheus_client is imported, i.e. here.
+"""
+import os
+import shutil
+
+METRICS_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'metrics')
+)
+
+
+def on_starting(server):
+    # Files left by a previous run would be added to the new totals
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
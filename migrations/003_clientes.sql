@@ -0,0 +1,58 @@
+-- =============================================================================
+-- 003 - Tabla clientes mantenida incrementalmente
+-- Reemplaza la agregación de vista_clientes. La fila de cada cliente se
+-- recalcula desde sus propios pedidos en la misma transacción que
+-- PedidosRepository.create/update/delete (ver ClientesRepository.refrescar).
+-- =============================================================================
+
+-- Teléfono normalizado (solo dígitos) como columna generada + índice
+ALTER TABLE pedidos
+    ADD COLUMN IF NOT EXISTS cliente_telefono_norm text
+    GENERATED ALWAYS AS (regexp_replace(cliente_telefono, '[^0-9]', '', 'g')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_pedidos_telefono_norm
+    ON pedidos (cliente_telefono_norm, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    telefono_norm   text PRIMARY KEY,
+    telefono        text NOT NULL,
+    nombre          text NOT NULL,
+    email           text,
+    total_pedidos   integer NOT NULL DEFAULT 0,
+    total_gastado   numeric(12, 2) NOT NULL DEFAULT 0,
+    ultimo_pedido   date NOT NULL,
+    tipo_cliente    text NOT NULL,
+    updated_at      timestamptz NOT NULL DEFAULT now()
+);
+
+-- Índices para paginación por keyset (columna de orden + PK como desempate)
+CREATE INDEX IF NOT EXISTS idx_clientes_ultimo_pedido ON clientes (ultimo_pedido DESC, telefono_norm DESC);
+CREATE INDEX IF NOT EXISTS idx_clientes_total_gastado ON clientes (total_gastado DESC, telefono_norm DESC);
+CREATE INDEX IF NOT EXISTS idx_clientes_total_pedidos ON clientes (total_pedidos DESC, telefono_norm DESC);
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre ON clientes (nombre, telefono_norm);
+
+-- Carga inicial desde pedidos existentes (no cancelados)
+INSERT INTO clientes (telefono_norm, telefono, nombre, email, total_pedidos,
+                      total_gastado, ultimo_pedido, tipo_cliente)
+SELECT agg.telefono_norm, u.cliente_telefono, u.cliente_nombre, u.cliente_email,
+       agg.total_pedidos, agg.total_gastado, agg.ultimo_pedido,
+       CASE WHEN agg.total_pedidos >= 5 THEN 'VIP'
+            WHEN agg.total_pedidos >= 2 THEN 'Recurrente'
+            ELSE 'Nuevo' END
+FROM (
+    SELECT cliente_telefono_norm AS telefono_norm,
+           COUNT(*) AS total_pedidos,
+           COALESCE(SUM(precio_total), 0) AS total_gastado,
+           MAX(fecha_pago) AS ultimo_pedido
+    FROM pedidos
+    WHERE estado_produccion <> 'Cancelado' AND cliente_telefono_norm <> ''
+    GROUP BY cliente_telefono_norm
+) agg
+JOIN LATERAL (
+    SELECT cliente_telefono, cliente_nombre, cliente_email
+    FROM pedidos p
+    WHERE p.cliente_telefono_norm = agg.telefono_norm
+    ORDER BY p.created_at DESC
+    LIMIT 1
+) u ON true
+ON CONFLICT (telefono_norm) DO NOTHING;
@@ -0,0 +1,33 @@
+-- =============================================================================
+-- 004 - Autocompletado de clientes en el formulario
+-- Datos del último pedido en la fila del cliente + índices para
+-- búsqueda por prefijo de teléfono y por trigramas del nombre.
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE clientes
+    ADD COLUMN IF NOT EXISTS ultima_direccion text,
+    ADD COLUMN IF NOT EXISTS ultimo_color text,
+    ADD COLUMN IF NOT EXISTS ultima_talla text;
+
+-- LIKE 'prefijo%' sobre el teléfono normalizado
+CREATE INDEX IF NOT EXISTS idx_clientes_telefono_prefijo
+    ON clientes (telefono_norm text_pattern_ops);
+
+-- KNN por similitud de palabra (<<->) sobre el nombre
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre_trgm
+    ON clientes USING gist (nombre gist_trgm_ops);
+
+-- Rellenar con el pedido más reciente de cada cliente
+UPDATE clientes c
+SET ultima_direccion = u.direccion_envio,
+    ultimo_color = u.color,
+    ultima_talla = u.talla
+FROM (
+    SELECT DISTINCT ON (cliente_telefono_norm)
+           cliente_telefono_norm, direccion_envio, color, talla_seleccionada::text AS talla
+    FROM pedidos
+    ORDER BY cliente_telefono_norm, created_at DESC
+) u
+WHERE u.cliente_telefono_norm = c.telefono_norm;
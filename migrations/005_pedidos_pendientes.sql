@@ -0,0 +1,30 @@
+-- =============================================================================
+-- 005 - Backlog de pendientes materializado
+-- Copia de vista_pedidos_pendientes mantenida por fila: cada cambio de un
+-- pedido re-sincroniza solo su fila (PedidosRepository.refrescar_pendiente)
+-- y `flask recalcular-pendientes` (job nocturno) recalcula los campos que
+-- dependen de la fecha (dias_retraso, motivos, categoria_pendiente).
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS pedidos_pendientes AS
+    SELECT * FROM vista_pedidos_pendientes WITH NO DATA;
+
+ALTER TABLE pedidos_pendientes
+    ADD COLUMN IF NOT EXISTS actualizado_at timestamptz NOT NULL DEFAULT now();
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'pedidos_pendientes_pkey') THEN
+        ALTER TABLE pedidos_pendientes ADD CONSTRAINT pedidos_pendientes_pkey PRIMARY KEY (id);
+    END IF;
+END $$;
+
+-- Lectura paginada por categoría, más urgentes primero
+CREATE INDEX IF NOT EXISTS idx_pendientes_categoria
+    ON pedidos_pendientes (categoria_pendiente, fecha_compromiso, id);
+CREATE INDEX IF NOT EXISTS idx_pendientes_orden
+    ON pedidos_pendientes (fecha_compromiso, id);
+
+INSERT INTO pedidos_pendientes
+SELECT v.*, now() FROM vista_pedidos_pendientes v
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,8 @@
+-- =============================================================================
+-- 006 - Tablero de producción (kanban)
+-- Índice parcial sobre pedidos abiertos para las columnas por estado.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_pedidos_tablero
+    ON pedidos (estado_produccion, fecha_compromiso, numero_pedido)
+    WHERE estado_produccion NOT IN ('Entregado', 'Cancelado');
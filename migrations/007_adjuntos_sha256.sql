@@ -0,0 +1,6 @@
+-- =============================================================================
+-- 007 - Checksum de adjuntos
+-- sha256 calculado mientras el archivo se transmite a Storage.
+-- =============================================================================
+
+ALTER TABLE pedido_adjuntos ADD COLUMN IF NOT EXISTS sha256 text;
@@ -0,0 +1,7 @@
+-- =============================================================================
+-- 008 - Índice por storage_path
+-- Con almacenamiento por contenido varios adjuntos pueden compartir un blob;
+-- eliminar_adjunto comprueba si el blob sigue en uso antes de borrarlo.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_pedido_adjuntos_storage_path ON pedido_adjuntos (storage_path);
@@ -0,0 +1,19 @@
+-- =============================================================================
+-- 009 - Deduplicación de adjuntos por contenido
+-- Cada archivo distinto se guarda una vez (blobs/ab/cd/<sha256>); las filas
+-- de pedido_adjuntos apuntan al blob y ref_count cuenta cuántas lo usan.
+-- Filas anteriores (blob_sha256 NULL) conservan su storage_path propio.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS adjunto_blobs (
+    sha256          text PRIMARY KEY,
+    storage_path    text NOT NULL,
+    tamano_bytes    bigint NOT NULL,
+    ref_count       integer NOT NULL DEFAULT 0,
+    created_at      timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE pedido_adjuntos
+    ADD COLUMN IF NOT EXISTS blob_sha256 text REFERENCES adjunto_blobs (sha256);
+
+CREATE INDEX IF NOT EXISTS idx_pedido_adjuntos_blob ON pedido_adjuntos (blob_sha256);
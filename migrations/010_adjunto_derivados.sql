@@ -0,0 +1,10 @@
+-- =============================================================================
+-- 010 - Miniaturas y previews de imágenes
+-- Derivados WebP generados en segundo plano (app/services/miniaturas.py),
+-- guardados junto al blob original.
+-- =============================================================================
+
+ALTER TABLE adjunto_blobs
+    ADD COLUMN IF NOT EXISTS thumb_path text,
+    ADD COLUMN IF NOT EXISTS preview_path text,
+    ADD COLUMN IF NOT EXISTS derivados_estado text;  -- NULL | 'listo' | 'error'
@@ -0,0 +1,15 @@
+-- =============================================================================
+-- 011 - Subida asíncrona de adjuntos
+-- El blob se registra como 'pending' al recibir el archivo; un worker en
+-- segundo plano lo sube al storage y lo pasa a 'stored' (o 'failed' tras
+-- agotar los reintentos). Los blobs existentes ya están en storage.
+-- =============================================================================
+
+ALTER TABLE adjunto_blobs
+    ADD COLUMN IF NOT EXISTS estado text NOT NULL DEFAULT 'stored'
+        CHECK (estado IN ('pending', 'stored', 'failed')),
+    ADD COLUMN IF NOT EXISTS intentos integer NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS ultimo_error text;
+
+CREATE INDEX IF NOT EXISTS idx_adjunto_blobs_pendientes
+    ON adjunto_blobs (created_at) WHERE estado = 'pending';
@@ -0,0 +1,11 @@
+-- =============================================================================
+-- 012 - Recolector de adjuntos huérfanos (flask gc-adjuntos)
+-- Índices para las diferencias de conjuntos entre el listado del storage y
+-- las rutas referenciadas por pedido_adjuntos / adjunto_blobs.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_adjunto_blobs_storage_path ON adjunto_blobs (storage_path);
+CREATE INDEX IF NOT EXISTS idx_adjunto_blobs_thumb_path ON adjunto_blobs (thumb_path) WHERE thumb_path IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_adjunto_blobs_preview_path ON adjunto_blobs (preview_path) WHERE preview_path IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_adjunto_blobs_sin_refs ON adjunto_blobs (created_at) WHERE ref_count <= 0;
+CREATE INDEX IF NOT EXISTS idx_pedido_adjuntos_pedido ON pedido_adjuntos (pedido_numero);
@@ -0,0 +1,15 @@
+-- =============================================================================
+-- 013 - Comentarios paginados
+-- Índice compuesto para el keyset (pedido_numero, created_at, id) y contador
+-- por pedido mantenido por ComentariosRepository.create/delete.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_pedido_comentarios_pedido_fecha
+    ON pedido_comentarios (pedido_numero, created_at DESC, id DESC);
+
+ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS comentarios_count integer NOT NULL DEFAULT 0;
+
+UPDATE pedidos p
+SET comentarios_count = c.n
+FROM (SELECT pedido_numero, count(*) AS n FROM pedido_comentarios GROUP BY pedido_numero) c
+WHERE c.pedido_numero = p.numero_pedido;
@@ -0,0 +1,16 @@
+-- =============================================================================
+-- 014 - Inicio del estado 'pending' de cada blob
+-- created_at no sirve para medir cuánto lleva pendiente una subida: un blob
+-- 'failed' que se vuelve a subir pasa a 'pending' conservando su fecha de
+-- creación. AdjuntosRepository.create fija pendiente_desde al insertar y al
+-- reintentar; ColaSubidas.revisar_pendientes mide el timeout desde ahí.
+-- =============================================================================
+
+ALTER TABLE adjunto_blobs ADD COLUMN IF NOT EXISTS pendiente_desde timestamptz;
+
+UPDATE adjunto_blobs SET pendiente_desde = created_at
+WHERE estado = 'pending' AND pendiente_desde IS NULL;
+
+DROP INDEX IF EXISTS idx_adjunto_blobs_pendientes;
+CREATE INDEX IF NOT EXISTS idx_adjunto_blobs_pendiente_desde
+    ON adjunto_blobs (pendiente_desde) WHERE estado = 'pending';